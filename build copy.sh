@@ -59,7 +59,7 @@ APP_ID=YOUR_DERIV_APP_ID
 SYMBOL=R_75
 GRANULARITY=300
 CANDLE_COUNT=100
-CSV_FILE=data/data.csv
+HISTORY_DIR=data/history
 CHART_FILE=chart.png
 UPDATE_INTERVAL=300
 TELEGRAM_TOKEN=YOUR_TELEGRAM_BOT_TOKEN
@@ -5,8 +5,14 @@ from django.conf.urls.static import static
 from trading_bot import views as bot_views
 
 urlpatterns = [
+    path('admin/profiles/', admin.site.admin_view(bot_views.profiles), name='profiles'),
+    path('admin/profiles/<str:name>', admin.site.admin_view(bot_views.profile_download), name='profile_download'),
     path('admin/', admin.site.urls),
     path('api/bot/status/', bot_views.bot_status, name='bot_status'),
+    path('api/signals/latest', bot_views.latest_signals, name='latest_signals'),
+    path('api/signals/stream', bot_views.signal_stream, name='signal_stream'),
+    path('api/signals/<str:symbol>/<str:timeframe>', bot_views.series_signal, name='series_signal'),
+    path('metrics', bot_views.metrics_view, name='metrics'),
 ]
 
 # Add static files serving during development
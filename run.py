@@ -1,33 +1,105 @@
 import os
 import sys
+import json
 import subprocess
 import threading
 import time
 import signal
+import urllib.error
+import urllib.request
+from gunicorn_config import bind
+
+# How long to wait for each service to report ready
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", 60))
+# Written by each bot process once it is serving updates, see trading_bot/startup.py
+HEARTBEAT_FILE = "bot_heartbeat.{pid}.txt"
 
 def run_django():
     print("Starting Django with Gunicorn...")
     subprocess.run(["gunicorn", "--config", "gunicorn_config.py", "deriv.wsgi:application"])
 
-def run_bot():
+def run_stream_server():
+    # Server-Sent Events need long-lived async connections, so they are served by the ASGI app
+    port = os.getenv("STREAM_PORT", "8001")
+    print(f"Starting signal stream server on port {port}...")
+    # SSE needs no websocket support, and the websockets version python-deriv-api pins is too old for uvicorn
+    subprocess.run(["uvicorn", "deriv.asgi:application", "--host", "0.0.0.0", "--port", port, "--ws", "none"])
+
+def start_bot(launched_at):
     print("Starting Trading Bot...")
-    subprocess.run([sys.executable, "manage.py", "run_bot"])
+    # The bot reports the time before its own timer started as the "launch" phase
+    env = dict(os.environ, BOT_LAUNCHED_AT=str(launched_at))
+    return subprocess.Popen([sys.executable, "manage.py", "run_bot"], env=env)
+
+def http_ready(url):
+    try:
+        urllib.request.urlopen(url, timeout=1)
+    except urllib.error.HTTPError:
+        # Any HTTP answer, even an error status, means the server is up
+        return True
+    except OSError:
+        return False
+    return True
+
+def bot_ready(launched_at, pid):
+    try:
+        with open(HEARTBEAT_FILE.format(pid=pid)) as f:
+            heartbeat = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Ignore a heartbeat left behind by a previous run
+    return heartbeat if heartbeat.get("ready_at", 0) >= launched_at else None
+
+def wait_until_ready(name, check, launched_at, process=None):
+    """Poll check() until it returns something truthy and report how long that took"""
+    while time.time() - launched_at < READY_TIMEOUT:
+        if process is not None and process.poll() is not None:
+            print(f"{name} exited with code {process.returncode} before it was ready")
+            return None
+        result = check()
+        if result:
+            print(f"{name} ready after {time.time() - launched_at:.2f}s")
+            return result
+        time.sleep(0.1)
+    print(f"{name} not ready after {READY_TIMEOUT:.0f}s")
+    return None
 
 def main():
+    launched_at = time.time()
+
     # Start Django in a separate thread
     django_thread = threading.Thread(target=run_django)
     django_thread.daemon = True
     django_thread.start()
-    
-    # Give Django some time to start
-    time.sleep(5)
-    
-    # Start the bot in the main thread
+
+    # Start the ASGI signal stream server in another thread
+    stream_thread = threading.Thread(target=run_stream_server)
+    stream_thread.daemon = True
+    stream_thread.start()
+
+    # The bot does not depend on the web servers, so everything starts at once
+    bot = start_bot(launched_at)
+
     try:
-        run_bot()
+        web_port = bind.rsplit(":", 1)[1]
+        stream_port = os.getenv("STREAM_PORT", "8001")
+        wait_until_ready("Django", lambda: http_ready(f"http://127.0.0.1:{web_port}/api/bot/status/"), launched_at)
+        wait_until_ready("Signal stream server",
+                         lambda: http_ready(f"http://127.0.0.1:{stream_port}/api/bot/status/"), launched_at)
+        heartbeat = wait_until_ready("Trading Bot", lambda: bot_ready(launched_at, bot.pid), launched_at, bot)
+        if heartbeat:
+            phases = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in heartbeat["phases"].items())
+            print(f"Trading Bot startup: {phases}")
+
+        bot.wait()
     except KeyboardInterrupt:
         print("Shutting down...")
-    
+        # The bot got the same SIGINT from the terminal; give it time to stop cleanly
+        try:
+            bot.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            bot.kill()
+
     # Wait for Django thread to finish
     django_thread.join(timeout=5)
 
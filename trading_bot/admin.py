@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import AnalysisResult
+from .models import AnalysisResult, Subscription
 # Register your models here.
 
 
-admin.site.register(AnalysisResult)
\ No newline at end of file
+admin.site.register(AnalysisResult)
+admin.site.register(Subscription)
\ No newline at end of file
@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+from .indicators import indicator_columns
+from .pattern_recognition import pattern_signals
+
+BUY = 1
+SELL = -1
+HOLD = 0
+
+# The strategy constants analyze_data uses; sweeps vary these
+DEFAULT_PARAMS = {
+    'sma_fast': 5,
+    'sma_slow': 10,
+    'rsi_window': 14,
+    'rsi_upper': 70,
+    'rsi_lower': 30,
+    'double_tolerance': 0.01,
+    'hs_tolerance': 0.05,
+    'double_top_weight': 0.7,
+    'double_bottom_weight': 0.7,
+    'hs_weight': 0.8,
+}
+
+
+def load_candles(path):
+    """Read candles saved in the bot's CSV layout (close, epoch, high, low, open)"""
+    df = pd.read_csv(path)
+    df['epoch'] = pd.to_datetime(df['epoch'])
+    return df.sort_values('epoch').reset_index(drop=True)
+
+
+def signal_series(closes, **params):
+    """Return the analyze_data recommendation at every bar as +1 (Buy), -1 (Sell) or 0 (Hold).
+
+    Applies the same rule as analyze_data to full-history indicator columns:
+    a pattern vote wins when there is one, otherwise the SMA crossover, MACD and RSI
+    decide. Comparisons against NaN are False, so bars before an indicator
+    has enough history come out as Hold, as they do in analyze_data.
+    Keyword arguments override DEFAULT_PARAMS.
+    """
+    params = {**DEFAULT_PARAMS, **params}
+    closes = np.asarray(closes, dtype=np.float64)
+    columns = indicator_columns(closes, sma_windows=(params['sma_fast'], params['sma_slow']),
+                                rsi_window=params['rsi_window'])
+    sma_fast, sma_slow = columns[f"SMA_{params['sma_fast']}"], columns[f"SMA_{params['sma_slow']}"]
+    macd, macd_signal, rsi = columns['MACD'], columns['MACD_signal'], columns['RSI']
+
+    traditional = np.full(len(closes), HOLD, dtype=np.int8)
+    traditional[(sma_fast < sma_slow) & (macd < macd_signal) & (rsi > params['rsi_lower'])] = SELL
+    traditional[(sma_fast > sma_slow) & (macd > macd_signal) & (rsi < params['rsi_upper'])] = BUY
+
+    patterns = pattern_signals(closes, params['double_tolerance'], params['hs_tolerance'], weights={
+        'Double Top': params['double_top_weight'],
+        'Double Bottom': params['double_bottom_weight'],
+        'Head and Shoulders': params['hs_weight'],
+    })
+    return np.where(patterns != HOLD, patterns, traditional).astype(np.int8)
+
+
+def positions_from_signals(signals, allow_short=True):
+    """Turn signals into positions held after each bar's close.
+
+    Buy goes long, Sell goes short (or flat when shorting is not allowed)
+    and Hold keeps whatever position is open.
+    """
+    signals = np.asarray(signals, dtype=np.int8)
+    targets = signals if allow_short else np.maximum(signals, 0)
+    bars = np.arange(len(signals))
+    last_signal = np.maximum.accumulate(np.where(signals != HOLD, bars, -1))
+    positions = np.where(last_signal >= 0, targets[np.maximum(last_signal, 0)], 0)
+    return positions.astype(np.int8)
+
+
+class BacktestResult:
+    """Per-bar series and summary statistics of one backtest run"""
+
+    def __init__(self, epochs, closes, signals, positions, returns, trade_returns):
+        self.epochs = epochs
+        self.closes = closes
+        self.signals = signals
+        self.positions = positions
+        self.returns = returns
+        self.trade_returns = trade_returns
+        self.equity = np.cumprod(1 + returns)
+        self.drawdown = self.equity / np.maximum.accumulate(self.equity) - 1 if len(returns) else returns
+
+    @property
+    def trades(self):
+        return len(self.trade_returns)
+
+    @property
+    def hit_rate(self):
+        """Share of trades that closed (or are marked) with a profit"""
+        return float(np.mean(self.trade_returns > 0)) if self.trades else 0.0
+
+    @property
+    def total_return(self):
+        return float(self.equity[-1] - 1) if len(self.equity) else 0.0
+
+    @property
+    def max_drawdown(self):
+        return float(self.drawdown.min()) if len(self.drawdown) else 0.0
+
+    def summary(self):
+        return {
+            'bars': len(self.closes),
+            'buy_signals': int(np.count_nonzero(self.signals == BUY)),
+            'sell_signals': int(np.count_nonzero(self.signals == SELL)),
+            'trades': self.trades,
+            'hit_rate': round(self.hit_rate, 4),
+            'total_return': round(self.total_return, 6),
+            'max_drawdown': round(self.max_drawdown, 6),
+        }
+
+    def to_frame(self):
+        """Return the per-bar series (signal, position, return, equity, drawdown) as a DataFrame"""
+        return pd.DataFrame({
+            'epoch': self.epochs,
+            'close': self.closes,
+            'signal': self.signals,
+            'position': self.positions,
+            'return': self.returns,
+            'equity': self.equity,
+            'drawdown': self.drawdown,
+        })
+
+
+def simulate(closes, signals, fee=0.0, allow_short=True, epochs=None):
+    """Trade a signal series at each bar's close and return a BacktestResult.
+
+    The position taken at the close of bar t earns bar t+1's return, and
+    ``fee`` (a fraction of notional) is charged for every unit of position
+    change, so a reversal from long to short pays it twice. Trade returns
+    compound the bars each trade was held, less the fees paid to open and
+    close it; a trade still open at the end is marked at the last close.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    signals = np.asarray(signals, dtype=np.int8)
+    n = len(closes)
+    positions = positions_from_signals(signals, allow_short)
+
+    bar_returns = np.zeros(n)
+    bar_returns[1:] = closes[1:] / closes[:-1] - 1
+    held = np.zeros(n, dtype=np.int8)
+    held[1:] = positions[:-1]
+    turnover = np.abs(np.diff(positions.astype(np.int16), prepend=0))
+    returns = held * bar_returns - fee * turnover
+
+    # Number trades by the bar that opened them; bar t belongs to the trade held into it
+    opened = (positions != 0) & (np.diff(positions.astype(np.int16), prepend=0) != 0)
+    trade_ids = np.cumsum(opened) - 1
+    held_ids = np.full(n, -1)
+    held_ids[1:] = np.where(positions[:-1] != 0, trade_ids[:-1], -1)
+    count = int(opened.sum())
+    in_trade = held_ids >= 0
+    growth = np.bincount(held_ids[in_trade], weights=np.log1p(held[in_trade] * bar_returns[in_trade]),
+                         minlength=count)
+    # Entry and exit fee for every trade, except no exit fee for one still open at the end
+    fees = np.full(count, 2 * fee)
+    if count and positions[-1] != 0:
+        fees[-1] = fee
+    trade_returns = np.expm1(growth) - fees
+
+    if epochs is None:
+        epochs = np.arange(n)
+    return BacktestResult(epochs, closes, signals, positions, returns, trade_returns)
+
+
+def run_backtest(candles, fee=0.0, allow_short=True, **params):
+    """Backtest the analyze_data signals over a candle DataFrame with ``epoch`` and ``close`` columns"""
+    closes = candles['close'].values
+    return simulate(closes, signal_series(closes, **params), fee, allow_short, epochs=candles['epoch'].values)
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .candle_store import CandleStore
+from .pattern_recognition import PatternRecognition, scan_patterns
+from .backtest import signal_series
+from .kernels import analyze_matrix
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000, 1000000)
+# Bars per series in the batched benchmarks, the bot's default CANDLE_COUNT
+BATCH_BARS = 100
+FIXTURE_FILE = 'data.csv'
+
+
+def make_candles(size, seed=0, source=FIXTURE_FILE, granularity=300):
+    """Build a ``size``-bar candle DataFrame in the bot's layout from the recorded data.csv.
+
+    Returns are bootstrapped from the log returns of the recorded closes
+    (and the bar shape from its high/low/open offsets) with a fixed seed, so
+    every run and every machine benchmarks the same data.
+    """
+    recorded = pd.read_csv(source)
+    closes = recorded['close'].values
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(1, len(closes), size)
+
+    log_returns = np.diff(np.log(closes))
+    close = closes[0] * np.exp(np.cumsum(log_returns[picks - 1]))
+    high = close * (recorded['high'].values / closes)[picks]
+    low = close * (recorded['low'].values / closes)[picks]
+    open_ = close * (recorded['open'].values / closes)[picks]
+    start = int(pd.Timestamp(recorded['epoch'].iloc[0]).timestamp())
+    epochs = start + granularity * np.arange(size)
+    return pd.DataFrame({
+        'close': close,
+        'epoch': pd.to_datetime(epochs, unit='s'),
+        'high': high,
+        'low': low,
+        'open': open_,
+    })
+
+
+def recorded_response(df):
+    """The ticks_history response Deriv would send for a candle DataFrame"""
+    epochs = df['epoch'].values.astype('datetime64[s]').astype('int64')
+    return {
+        'candles': [
+            {'epoch': int(epoch), 'open': o, 'high': h, 'low': l, 'close': c}
+            for epoch, o, h, l, c in zip(epochs, df['open'].values, df['high'].values,
+                                          df['low'].values, df['close'].values)
+        ],
+        'msg_type': 'candles',
+    }
+
+
+def _on_loop(setup):
+    """Give an async benchmark one event loop for all of its calls.
+
+    ``setup(df, run_until_complete)`` builds the timed function; creating
+    and closing a loop per call would cost more than most of what is timed.
+    The loop is closed through the function's ``close`` once measured.
+    """
+    def prepare(df):
+        loop = asyncio.new_event_loop()
+        run = setup(df, loop.run_until_complete)
+        run.close = loop.close
+        return run
+    return prepare
+
+
+@_on_loop
+def bench_analyze_data(df, run_until_complete):
+    from .bot import analyze_data
+
+    def run():
+        run_until_complete(analyze_data(df))
+    return run
+
+
+def _pattern_check(method):
+    def setup(df):
+        analyzer = PatternRecognition.__new__(PatternRecognition)
+        analyzer.df = df
+
+        def run():
+            analyzer.patterns = {}
+            method(analyzer)
+        return run
+    return setup
+
+
+def bench_plot_chart(df):
+    from .bot import analyze_data, plot_chart
+    analyzed, _, _ = asyncio.run(analyze_data(df))
+    path = os.path.join(tempfile.gettempdir(), 'benchmark_chart.png')
+
+    def run():
+        plot_chart(analyzed, 'BENCH', path)
+    return run
+
+
+@_on_loop
+def bench_fetch_deriv_candles(df, run_until_complete):
+    """Parse a recorded response into a fresh CandleStore and build the DataFrame, as a cold fetch does"""
+    response = json.loads(json.dumps(recorded_response(df)))
+    size = len(df)
+
+    async def send(request):
+        return response
+
+    def run():
+        store = CandleStore(send, capacity=size, clock=lambda: 0)
+        run_until_complete(store.frame('BENCH', 300, size))
+    return run
+
+
+def bench_pattern_scan(df):
+    closes = df['close'].values
+    return lambda: scan_patterns(closes)
+
+
+def bench_signal_series(df):
+    closes = df['close'].values
+    return lambda: signal_series(closes)
+
+
+def bench_analyze_matrix(df):
+    """Analyze the closes cut into BATCH_BARS-bar series in one batch, as a scan of many symbols would"""
+    closes = df['close'].values
+    rows = max(1, len(closes) // BATCH_BARS)
+    matrix = np.ascontiguousarray(closes[:rows * BATCH_BARS].reshape(rows, -1))
+    return lambda: analyze_matrix(matrix)
+
+
+BENCHMARKS = {
+    'analyze_data': bench_analyze_data,
+    'pattern_double_top': _pattern_check(PatternRecognition.check_double_top),
+    'pattern_double_bottom': _pattern_check(PatternRecognition.check_double_bottom),
+    'pattern_head_shoulders': _pattern_check(PatternRecognition.check_head_shoulders),
+    'plot_chart': bench_plot_chart,
+    'fetch_deriv_candles': bench_fetch_deriv_candles,
+    'pattern_scan': bench_pattern_scan,
+    'signal_series': bench_signal_series,
+    'analyze_matrix': bench_analyze_matrix,
+}
+
+
+def measure(func, min_time=0.5, max_repeats=50, min_repeats=3):
+    """Call ``func`` after one warm-up until ``min_time`` has passed (within the repeat bounds)"""
+    func()
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_repeats and (len(timings) < min_repeats or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+        # A single call over the budget is enough for very slow cases
+        if timings[0] > min_time * 4:
+            break
+    return {
+        'repeats': len(timings),
+        'min_ms': round(min(timings) * 1000, 4),
+        'median_ms': round(statistics.median(timings) * 1000, 4),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 4),
+        'max_ms': round(max(timings) * 1000, 4),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_benchmarks(names=None, sizes=DEFAULT_SIZES, min_time=0.5, max_repeats=50, progress=None):
+    """Run the selected benchmarks at every size and return a JSON-serializable report"""
+    results = []
+    for size in sizes:
+        df = make_candles(size)
+        for name in names or BENCHMARKS:
+            func = BENCHMARKS[name](df)
+            try:
+                result = {'name': name, 'size': size, **measure(func, min_time, max_repeats)}
+            finally:
+                if hasattr(func, 'close'):
+                    func.close()
+            results.append(result)
+            if progress:
+                progress(result)
+    return {'environment': environment(), 'results': results}
+
+
+def compare(report, baseline):
+    """Return (name, size, baseline_ms, current_ms, ratio) for the cases present in both reports"""
+    previous = {(r['name'], r['size']): r for r in baseline['results']}
+    rows = []
+    for result in report['results']:
+        before = previous.get((result['name'], result['size']))
+        if before is None:
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        rows.append((result['name'], result['size'], before['median_ms'], result['median_ms'], ratio))
+    return rows
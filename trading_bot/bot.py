@@ -1,17 +1,34 @@
 import os
 import logging
 import asyncio
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime
-from deriv_api import DerivAPI
 from dotenv import load_dotenv
 import time
+from signal import SIGINT, SIGTERM
 from telegram import Bot, Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
-import ta  # Technical analysis package
+from telegram.error import Forbidden
 from django.conf import settings
-from .pattern_recognition import PatternRecognition
+from .pattern_recognition import PATTERNS
+from .connection import DerivConnectionPool
+from .candle_cache import CandleCache
+from .candle_store import CandleStore, FIELDS
+from .streaming import CandleStream
+from .indicators import IndicatorEngine
+from .kernels import SIGNAL_NAMES, analyze_matrix, indicator_matrix
+from .rendering import ChartRenderer, chart_inputs, render_chart
+from .broadcast import SubscriptionRegistry
+from .delivery import DeliveryQueue, BROADCAST
+from .history import CandleHistory
+from .persistence import AnalysisRecorder, SubscriptionStore
+from .snapshot import SnapshotPublisher, SIGNALS_SNAPSHOT_FILE
+from .metrics import metrics
+from .profiling import MODES as PROFILE_MODES, Profiler, ProfilerBusy
+from .startup import StartupTimer, clear_heartbeat, write_heartbeat
+from .scanner import MarketScanner
+from .cluster import POLLER, Cluster
 
 # Load environment variables
 load_dotenv()
@@ -25,10 +42,101 @@ SYMBOL = os.getenv('SYMBOL', 'R_75')
 GRANULARITY = int(os.getenv('GRANULARITY', 300))
 # GRANULARITY = int(os.getenv('GRANULARITY', 60))
 CANDLE_COUNT = int(os.getenv('CANDLE_COUNT', 100))
-CSV_FILE = os.getenv('CSV_FILE', 'data.csv')
+HISTORY_DIR = os.getenv('HISTORY_DIR', os.path.join('data', 'history'))
 CHART_FILE = os.path.join('static', os.getenv('CHART_FILE', 'chart.png'))
 UPDATE_INTERVAL = int(os.getenv('UPDATE_INTERVAL', 300))
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN', 'your_bot_token')
+DERIV_API_TOKEN = os.getenv('DERIV_API_TOKEN', '')
+DERIV_ENDPOINT = os.getenv('DERIV_ENDPOINT', 'ws.derivws.com')
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '')
+DERIV_POOL_SIZE = int(os.getenv('DERIV_POOL_SIZE', 2))
+DERIV_HEALTH_CHECK_INTERVAL = int(os.getenv('DERIV_HEALTH_CHECK_INTERVAL', 30))
+CANDLE_STORE_CAPACITY = int(os.getenv('CANDLE_STORE_CAPACITY', 1000))
+CHART_RENDER_WORKERS = int(os.getenv('CHART_RENDER_WORKERS', 2))
+CHART_CACHE_MB = int(os.getenv('CHART_CACHE_MB', 32))
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_GROUP_RATE = float(os.getenv('TELEGRAM_GROUP_RATE', 20 / 60))
+TIMEFRAME_TIMEOUT = int(os.getenv('TIMEFRAME_TIMEOUT', 20))
+STREAMING_ENABLED = os.getenv('STREAMING_ENABLED', 'false').lower() == 'true'
+STREAM_SYMBOLS = os.getenv('STREAM_SYMBOLS', 'R_75').split(',')
+STREAM_TIMEFRAMES = os.getenv('STREAM_TIMEFRAMES', '1h').split(',')
+SCAN_CONCURRENCY = int(os.getenv('SCAN_CONCURRENCY', 8))
+SCAN_EDIT_INTERVAL = float(os.getenv('SCAN_EDIT_INTERVAL', 2))
+SCAN_TOP = int(os.getenv('SCAN_TOP', 15))
+BOT_PARTITIONS = int(os.getenv('BOT_PARTITIONS', 1))
+BOT_PARTITION_IDS = [int(partition) for partition in os.getenv('BOT_PARTITION_IDS', '').split(',') if partition.strip()] or None
+BOT_POLLER = os.getenv('BOT_POLLER', 'true').lower() == 'true'
+LEASE_TTL = int(os.getenv('LEASE_TTL', 30))
+LEASE_RENEW_INTERVAL = int(os.getenv('LEASE_RENEW_INTERVAL', 10))
+SUBSCRIPTION_SYNC_INTERVAL = int(os.getenv('SUBSCRIPTION_SYNC_INTERVAL', 10))
+ADMIN_USER_IDS = {int(user_id) for user_id in os.getenv('ADMIN_USER_IDS', '').split(',') if user_id.strip()}
+
+# Shared Deriv connections, opened lazily on the first request
+deriv_pool = DerivConnectionPool(
+    APP_ID,
+    size=DERIV_POOL_SIZE,
+    token=DERIV_API_TOKEN or None,
+    endpoint=DERIV_ENDPOINT,
+    health_check_interval=DERIV_HEALTH_CHECK_INTERVAL
+)
+
+# Per-(symbol, granularity) ring buffers, refreshed incrementally over the pool
+candle_store = CandleStore(deriv_pool.send, capacity=max(CANDLE_STORE_CAPACITY, CANDLE_COUNT))
+
+# Closed candles are appended to columnar files per (symbol, granularity) under HISTORY_DIR
+candle_history = CandleHistory(HISTORY_DIR)
+
+# Running SMA/RSI/MACD state per (symbol, granularity), updated per new or revised bar
+indicator_engine = IndicatorEngine(capacity=max(CANDLE_STORE_CAPACITY, CANDLE_COUNT))
+
+# Charts are rendered to in-memory PNGs in worker processes, off the event loop
+chart_renderer = ChartRenderer(workers=CHART_RENDER_WORKERS, cache_bytes=CHART_CACHE_MB * 1024 * 1024)
+
+# Live candle subscriptions that keep candle_store current when STREAMING_ENABLED is set
+candle_stream = CandleStream(deriv_pool, candle_store, history_count=CANDLE_COUNT)
+
+# Every outgoing Telegram message goes through this rate-limited queue
+outbox = DeliveryQueue(
+    global_rate=TELEGRAM_GLOBAL_RATE,
+    chat_rate=TELEGRAM_CHAT_RATE,
+    group_rate=TELEGRAM_GROUP_RATE
+)
+
+# Every analysis is saved as an AnalysisResult by a batching background writer
+analysis_recorder = AnalysisRecorder()
+
+# Latest signal per series, published to SIGNALS_SNAPSHOT_FILE for the web API
+signal_snapshot = SnapshotPublisher(SIGNALS_SNAPSHOT_FILE)
+
+# Queue and connection gauges reported next to the stage timings on /metrics
+metrics.collect('trading_bot_deriv_requests_in_flight', 'Deriv requests waiting for a response.',
+                lambda: sum(deriv_pool.stats()['in_flight']))
+metrics.collect('trading_bot_deriv_connections', 'Live Deriv connections.',
+                lambda: deriv_pool.stats()['connected'])
+metrics.collect('trading_bot_outbox_depth', 'Telegram messages waiting in the delivery queue.',
+                lambda: outbox.depth)
+metrics.collect('trading_bot_chart_renders_in_flight', 'Charts being rendered or waiting for a worker.',
+                lambda: chart_renderer.queue_depth)
+
+# On-demand captures for /profile and the admin site, saved under PROFILE_DIR
+profiler = Profiler()
+
+# Auto-update subscribers, grouped so each (symbol, timeframe, interval) is analyzed once per tick.
+# Saved in subscription_store; the registry only holds the partitions this process broadcasts.
+subscriptions = SubscriptionRegistry()
+subscription_store = SubscriptionStore()
+
+# Leases on polling Telegram and on each broadcast partition, shared with the other bot processes
+cluster = Cluster(
+    partitions=BOT_PARTITIONS,
+    partition_ids=BOT_PARTITION_IDS,
+    poller=BOT_POLLER,
+    ttl=LEASE_TTL,
+    renew_interval=LEASE_RENEW_INTERVAL
+)
+metrics.collect('trading_bot_cluster_roles', 'Roles (polling, broadcast partitions) this process holds.',
+                lambda: len(cluster.held))
 
 # Available symbols for analysis
 AVAILABLE_SYMBOLS = [
@@ -48,30 +156,34 @@ AVAILABLE_TIMEFRAMES = {
     '1d': 86400
 }
 
-async def fetch_deriv_candles(symbol=SYMBOL, granularity=GRANULARITY, count=CANDLE_COUNT, csv_file=CSV_FILE):
+def archive_closed_candles(symbol, granularity, count):
+    """Queue the closed bars among the latest ``count`` in candle_store for the on-disk history.
+
+    The write happens in the background; bars missing since the last stored one are fetched from Deriv first.
+    """
+    views = candle_store.buffer(symbol, granularity).arrays(count)
+    # The forming bar can still change, so only bars whose period has ended are stored
+    closed = views['epoch'] + granularity <= time.time()
+    if closed.any():
+        candle_history.submit(
+            symbol, granularity, np.vstack([views[field][closed] for field in FIELDS]),
+            backfill=lambda start, end: candle_store.history(symbol, granularity, start=start, end=end)
+        )
+
+async def download_deriv_candles(symbol=SYMBOL, granularity=GRANULARITY, count=CANDLE_COUNT):
     logger.info(f"Fetching data for {symbol}")
-    api = DerivAPI(app_id=APP_ID)
-
-    while not api.connected:
-        await asyncio.sleep(0.1)
-
-    request = {
-        "ticks_history": symbol,
-        "adjust_start_time": 1,
-        "count": count,
-        "end": "latest",
-        "granularity": granularity,
-        "style": "candles"
-    }
-    response = await api.send(request)
-    candles = response.get("candles", [])
-
-    if candles:
-        df = pd.DataFrame(candles)
-        df['epoch'] = pd.to_datetime(df['epoch'], unit='s')
-        df.to_csv(csv_file, index=False)
-        return df
-    return pd.DataFrame()
+
+    # Only bars after the last stored epoch are requested from Deriv
+    df = await candle_store.frame(symbol, granularity, count)
+    archive_closed_candles(symbol, granularity, count)
+    return df
+
+# Candles are shared until the next bar opens; identical concurrent fetches share one request
+candle_cache = CandleCache(download_deriv_candles)
+
+async def fetch_deriv_candles(symbol=SYMBOL, granularity=GRANULARITY, count=CANDLE_COUNT):
+    """Return candles from the shared cache. The DataFrame is shared, do not modify it in place."""
+    return await candle_cache.get(symbol, granularity, count)
 
 def detect_chart_patterns(df):
     """Detect simple chart patterns."""
@@ -93,77 +205,67 @@ def detect_chart_patterns(df):
 
     return pattern
 
-async def analyze_data(df):
+async def analyze_data(df, key=None):
+    """Analyze one candle DataFrame, a one-row adapter over kernels.analyze_matrix.
+
+    Returns the frame indexed by epoch with the indicator columns added, the
+    recommendation and the detected patterns. With a (symbol, granularity)
+    key the indicators come from indicator_engine, which only computes the
+    bars that are new or revised since the last call.
+    """
     try:
-        df = df.copy()
-        df.set_index('epoch', inplace=True)
-
-        # Calculate moving averages
-        df['SMA_5'] = df['close'].rolling(window=5).mean()
-        df['SMA_10'] = df['close'].rolling(window=10).mean()
-
-        # RSI
-        df['RSI'] = ta.momentum.RSIIndicator(df['close'], window=14).rsi()
-
-        # MACD
-        macd = ta.trend.MACD(df['close'])
-        df['MACD'] = macd.macd()
-        df['MACD_signal'] = macd.macd_signal()
-
-        # Use PatternRecognition for advanced pattern detection
-        pattern_analyzer = PatternRecognition(df)
-        recommendation, pattern_signals = pattern_analyzer.get_trading_signal()
-
-        # Combine traditional signals with pattern recognition
-        traditional_signal = "Hold"
-        if df['SMA_5'].iloc[-1] > df['SMA_10'].iloc[-1] and df['MACD'].iloc[-1] > df['MACD_signal'].iloc[-1] and df['RSI'].iloc[-1] < 70:
-            traditional_signal = "Buy"
-        elif df['SMA_5'].iloc[-1] < df['SMA_10'].iloc[-1] and df['MACD'].iloc[-1] < df['MACD_signal'].iloc[-1] and df['RSI'].iloc[-1] > 30:
-            traditional_signal = "Sell"
-
-        # If pattern recognition and traditional signals agree, increase confidence
-        # Otherwise, prefer pattern recognition as it's more sophisticated
-        final_signal = recommendation if recommendation != "Hold" else traditional_signal
-
-        # Get the most significant detected patterns
-        detected_patterns = [pattern for pattern, details in pattern_signals.items()
-                            if details.get('detected', False)]
+        closes = df['close'].values.astype(np.float64)
+
+        # SMA 5/10, RSI(14) and MACD(12, 26, 9)
+        with metrics.span('indicators'):
+            if key is None:
+                indicators = indicator_matrix(closes[None])
+            else:
+                epochs = df['epoch'].values.astype('datetime64[s]').astype('int64')
+                indicators = {column: values[None]
+                              for column, values in indicator_engine.compute(key, epochs, closes).items()}
+
+        # Pattern votes decide, the indicator conditions break ties
+        with metrics.span('patterns'):
+            _, patterns, signals = analyze_matrix(closes[None], indicators)
+
+        columns = {column: df[column].values for column in df.columns if column != 'epoch'}
+        columns.update((column, values[0].copy()) for column, values in indicators.items())
+        analyzed_df = pd.DataFrame(columns, index=pd.Index(df['epoch'].values, name='epoch'))
+
+        detected_patterns = [name for name, _, _ in PATTERNS if patterns[name][0]]
         pattern_str = ", ".join(detected_patterns) if detected_patterns else "None"
 
-        return df, final_signal, pattern_str
+        return analyzed_df, SIGNAL_NAMES[int(signals[0])], pattern_str
 
     except Exception as e:
         logger.error(f"Error in analysis: {str(e)}")
         return df, "Hold", "None"
 
+def timeframe_name(granularity):
+    """Return the AVAILABLE_TIMEFRAMES name of a granularity, e.g. 3600 -> '1h'."""
+    for timeframe, seconds in AVAILABLE_TIMEFRAMES.items():
+        if seconds == granularity:
+            return timeframe
+    return f"{granularity}s"
+
+def record_analysis(symbol, timeframe, analyzed_df, recommendation, patterns):
+    """Publish an analysis to the signals snapshot and queue it for saving as an AnalysisResult."""
+    last = analyzed_df.iloc[-1]
+    values = [float(last[column]) for column in ('close', 'RSI', 'MACD', 'MACD_signal')]
+    # Too few bars for the indicators; the model has no place for missing values
+    if any(np.isnan(values)):
+        return
+    analysis_recorder.record(symbol, timeframe, recommendation, patterns, *values)
+    signal_snapshot.update(symbol, timeframe, recommendation, patterns, *values)
+
 def plot_chart(df, symbol=SYMBOL, chart_file=CHART_FILE):
+    """Render a chart synchronously to a file. The bot itself uses chart_renderer."""
     try:
         os.makedirs(os.path.dirname(chart_file), exist_ok=True)
-        fig, axs = plt.subplots(3, 1, figsize=(12, 10), sharex=True)
-
-        # Price + SMA
-        axs[0].plot(df.index, df['close'], label='Close', color='blue')
-        axs[0].plot(df.index, df['SMA_5'], label='SMA 5', color='orange')
-        axs[0].plot(df.index, df['SMA_10'], label='SMA 10', color='green')
-        axs[0].set_title(f'{symbol} Price & SMA')
-        axs[0].legend()
-
-        # RSI
-        axs[1].plot(df.index, df['RSI'], label='RSI', color='purple')
-        axs[1].axhline(70, color='red', linestyle='--', linewidth=1)
-        axs[1].axhline(30, color='green', linestyle='--', linewidth=1)
-        axs[1].set_title('RSI')
-        axs[1].legend()
-
-        # MACD
-        axs[2].plot(df.index, df['MACD'], label='MACD', color='black')
-        axs[2].plot(df.index, df['MACD_signal'], label='Signal Line', color='magenta')
-        axs[2].set_title('MACD')
-        axs[2].legend()
-
-        plt.tight_layout()
-        plt.savefig(chart_file)
-        plt.close()
+        index, columns = chart_inputs(df)
+        with open(chart_file, 'wb') as f:
+            f.write(render_chart(index, columns, symbol))
         return chart_file
     except Exception as e:
         logger.error(f"Error in chart plotting: {str(e)}")
@@ -175,8 +277,9 @@ async def fetch_and_analyze(symbol=SYMBOL, granularity=GRANULARITY, count=CANDLE
         if df.empty:
             return None, None, None, "Failed to fetch data"
 
-        analyzed_df, recommendation, pattern = await analyze_data(df)
-        chart_path = plot_chart(analyzed_df, symbol)
+        analyzed_df, recommendation, pattern = await analyze_data(df, key=(symbol, granularity))
+        record_analysis(symbol, timeframe_name(granularity), analyzed_df, recommendation, pattern)
+        chart = await chart_renderer.render(analyzed_df, symbol)
 
         current_price = analyzed_df['close'].iloc[-1]
         rsi = analyzed_df['RSI'].iloc[-1]
@@ -194,13 +297,89 @@ async def fetch_and_analyze(symbol=SYMBOL, granularity=GRANULARITY, count=CANDLE
         )
 
         logger.info(signal_message)
-        return analyzed_df, recommendation, chart_path, signal_message
+        return analyzed_df, recommendation, chart, signal_message
 
     except Exception as e:
         logger.error(f"Error in fetch_and_analyze: {str(e)}")
         return None, None, None, f"Error: {str(e)}"
 
+async def analyze_timeframe(symbol, timeframe, count=CANDLE_COUNT):
+    """Fetch and analyze one timeframe, returning (analyzed_df, recommendation, patterns) or None."""
+    granularity = AVAILABLE_TIMEFRAMES[timeframe]
+    df = await fetch_deriv_candles(symbol=symbol, granularity=granularity, count=count)
+    if df.empty:
+        return None
+    analyzed_df, recommendation, patterns = await analyze_data(df, key=(symbol, granularity))
+    record_analysis(symbol, timeframe, analyzed_df, recommendation, patterns)
+    return analyzed_df, recommendation, patterns
+
+async def analyze_timeframes(symbol, timeframes, count=CANDLE_COUNT, timeout=TIMEFRAME_TIMEOUT):
+    """Analyze several timeframes concurrently, mapping each one that fails or times out to None."""
+    async def run(timeframe):
+        metrics.label(timeframe=timeframe)
+        try:
+            return await asyncio.wait_for(analyze_timeframe(symbol, timeframe, count), timeout)
+        except Exception as e:
+            logger.error(f"Error analyzing {symbol} {timeframe}: {e!r}")
+            return None
+
+    results = await asyncio.gather(*(run(timeframe) for timeframe in timeframes))
+    return dict(zip(timeframes, results))
+
+# /scan analyzes the symbol x timeframe grid through here, SCAN_CONCURRENCY series at a time
+market_scanner = MarketScanner(analyze_timeframe, concurrency=SCAN_CONCURRENCY, timeout=TIMEFRAME_TIMEOUT)
+metrics.collect('trading_bot_scan_series_in_flight', 'Series being analyzed by /scan.',
+                lambda: market_scanner.in_flight)
+
+# Signal and confidence of each pattern's vote, as PatternRecognition weighs it
+PATTERN_VOTES = {name: (signal, confidence) for name, signal, confidence in PATTERNS}
+
+def signal_strength(analyzed_df, recommendation, patterns):
+    """Score how strongly an analysis backs its recommendation, 0 for Hold.
+
+    Detected patterns add their confidence when they vote for the signal and
+    subtract it when they vote against it. SMA 5/10 and MACD each add 0.5 when
+    they agree with it, and RSI breaks ties by how far it leans the same way.
+    """
+    if recommendation not in ("Buy", "Sell"):
+        return 0.0
+    direction = 1 if recommendation == "Buy" else -1
+    strength = 0.0
+    for pattern in patterns.split(", "):
+        if pattern in PATTERN_VOTES:
+            signal, confidence = PATTERN_VOTES[pattern]
+            strength += confidence if signal == recommendation else -confidence
+    last = analyzed_df.iloc[-1]
+    if direction * (last['SMA_5'] - last['SMA_10']) > 0:
+        strength += 0.5
+    if direction * (last['MACD'] - last['MACD_signal']) > 0:
+        strength += 0.5
+    if not np.isnan(last['RSI']):
+        strength += direction * (last['RSI'] - 50) / 100
+    return strength
+
 # Telegram bot functions
+async def reply_text(update: Update, text, **kwargs):
+    """Queue a text reply to the message an update came with."""
+    with metrics.span('telegram_send'):
+        return await outbox.send(update.effective_chat.id, update.effective_message.reply_text, text, **kwargs)
+
+async def reply_photo(update: Update, **kwargs):
+    """Queue a photo reply to the message an update came with."""
+    with metrics.span('telegram_upload'):
+        return await outbox.send(update.effective_chat.id, update.effective_message.reply_photo, **kwargs)
+
+async def edit_text(update: Update, message, text, **kwargs):
+    """Queue an edit of a message the bot sent in the chat of an update."""
+    with metrics.span('telegram_send'):
+        return await outbox.send(update.effective_chat.id, message.edit_text, text, **kwargs)
+
+async def reply_document(update: Update, **kwargs):
+    """Queue a document reply to the message an update came with."""
+    with metrics.span('telegram_upload'):
+        return await outbox.send(update.effective_chat.id, update.effective_message.reply_document, **kwargs)
+
+@metrics.instrument("start")
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a welcome message when the command /start is issued."""
     user = update.effective_user
@@ -211,10 +390,12 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         f"/signal <symbol> - Get trading signals for a specific symbol\n"
         f"/symbols - List all available symbols\n"
         f"/timeframes - List available timeframes\n"
+        f"/scan [timeframes] - Rank the signals of every symbol\n"
         f"/help - Show this help message"
     )
-    await update.message.reply_text(welcome_message)
+    await reply_text(update, welcome_message)
 
+@metrics.instrument("help")
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a help message when the command /help is issued."""
     help_message = (
@@ -225,59 +406,69 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         "/timeframes - List available timeframes\n"
         "/analyze &lt;symbol&gt; &lt;timeframe&gt; - Detailed analysis (e.g., /analyze R_75 1h)\n"
         "/r75 - Comprehensive R_75 analysis across multiple timeframes\n"
+        "/scan [timeframes] - Rank the signals of every symbol (e.g., /scan 1h 4h; all timeframes by default)\n"
         "/auto_start [interval] - Start automatic R_75 analysis (interval in minutes, default: 60)\n"
         "/auto_stop - Stop automatic R_75 analysis\n"
         "/help - Show this help message\n\n"
         "For any issues or feedback, please contact the administrator."
     )
-    await update.message.reply_text(help_message, parse_mode='HTML')
+    await reply_text(update, help_message, parse_mode='HTML')
 
+@metrics.instrument("symbols")
 async def list_symbols(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """List all available symbols."""
     symbols_message = "📈 <b>Available Symbols:</b>\n\n"
     for symbol in AVAILABLE_SYMBOLS:
         symbols_message += f"• {symbol}\n"
     symbols_message += "\nUse /signal &lt;symbol&gt; to get trading signals."
-    await update.message.reply_text(symbols_message, parse_mode='HTML')
+    await reply_text(update, symbols_message, parse_mode='HTML')
 
+@metrics.instrument("timeframes")
 async def list_timeframes(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """List all available timeframes."""
     timeframes_message = "⏱️ <b>Available Timeframes:</b>\n\n"
     for tf, seconds in AVAILABLE_TIMEFRAMES.items():
         timeframes_message += f"• {tf}\n"
     timeframes_message += "\nUse /analyze &lt;symbol&gt; &lt;timeframe&gt; for detailed analysis."
-    await update.message.reply_text(timeframes_message, parse_mode='HTML')
+    await reply_text(update, timeframes_message, parse_mode='HTML')
 
+@metrics.instrument("signal")
 async def signal_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Get trading signal for a specific symbol."""
     if not context.args:
-        await update.message.reply_text("Please specify a symbol. Example: /signal R_75")
+        await reply_text(update, "Please specify a symbol. Example: /signal R_75")
         return
 
     symbol = context.args[0].upper()
     if symbol not in AVAILABLE_SYMBOLS:
-        await update.message.reply_text(
+        await reply_text(
+            update,
             f"Symbol {symbol} not found. Use /symbols to see available options."
         )
         return
 
-    await update.message.reply_text(f"Analyzing {symbol}... Please wait.")
+    metrics.label(symbol=symbol, timeframe=timeframe_name(GRANULARITY))
+    await reply_text(update, f"Analyzing {symbol}... Please wait.")
 
-    _, _, chart_path, signal_message = await fetch_and_analyze(symbol=symbol)
+    _, _, chart, signal_message = await fetch_and_analyze(symbol=symbol)
 
-    if chart_path and os.path.exists(chart_path):
-        await update.message.reply_photo(
-            photo=open(chart_path, 'rb'),
+    if chart:
+        sent = await reply_photo(
+            update,
+            photo=chart.photo,
             caption=signal_message,
             parse_mode='HTML'
         )
+        chart_renderer.remember_upload(chart, sent)
     else:
-        await update.message.reply_text(signal_message, parse_mode='HTML')
+        await reply_text(update, signal_message, parse_mode='HTML')
 
+@metrics.instrument("analyze")
 async def analyze_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Detailed analysis with custom timeframe."""
     if len(context.args) < 2:
-        await update.message.reply_text(
+        await reply_text(
+            update,
             "Please specify both symbol and timeframe. Example: /analyze R_75 1h"
         )
         return
@@ -286,52 +477,57 @@ async def analyze_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     timeframe = context.args[1].lower()
 
     if symbol not in AVAILABLE_SYMBOLS:
-        await update.message.reply_text(
+        await reply_text(
+            update,
             f"Symbol {symbol} not found. Use /symbols to see available options."
         )
         return
 
     if timeframe not in AVAILABLE_TIMEFRAMES:
-        await update.message.reply_text(
+        await reply_text(
+            update,
             f"Timeframe {timeframe} not found. Use /timeframes to see available options."
         )
         return
 
     granularity = AVAILABLE_TIMEFRAMES[timeframe]
+    metrics.label(symbol=symbol, timeframe=timeframe)
 
-    await update.message.reply_text(f"Analyzing {symbol} on {timeframe} timeframe... Please wait.")
+    await reply_text(update, f"Analyzing {symbol} on {timeframe} timeframe... Please wait.")
 
-    _, _, chart_path, signal_message = await fetch_and_analyze(
+    _, _, chart, signal_message = await fetch_and_analyze(
         symbol=symbol,
         granularity=granularity
     )
 
-    if chart_path and os.path.exists(chart_path):
-        await update.message.reply_photo(
-            photo=open(chart_path, 'rb'),
+    if chart:
+        sent = await reply_photo(
+            update,
+            photo=chart.photo,
             caption=signal_message,
             parse_mode='HTML'
         )
+        chart_renderer.remember_upload(chart, sent)
     else:
-        await update.message.reply_text(signal_message, parse_mode='HTML')
+        await reply_text(update, signal_message, parse_mode='HTML')
 
+@metrics.instrument("r75")
 async def r75_analysis_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Detailed analysis of R_75 with pattern recognition."""
-    await update.message.reply_text("Analyzing R_75 with pattern recognition... Please wait.")
+    metrics.label(symbol='R_75')
+    await reply_text(update, "Analyzing R_75 with pattern recognition... Please wait.")
 
-    # Analyze with different timeframes
+    # Analyze all timeframes concurrently; a slow or failed one only drops its own line
     timeframes = ['5m', '15m', '1h', '4h']
+    analyses = await analyze_timeframes('R_75', timeframes, count=100)
     results = []
 
     for timeframe in timeframes:
-        granularity = AVAILABLE_TIMEFRAMES[timeframe]
-        df = await fetch_deriv_candles(symbol='R_75', granularity=granularity, count=100)
-
-        if df.empty:
+        if analyses[timeframe] is None:
             results.append(f"❌ Failed to fetch data for {timeframe} timeframe")
             continue
 
-        analyzed_df, recommendation, patterns = await analyze_data(df)
+        analyzed_df, recommendation, patterns = analyses[timeframe]
 
         # Get key indicators
         current_price = analyzed_df['close'].iloc[-1]
@@ -349,13 +545,11 @@ async def r75_analysis_command(update: Update, context: ContextTypes.DEFAULT_TYP
         )
         results.append(timeframe_result)
 
-    # Generate chart for 1h timeframe
-    df = await fetch_deriv_candles(symbol='R_75', granularity=AVAILABLE_TIMEFRAMES['1h'], count=100)
-    if not df.empty:
-        analyzed_df, _, _ = await analyze_data(df)
-        chart_path = plot_chart(analyzed_df, symbol='R_75')
+    # Chart the 1h timeframe from the frame analyzed above
+    if analyses['1h'] is not None:
+        chart = await chart_renderer.render(analyses['1h'][0], 'R_75')
     else:
-        chart_path = None
+        chart = None
 
     # Determine overall recommendation based on multiple timeframes
     buy_count = sum(1 for result in results if "🟢" in result)
@@ -377,38 +571,203 @@ async def r75_analysis_command(update: Update, context: ContextTypes.DEFAULT_TYP
         f"🕒 {datetime.now().strftime('%H:%M:%S')}"
     )
 
-    if chart_path and os.path.exists(chart_path):
-        await update.message.reply_photo(
-            photo=open(chart_path, 'rb'),
+    if chart:
+        sent = await reply_photo(
+            update,
+            photo=chart.photo,
             caption=message,
             parse_mode='HTML'
         )
+        chart_renderer.remember_upload(chart, sent)
     else:
-        await update.message.reply_text(message, parse_mode='HTML')
+        await reply_text(update, message, parse_mode='HTML')
+
+def format_scan(results, failed, total, finished_in=None):
+    """Build the /scan message from the (strength, symbol, timeframe, recommendation, patterns) found so far."""
+    ranked = sorted((result for result in results if result[3] != "Hold"), key=lambda result: -result[0])
+    done = len(results) + failed
+    lines = []
+    for strength, symbol, timeframe, recommendation, patterns in ranked[:SCAN_TOP]:
+        signal_emoji = "🟢" if recommendation == "Buy" else "🔴"
+        line = f"{signal_emoji} <b>{symbol}</b> {timeframe}: {recommendation} ({strength:.2f})"
+        if patterns != "None":
+            line += f" • {patterns}"
+        lines.append(line)
+    if len(ranked) > SCAN_TOP:
+        lines.append(f"… and {len(ranked) - SCAN_TOP} weaker signals")
+    if not lines:
+        lines.append("No Buy or Sell signals yet.")
+
+    holds = len(results) - len(ranked)
+    status = f"Finished in {finished_in:.1f}s" if finished_in is not None else "Scanning... Please wait."
+    return (
+        f"🔎 <b>MARKET SCAN</b> ({done}/{total} series)\n\n"
+        f"{chr(10).join(lines)}\n\n"
+        f"⚪ Hold: {holds}" + (f" | ❌ Failed: {failed}" if failed else "") + "\n"
+        f"🕒 {status}"
+    )
+
+@metrics.instrument("scan")
+async def run_scan(update: Update, args) -> None:
+    """Analyze every symbol on the requested timeframes, editing one message as results come in."""
+    timeframes = [timeframe.lower() for timeframe in args] or list(AVAILABLE_TIMEFRAMES)
+    for timeframe in timeframes:
+        if timeframe not in AVAILABLE_TIMEFRAMES:
+            await reply_text(
+                update,
+                f"Timeframe {timeframe} not found. Use /timeframes to see available options."
+            )
+            return
+    timeframes = list(dict.fromkeys(timeframes))
+
+    series = [(symbol, timeframe) for symbol in AVAILABLE_SYMBOLS for timeframe in timeframes]
+    started = time.monotonic()
+    results = []
+    failed = 0
+    text = format_scan(results, failed, len(series))
+    message = await reply_text(update, text, parse_mode='HTML')
+    edited_at = time.monotonic()
+
+    async for symbol, timeframe, analysis in market_scanner.scan(series):
+        if analysis is None:
+            failed += 1
+        else:
+            analyzed_df, recommendation, patterns = analysis
+            strength = signal_strength(analyzed_df, recommendation, patterns)
+            results.append((strength, symbol, timeframe, recommendation, patterns))
+
+        # Edits share the chat's rate limit, so intermediate ones are coalesced
+        if time.monotonic() - edited_at < SCAN_EDIT_INTERVAL:
+            continue
+        new_text = format_scan(results, failed, len(series))
+        if new_text == text:
+            continue
+        try:
+            await edit_text(update, message, new_text, parse_mode='HTML')
+            text = new_text
+        except Exception as e:
+            logger.warning(f"Error updating scan results: {str(e)}")
+        edited_at = time.monotonic()
 
-async def periodic_r75_analysis(context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Periodically analyze R_75 and send updates to a specified chat."""
-    chat_id = context.job.data.get('chat_id')
-    if not chat_id:
-        logger.error("No chat_id provided for periodic analysis")
+    try:
+        await edit_text(update, message, format_scan(results, failed, len(series), time.monotonic() - started),
+                        parse_mode='HTML')
+    except Exception as e:
+        logger.error(f"Error sending the final scan results: {str(e)}")
+
+async def scan_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Scan every symbol on the given timeframes, all of them by default."""
+    # Updates are handled one at a time, so a scan must not hold up the handler
+    # Passing the update sends anything the scan raises to the error handler, which tells the user
+    context.application.create_task(run_scan(update, context.args), update=update)
+
+# Commands /profile can run under cProfile
+PROFILED_COMMANDS = {
+    'signal': signal_command,
+    'analyze': analyze_command,
+    'r75': r75_analysis_command,
+}
+
+async def send_profile(update: Update, capture) -> None:
+    """Send a finished capture to the admin who asked for it."""
+    if capture.path is None:
+        await reply_text(update, "❌ The profile could not be saved, see the logs.")
         return
+    with open(capture.path, 'rb') as f:
+        data = f.read()
+    await reply_document(
+        update,
+        document=data,
+        filename=os.path.basename(capture.path),
+        caption=f"🔬 {capture.mode} profile of {capture.label} ({capture.seconds:.1f}s)"
+    )
 
-    logger.info(f"Running periodic R_75 analysis for chat {chat_id}")
+async def profile_window(update: Update, seconds, mode) -> None:
+    """Profile the bot for a while in the background and send the result."""
+    try:
+        capture = await profiler.profile_for(seconds, mode)
+    except ProfilerBusy as e:
+        await reply_text(update, f"❌ {e}")
+        return
+    await send_profile(update, capture)
 
-    # Analyze with 1h timeframe
-    granularity = AVAILABLE_TIMEFRAMES['1h']
-    df = await fetch_deriv_candles(symbol='R_75', granularity=granularity, count=100)
+@metrics.instrument("profile")
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Profile the bot for a few seconds, or one run of a command (admins only)."""
+    if update.effective_user is None or update.effective_user.id not in ADMIN_USER_IDS:
+        await reply_text(update, "This command is only available to administrators.")
+        return
 
-    if df.empty:
-        await context.bot.send_message(
-            chat_id=chat_id,
-            text="❌ Failed to fetch data for R_75 analysis",
-            parse_mode='HTML'
-        )
+    usage = (
+        "Usage:\n"
+        "/profile &lt;seconds&gt; [sample|cprofile] - Profile everything the bot does for a while\n"
+        "/profile &lt;command&gt; [args] - Profile one run of /signal, /analyze or /r75 with cProfile"
+    )
+    if not context.args:
+        await reply_text(update, usage, parse_mode='HTML')
         return
 
-    analyzed_df, recommendation, patterns = await analyze_data(df)
-    chart_path = plot_chart(analyzed_df, symbol='R_75')
+    command = context.args[0].lstrip('/').lower()
+    if command in PROFILED_COMMANDS:
+        if profiler.busy:
+            await reply_text(update, "❌ A capture is already running.")
+            return
+        # The handler sees the remaining arguments as its own
+        context.args = context.args[1:]
+        async with profiler.capture('cprofile', command) as capture:
+            await PROFILED_COMMANDS[command](update, context)
+        await send_profile(update, capture)
+        return
+
+    try:
+        seconds = float(context.args[0])
+    except ValueError:
+        await reply_text(update, usage, parse_mode='HTML')
+        return
+    mode = context.args[1].lower() if len(context.args) > 1 else 'sample'
+    if mode not in PROFILE_MODES:
+        await reply_text(update, usage, parse_mode='HTML')
+        return
+    if profiler.busy:
+        await reply_text(update, "❌ A capture is already running.")
+        return
+
+    seconds = min(seconds, profiler.max_seconds)
+    await reply_text(update, f"🔬 Profiling the bot for {seconds:g}s ({mode})...")
+    # Updates are handled one at a time, so the window must not hold up the handler
+    context.application.create_task(profile_window(update, seconds, mode))
+
+def broadcast_job_name(key):
+    symbol, timeframe, interval = key
+    return f"broadcast_{symbol}_{timeframe}_{interval}"
+
+def schedule_broadcast(application: Application, key, first=10) -> None:
+    """Start the repeating job that serves a broadcast group, first running after ``first`` seconds."""
+    application.job_queue.run_repeating(
+        periodic_broadcast,
+        interval=key[2],
+        first=first,
+        data={'key': key},
+        name=broadcast_job_name(key)
+    )
+
+def drop_broadcasts(application: Application, keys) -> None:
+    """Remove the jobs of broadcast groups that have no subscribers left."""
+    for key in keys:
+        for job in application.job_queue.get_jobs_by_name(broadcast_job_name(key)):
+            job.schedule_removal()
+
+async def build_auto_update(symbol, timeframe):
+    """Analyze a symbol for an automatic update and return (message, chart)."""
+    granularity = AVAILABLE_TIMEFRAMES[timeframe]
+    df = await fetch_deriv_candles(symbol=symbol, granularity=granularity, count=100)
+
+    if df.empty:
+        return f"❌ Failed to fetch data for {symbol} analysis", None
+
+    analyzed_df, recommendation, patterns = await analyze_data(df, key=(symbol, granularity))
+    record_analysis(symbol, timeframe, analyzed_df, recommendation, patterns)
+    chart = await chart_renderer.render(analyzed_df, symbol)
 
     # Get key indicators
     current_price = analyzed_df['close'].iloc[-1]
@@ -419,7 +778,7 @@ async def periodic_r75_analysis(context: ContextTypes.DEFAULT_TYPE) -> None:
     # Create signal message
     signal_emoji = "🟢" if recommendation == "Buy" else "🔴" if recommendation == "Sell" else "⚪"
     message = (
-        f"🔄 <b>R_75 AUTOMATIC UPDATE</b> 🔄\n\n"
+        f"🔄 <b>{symbol} AUTOMATIC UPDATE</b> 🔄\n\n"
         f"{signal_emoji} <b>Signal: {recommendation}</b>\n"
         f"🧠 Patterns: {patterns}\n"
         f"💰 Price: {current_price:.2f}\n"
@@ -427,30 +786,123 @@ async def periodic_r75_analysis(context: ContextTypes.DEFAULT_TYPE) -> None:
         f"📉 MACD: {macd_val:.2f} | Signal: {macd_signal:.2f}\n"
         f"🕒 {datetime.now().strftime('%H:%M:%S')}"
     )
+    return message, chart
 
-    if chart_path and os.path.exists(chart_path):
-        await context.bot.send_photo(
-            chat_id=chat_id,
-            photo=open(chart_path, 'rb'),
-            caption=message,
-            parse_mode='HTML'
-        )
+async def send_auto_update(bot: Bot, chat_id: int, message: str, chart) -> bool:
+    """Send a prepared automatic update to one chat. Returns False if the bot was blocked there."""
+    try:
+        if chart:
+            # The first send uploads the chart, the rest of the group reuses its file_id
+            with metrics.span('telegram_upload'):
+                sent = await outbox.send(
+                    chat_id,
+                    bot.send_photo,
+                    priority=BROADCAST,
+                    chat_id=chat_id,
+                    photo=chart.photo,
+                    caption=message,
+                    parse_mode='HTML'
+                )
+            chart_renderer.remember_upload(chart, sent)
+        else:
+            with metrics.span('telegram_send'):
+                await outbox.send(
+                    chat_id,
+                    bot.send_message,
+                    priority=BROADCAST,
+                    chat_id=chat_id,
+                    text=message,
+                    parse_mode='HTML'
+                )
+    except Forbidden:
+        logger.info(f"Chat {chat_id} blocked the bot, removing its automatic updates")
+        return False
+    except Exception as e:
+        logger.error(f"Error sending automatic update to chat {chat_id}: {str(e)}")
+    return True
+
+@metrics.instrument("auto_update")
+async def broadcast_auto_update(application: Application, key, chat_ids=None) -> None:
+    """Analyze a broadcast group's symbol once and send the update to its chats."""
+    symbol, timeframe, _ = key
+    metrics.label(symbol=symbol, timeframe=timeframe)
+    chat_ids = subscriptions.chats(key) if chat_ids is None else chat_ids
+    if not chat_ids:
+        return
+
+    logger.info(f"Running automatic {symbol} {timeframe} analysis for {len(chat_ids)} chat(s)")
+    message, chart = await build_auto_update(symbol, timeframe)
+
+    # Upload the chart once, then queue the rest of the group with its file_id
+    delivered = [await send_auto_update(application.bot, chat_ids[0], message, chart)]
+    delivered += await asyncio.gather(
+        *(send_auto_update(application.bot, chat_id, message, chart) for chat_id in chat_ids[1:])
+    )
+    for chat_id, ok in zip(chat_ids, delivered):
+        if not ok:
+            drop_broadcasts(application, subscriptions.unsubscribe(chat_id))
+            try:
+                await subscription_store.delete(chat_id)
+            except Exception as e:
+                logger.error(f"Error removing the subscriptions of chat {chat_id}: {str(e)}")
+
+async def periodic_broadcast(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Run one tick of a broadcast group."""
+    await broadcast_auto_update(context.application, context.job.data['key'])
+
+async def first_auto_update(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Send a chat that joined an existing broadcast group its first update."""
+    await broadcast_auto_update(context.application, context.job.data['key'], [context.job.data['chat_id']])
+
+async def sync_subscriptions(application: Application, quiet=False) -> None:
+    """Load the saved subscriptions of the partitions this process leads and schedule their broadcasts.
+
+    New groups and chats that joined a running group get their first update
+    after 10 seconds. With ``quiet``, as right after taking over a partition,
+    new groups wait one interval instead, so a restart or failover does not
+    send every subscriber an extra update.
+    """
+    async with application.bot_data['subscription_sync']:
+        try:
+            rows = await subscription_store.load()
+        except Exception as e:
+            logger.error(f"Error loading subscriptions: {str(e)}")
+            return
+        created, joined, emptied = subscriptions.sync([row for row in rows if cluster.leads(row[1])])
+        drop_broadcasts(application, emptied)
+        if created or emptied:
+            logger.info(f"Broadcasting to {len(subscriptions)} subscription(s) in {len(subscriptions.groups())} group(s)")
+
+        # Groups of a live stream are pushed when their candle closes instead
+        def streamed(key):
+            return candle_stream.is_streaming(key[0], AVAILABLE_TIMEFRAMES.get(key[1]))
+
+        for key in created:
+            if not streamed(key):
+                schedule_broadcast(application, key, first=key[2] if quiet else 10)
+        for key, chat_id in joined:
+            if not streamed(key):
+                application.job_queue.run_once(first_auto_update, when=10, data={'key': key, 'chat_id': chat_id})
+
+async def refresh_subscriptions(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Pick up subscriptions that other bot processes saved."""
+    await sync_subscriptions(context.application)
+
+async def switch_role(application: Application, role, held) -> None:
+    """Start or stop polling, or take over or hand over a broadcast partition."""
+    if role == POLLER:
+        if held:
+            await application.updater.start_polling()
+        elif application.updater.running:
+            await application.updater.stop()
     else:
-        await context.bot.send_message(
-            chat_id=chat_id,
-            text=message,
-            parse_mode='HTML'
-        )
+        await sync_subscriptions(application, quiet=held)
 
+@metrics.instrument("auto_start")
 async def start_auto_analysis(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Start automatic R_75 analysis."""
     chat_id = update.effective_chat.id
 
-    # Remove existing job if any
-    current_jobs = context.job_queue.get_jobs_by_name(f"r75_analysis_{chat_id}")
-    for job in current_jobs:
-        job.schedule_removal()
-
     # Get interval from arguments or use default
     interval = 15  # Default: 15 minutes
     if context.args and len(context.args) > 0:
@@ -461,29 +913,102 @@ async def start_auto_analysis(update: Update, context: ContextTypes.DEFAULT_TYPE
         except ValueError:
             pass
 
-    # Schedule new job
-    context.job_queue.run_repeating(
-        periodic_r75_analysis,
-        interval=interval*60,  # Convert to seconds
-        first=10,  # Start first analysis after 10 seconds
-        data={'chat_id': chat_id},
-        name=f"r75_analysis_{chat_id}"
-    )
+    # Join the group for this interval, leaving any previous one. The process that leads
+    # R_75's partition schedules it; if that is another one, it does so on its next sync.
+    await subscription_store.save(chat_id, 'R_75', '1h', interval * 60)
+    if cluster.leads('R_75'):
+        await sync_subscriptions(context.application)
+
+    # With a live R_75 1h stream, updates are pushed when a candle closes instead
+    if candle_stream.is_streaming('R_75', AVAILABLE_TIMEFRAMES['1h']):
+        await reply_text(
+            update,
+            f"✅ Automatic R_75 analysis started. You will receive an update when each R_75 1h candle "
+            f"closes, at most every {interval} minutes."
+        )
+        return
 
-    await update.message.reply_text(
+    await reply_text(
+        update,
         f"✅ Automatic R_75 analysis started. You will receive updates every {interval} minutes."
     )
 
+@metrics.instrument("auto_stop")
 async def stop_auto_analysis(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Stop automatic R_75 analysis."""
     chat_id = update.effective_chat.id
 
-    # Remove existing job if any
-    current_jobs = context.job_queue.get_jobs_by_name(f"r75_analysis_{chat_id}")
-    for job in current_jobs:
-        job.schedule_removal()
+    await subscription_store.delete(chat_id, 'R_75')
+    drop_broadcasts(context.application, subscriptions.unsubscribe(chat_id, 'R_75'))
+
+    await reply_text(update, "✅ Automatic R_75 analysis stopped.")
+
+async def start_streaming(application: Application) -> None:
+    """Subscribe to live candles for the configured symbols and timeframes."""
+    if not STREAMING_ENABLED:
+        return
 
-    await update.message.reply_text("✅ Automatic R_75 analysis stopped.")
+    async def on_candle_closed(symbol, granularity, epoch):
+        # Cached frames still hold the bar that just closed as forming
+        candle_cache.invalidate(symbol, granularity)
+        archive_closed_candles(symbol, granularity, 2)
+        timeframes = [tf for tf, seconds in AVAILABLE_TIMEFRAMES.items() if seconds == granularity]
+        for key in subscriptions.due(symbol, timeframes[0], time.time()) if timeframes else []:
+            await broadcast_auto_update(application, key)
+
+    candle_stream.add_listener(on_candle_closed)
+    for symbol in STREAM_SYMBOLS:
+        for timeframe in STREAM_TIMEFRAMES:
+            candle_stream.start(symbol.strip().upper(), AVAILABLE_TIMEFRAMES[timeframe.strip()])
+
+async def warm_up() -> None:
+    """Open the Deriv connections and start the chart workers while the bot is already serving updates."""
+    started = time.perf_counter()
+    chart_renderer.warm_up()
+    await deriv_pool.warm_up()
+    logger.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+async def mark_ready(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Publish the heartbeat with the startup breakdown once the bot is polling, then warm up."""
+    timer = context.application.bot_data['startup']
+    timer.mark('polling')
+    write_heartbeat(timer)
+    logger.info(f"Bot ready in {timer.total:.2f}s ({timer.summary()})")
+    context.application.bot_data['warm_up'] = asyncio.create_task(warm_up())
+
+async def startup(application: Application) -> None:
+    """Start the delivery queue, the result writer, the metrics writer, the profiling watcher, the candle streams and the subscription sync once the bot is initialized."""
+    timer = application.bot_data.setdefault('startup', StartupTimer())
+    timer.mark('initialize')
+    outbox.start()
+    analysis_recorder.start()
+    metrics.start()
+    profiler.watch()
+    await start_streaming(application)
+    application.bot_data['subscription_sync'] = asyncio.Lock()
+    application.job_queue.run_repeating(refresh_subscriptions, interval=SUBSCRIPTION_SYNC_INTERVAL,
+                                        first=SUBSCRIPTION_SYNC_INTERVAL)
+    timer.mark('post_init')
+    # Jobs only run once the application has started, which is right after polling begins
+    application.job_queue.run_once(mark_ready, 0)
+
+async def close_connections(application: Application) -> None:
+    """Stop the warm-up, the candle streams, the history writer, the delivery queue, the result writer, the metrics writer, the signals snapshot, the profiling watcher, the chart workers, the Deriv connections and the subscription store on shutdown."""
+    clear_heartbeat()
+    warm_up_task = application.bot_data.get('warm_up')
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+        await asyncio.gather(warm_up_task, return_exceptions=True)
+    await candle_stream.stop()
+    await candle_history.stop()
+    await outbox.stop()
+    await analysis_recorder.stop()
+    await metrics.stop()
+    signal_snapshot.close()
+    await profiler.stop()
+    await deriv_pool.close()
+    chart_renderer.shutdown()
+    subscription_store.shutdown()
 
 # Error handler
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -492,13 +1017,45 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 
     # Send message to the user
     if update and update.effective_message:
-        await update.effective_message.reply_text(
+        await reply_text(
+            update,
             "Sorry, an error occurred while processing your request. Please try again later."
         )
 
-def run_telegram_bot():
+async def serve(application: Application) -> None:
+    """Run the bot until SIGINT or SIGTERM, polling and broadcasting only while this process holds those roles.
+
+    This replaces run_polling, which would poll from every process.
+    """
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (SIGINT, SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+
+    await application.initialize()
+    try:
+        await startup(application)
+        cluster.on_change = lambda role, held: switch_role(application, role, held)
+        await cluster.start()
+        await application.start()
+        await stopping.wait()
+    finally:
+        await cluster.stop()
+        if application.updater.running:
+            await application.updater.stop()
+        if application.running:
+            await application.stop()
+        await application.shutdown()
+        await close_connections(application)
+
+def run_telegram_bot(startup_timer=None):
     """Run the Telegram bot."""
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+    builder = Application.builder().token(TELEGRAM_TOKEN)
+    # A self-hosted Bot API server, or the fake one used for load tests
+    if TELEGRAM_API_URL:
+        builder = builder.base_url(f"{TELEGRAM_API_URL}/bot").base_file_url(f"{TELEGRAM_API_URL}/file/bot")
+    application = builder.build()
+    application.bot_data['startup'] = startup_timer or StartupTimer()
 
     # Add command handlers
     application.add_handler(CommandHandler("start", start))
@@ -510,11 +1067,14 @@ def run_telegram_bot():
 
     # Add new R_75 specific commands
     application.add_handler(CommandHandler("r75", r75_analysis_command))
+    application.add_handler(CommandHandler("scan", scan_command))
     application.add_handler(CommandHandler("auto_start", start_auto_analysis))
     application.add_handler(CommandHandler("auto_stop", stop_auto_analysis))
+    application.add_handler(CommandHandler("profile", profile_command))
 
     # Add error handler
     application.add_error_handler(error_handler)
+    application.bot_data['startup'].mark('build')
 
     # Start the Bot
-    application.run_polling()
+    asyncio.run(serve(application))
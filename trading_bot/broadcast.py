@@ -0,0 +1,76 @@
+import logging
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+
+class SubscriptionRegistry:
+    """Auto-update subscribers grouped by (symbol, timeframe, interval).
+
+    Each group is analyzed once per tick and the same message and chart are
+    fanned out to all of its chats, so the cost of automatic updates follows
+    the number of distinct subscriptions rather than the number of chats.
+    A chat belongs to at most one group per symbol and timeframe.
+    """
+
+    def __init__(self):
+        self._groups = {}
+        self._last_run = {}
+
+    def __len__(self):
+        return sum(len(chats) for chats in self._groups.values())
+
+    def groups(self):
+        """Return the keys of all groups that have subscribers"""
+        return list(self._groups)
+
+    def chats(self, key):
+        return list(self._groups.get(key, ()))
+
+    def unsubscribe(self, chat_id, symbol=None, timeframe=None):
+        """Remove a chat from its groups, optionally only for one symbol/timeframe.
+
+        Returns the keys of groups that no longer have subscribers.
+        """
+        emptied = []
+        for key in list(self._groups):
+            if symbol is not None and key[0] != symbol:
+                continue
+            if timeframe is not None and key[1] != timeframe:
+                continue
+            chats = self._groups[key]
+            chats.discard(chat_id)
+            if not chats:
+                del self._groups[key]
+                self._last_run.pop(key, None)
+                emptied.append(key)
+        return emptied
+
+    def sync(self, subscriptions):
+        """Make the groups match (chat_id, symbol, timeframe, interval) rows, e.g. loaded from the database.
+
+        Returns (created, joined, emptied): the keys of new groups, (key,
+        chat_id) for chats that joined a group that already existed, and the
+        keys of groups that no longer have subscribers.
+        """
+        wanted = {}
+        for chat_id, symbol, timeframe, interval in subscriptions:
+            wanted.setdefault((symbol, timeframe, interval), set()).add(chat_id)
+
+        created = [key for key in wanted if key not in self._groups]
+        joined = [(key, chat_id) for key, chats in wanted.items() if key in self._groups
+                  for chat_id in chats - self._groups[key]]
+        emptied = [key for key in self._groups if key not in wanted]
+        for key in emptied:
+            self._last_run.pop(key, None)
+        self._groups = wanted
+        return created, joined, emptied
+
+    def due(self, symbol, timeframe, now):
+        """Return the groups for a series whose interval has elapsed, marking them as run"""
+        keys = []
+        for key in self._groups:
+            if key[0] == symbol and key[1] == timeframe and now - self._last_run.get(key, 0) >= key[2]:
+                self._last_run[key] = now
+                keys.append(key)
+        return keys
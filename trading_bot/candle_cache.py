@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+
+def next_candle_boundary(granularity, now=None):
+    """Return the epoch at which the candle currently forming for this granularity closes"""
+    if now is None:
+        now = time.time()
+    return (int(now) // granularity + 1) * granularity
+
+
+class CandleCache:
+    """In-process cache in front of a candle loader with single-flight coalescing.
+
+    Entries are keyed on (symbol, granularity, count) and expire at the next
+    candle boundary of their granularity, when a new bar can appear. While a
+    key is being loaded, identical requests await the same in-flight load
+    instead of sending their own. Cached DataFrames are shared between
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, loader, clock=time.time):
+        self._loader = loader
+        self._clock = clock
+        self._entries = {}
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def stats(self):
+        """Return the hit, miss and coalesce counters"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'entries': len(self._entries),
+            'in_flight': len(self._in_flight),
+        }
+
+    def invalidate(self, symbol=None, granularity=None):
+        """Drop cached entries, optionally only those for a symbol and/or granularity"""
+        for key in list(self._entries):
+            if symbol is not None and key[0] != symbol:
+                continue
+            if granularity is not None and key[1] != granularity:
+                continue
+            del self._entries[key]
+
+    async def get(self, symbol, granularity, count):
+        key = (symbol, granularity, count)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > self._clock():
+            self.hits += 1
+            return entry[1]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key))
+            self._in_flight[key] = task
+        # Shield the shared load so one cancelled caller does not cancel it for everyone
+        return await asyncio.shield(task)
+
+    async def _load(self, key):
+        symbol, granularity, count = key
+        try:
+            df = await self._loader(symbol, granularity, count)
+            if not df.empty:
+                self._evict_expired()
+                self._entries[key] = (next_candle_boundary(granularity, self._clock()), df)
+            return df
+        finally:
+            del self._in_flight[key]
+
+    def _evict_expired(self):
+        now = self._clock()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
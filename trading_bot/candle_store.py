@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import time
+import numpy as np
+import pandas as pd
+from .metrics import metrics
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+FIELDS = ('epoch', 'open', 'high', 'low', 'close')
+
+
+class CandleBuffer:
+    """Fixed-capacity ring buffer of candles stored in preallocated float64 arrays.
+
+    Every bar is written twice, at ``i`` and ``i + capacity``, so the most
+    recent ``n <= capacity`` bars are always one contiguous slice and can be
+    handed out as zero-copy read-only views.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.full((len(FIELDS), 2 * capacity), np.nan)
+        self._head = 0  # slot of the next bar to write
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last_epoch(self):
+        if not self._size:
+            return None
+        return int(self._data[0, (self._head - 1) % self.capacity])
+
+    def _write(self, slot, row):
+        self._data[:, slot] = row
+        self._data[:, slot + self.capacity] = row
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+    def grow(self, capacity):
+        """Reallocate to a larger capacity keeping the stored bars"""
+        if capacity <= self.capacity:
+            return
+        kept = self.arrays()
+        self.capacity = capacity
+        self._data = np.full((len(FIELDS), 2 * capacity), np.nan)
+        self.clear()
+        self.upsert(np.vstack([kept[field] for field in FIELDS]))
+
+    def upsert(self, rows):
+        """Merge a (5, n) block of bars sorted by epoch into the buffer.
+
+        A bar with the same epoch as the last stored one replaces it (the
+        still-forming candle), newer bars are appended and older ones ignored.
+        Returns the number of bars appended.
+        """
+        appended = 0
+        for row in rows.T:
+            last = self.last_epoch
+            if last is not None and row[0] < last:
+                continue
+            if last is not None and row[0] == last:
+                self._write((self._head - 1) % self.capacity, row)
+                continue
+            self._write(self._head, row)
+            self._head = (self._head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            appended += 1
+        return appended
+
+    def arrays(self, count=None):
+        """Return read-only views of the most recent ``count`` bars, one per field"""
+        n = self._size if count is None else min(count, self._size)
+        # Pick the copy of the newest bar that has n contiguous bars before it
+        end = self._head if self._head >= n else self._head + self.capacity
+        start = end - n
+        views = {}
+        for i, field in enumerate(FIELDS):
+            view = self._data[i, start:end]
+            view.flags.writeable = False
+            views[field] = view
+        return views
+
+    def to_dataframe(self, count=None):
+        """Build the DataFrame shape returned by the Deriv candles endpoint"""
+        views = self.arrays(count)
+        return pd.DataFrame({
+            'close': views['close'],
+            'epoch': pd.to_datetime(views['epoch'].astype('int64'), unit='s'),
+            'high': views['high'],
+            'low': views['low'],
+            'open': views['open'],
+        })
+
+
+def candles_to_rows(candles):
+    """Convert a Deriv ``candles`` list into a (5, n) float64 block ordered like FIELDS"""
+    rows = np.empty((len(FIELDS), len(candles)))
+    for j, candle in enumerate(candles):
+        for i, field in enumerate(FIELDS):
+            rows[i, j] = float(candle[field])
+    return rows
+
+
+class CandleStore:
+    """Per-(symbol, granularity) candle buffers refreshed incrementally from Deriv.
+
+    A refresh only asks for candles from the last stored epoch onwards, which
+    re-delivers the still-forming bar and anything newer. Missing bars between
+    the stored data and the new data are requested once more explicitly.
+    """
+
+    def __init__(self, send, capacity=1000, clock=time.time):
+        self._send = send
+        self.capacity = capacity
+        self._clock = clock
+        self._buffers = {}
+        self._locks = {}
+        self._live = set()
+
+    def buffer(self, symbol, granularity):
+        key = (symbol, granularity)
+        if key not in self._buffers:
+            self._buffers[key] = CandleBuffer(self.capacity)
+            self._locks[key] = asyncio.Lock()
+        return self._buffers[key]
+
+    def set_live(self, symbol, granularity, live=True):
+        """Mark a buffer as kept current by a stream so refreshes skip Deriv"""
+        if live:
+            self._live.add((symbol, granularity))
+        else:
+            self._live.discard((symbol, granularity))
+
+    async def history(self, symbol, granularity, **window):
+        """Fetch candles straight from Deriv as a (5, n) block, bypassing the buffers.
+
+        ``window`` is passed on to ``ticks_history``, e.g. ``count=`` or
+        ``start=``/``end=`` epochs.
+        """
+        request = {
+            "ticks_history": symbol,
+            "adjust_start_time": 1,
+            "end": "latest",
+            "granularity": granularity,
+            "style": "candles"
+        }
+        request.update(window)
+        with metrics.span('ticks_history'):
+            response = await self._send(request)
+        return candles_to_rows(response.get("candles", []))
+
+    async def refresh(self, symbol, granularity, count):
+        """Bring the buffer up to date and make sure it holds at least ``count`` bars"""
+        buffer = self.buffer(symbol, granularity)
+        if (symbol, granularity) in self._live and len(buffer) >= count:
+            return buffer
+        async with self._locks[(symbol, granularity)]:
+            buffer.grow(count)
+            last = buffer.last_epoch
+            now = int(self._clock())
+            missing = 0 if last is None else (now - last) // granularity
+            if last is None or len(buffer) < count or missing >= buffer.capacity:
+                rows = await self.history(symbol, granularity, count=count)
+                buffer.clear()
+                buffer.upsert(rows)
+                return buffer
+
+            rows = await self.history(symbol, granularity, start=last)
+            if rows.shape[1] and rows[0, 0] > last + granularity:
+                gap = await self.history(symbol, granularity, start=last, end=int(rows[0, 0]))
+                rows = np.hstack([gap, rows])
+            appended = buffer.upsert(rows)
+            self._log_gaps(symbol, granularity, buffer, appended + 1)
+            return buffer
+
+    def _log_gaps(self, symbol, granularity, buffer, count):
+        epochs = buffer.arrays(count)['epoch']
+        gaps = int(np.count_nonzero(np.diff(epochs) != granularity))
+        if gaps:
+            logger.warning(f"{symbol} {granularity}s buffer has {gaps} gap(s) Deriv could not fill")
+
+    async def frame(self, symbol, granularity, count):
+        """Refresh and return the most recent ``count`` bars as a DataFrame"""
+        buffer = await self.refresh(symbol, granularity, count)
+        with metrics.span('dataframe'):
+            return buffer.to_dataframe(count)
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Lease
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+# The role of the one process that long-polls Telegram for updates
+POLLER = 'poller'
+
+
+def partition_of(symbol, partitions):
+    """Return the partition that broadcasts a symbol; stable across processes, unlike hash()"""
+    return zlib.crc32(symbol.encode()) % partitions
+
+
+def partition_role(partition):
+    return f'partition-{partition}'
+
+
+def default_holder():
+    """Identify this process in the Lease table"""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+class LeaderLease:
+    """A Lease row that at most one holder has at a time.
+
+    ``acquire`` takes the lease if it is free or expired, or extends it if
+    ``holder`` already has it, in one conditional UPDATE, so two processes
+    racing for it cannot both win. A holder that stops renewing loses the
+    lease ``ttl`` seconds after its last renewal, which is how a crashed
+    process is replaced. Calls are blocking ORM queries.
+    """
+
+    def __init__(self, name, holder, ttl=30, clock=timezone.now):
+        self.name = name
+        self.holder = holder
+        self.ttl = ttl
+        self._clock = clock
+
+    def acquire(self):
+        """Take or renew the lease; return whether ``holder`` has it now"""
+        now = self._clock()
+        expires_at = now + timedelta(seconds=self.ttl)
+        taken = Lease.objects.filter(name=self.name).filter(
+            Q(holder=self.holder) | Q(expires_at__lte=now)
+        ).update(holder=self.holder, expires_at=expires_at)
+        if taken:
+            return True
+        try:
+            with transaction.atomic():
+                Lease.objects.create(name=self.name, holder=self.holder, expires_at=expires_at)
+        except IntegrityError:
+            # Held by someone else, or another process created it first
+            return False
+        return True
+
+    def release(self):
+        """Give up the lease if ``holder`` has it"""
+        Lease.objects.filter(name=self.name, holder=self.holder).delete()
+
+
+class Cluster:
+    """The roles this bot process leads, each held through a LeaderLease.
+
+    Broadcasts are split into ``partitions`` by symbol and each partition is
+    led by one process at a time; ``partition_ids`` are the ones this process
+    competes for (all of them by default). With ``poller`` set it also
+    competes to be the one process that polls Telegram, since Telegram only
+    serves updates to one poller. Leases are renewed every
+    ``renew_interval`` seconds and ``on_change(role, held)`` is awaited
+    whenever this process gains or loses a role. If renewing fails, the
+    role is given up at once rather than risking two leaders; if taking
+    up a role fails, its lease is released so it is retried.
+    """
+
+    def __init__(self, partitions=1, partition_ids=None, poller=True, ttl=30, renew_interval=10,
+                 on_change=None, holder=None):
+        self.partitions = partitions
+        self.partition_ids = sorted(range(partitions) if partition_ids is None else partition_ids)
+        self.renew_interval = renew_interval
+        self.on_change = on_change
+        self.holder = holder or default_holder()
+        roles = ([POLLER] if poller else []) + [partition_role(partition) for partition in self.partition_ids]
+        self._leases = {role: LeaderLease(role, self.holder, ttl) for role in roles}
+        self.held = set()
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cluster-lease')
+
+    def stats(self):
+        return {'holder': self.holder, 'partitions': self.partitions, 'held': sorted(self.held)}
+
+    def leads(self, symbol):
+        """Whether this process broadcasts the symbol's partition"""
+        return partition_role(partition_of(symbol, self.partitions)) in self.held
+
+    @property
+    def polling(self):
+        return POLLER in self.held
+
+    async def start(self):
+        """Campaign once right away, then keep renewing in the background"""
+        await self._campaign()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop renewing and hand every held role back"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for role in sorted(self.held):
+            await self._set(role, False)
+            try:
+                await self._call(self._leases[role].release)
+            except Exception as e:
+                logger.error(f"Error releasing the {role} lease: {str(e)}")
+        self._executor.shutdown(wait=True)
+
+    async def _call(self, func):
+        def run():
+            # The lease thread keeps its connection between calls; drop it if it went stale
+            close_old_connections()
+            return func()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, run)
+
+    async def _campaign(self):
+        for role, lease in self._leases.items():
+            try:
+                held = await self._call(lease.acquire)
+            except Exception as e:
+                logger.error(f"Error renewing the {role} lease: {str(e)}")
+                held = False
+            await self._set(role, held)
+
+    async def _set(self, role, held):
+        if held == (role in self.held):
+            return
+        if held:
+            # Marked first so on_change already sees the role, e.g. through leads()
+            self.held.add(role)
+        else:
+            self.held.discard(role)
+        logger.info(f"{'Took' if held else 'Gave up'} the {role} role as {self.holder}")
+        if self.on_change is None:
+            return
+        try:
+            await self.on_change(role, held)
+        except Exception as e:
+            logger.error(f"Error switching the {role} role: {str(e)}")
+            if held:
+                # Hand the role back so the next campaign, here or in another process, retries it
+                self.held.discard(role)
+                try:
+                    await self._call(self._leases[role].release)
+                except Exception as e:
+                    logger.error(f"Error releasing the {role} lease: {str(e)}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            await self._campaign()
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import random
+from deriv_api import DerivAPI
+from deriv_api.errors import ResponseError
+from .metrics import metrics
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+
+class DerivConnectionPool:
+    """A small pool of long-lived DerivAPI websockets shared by the whole bot.
+
+    Each DerivAPI instance already multiplexes concurrent requests over its
+    socket by ``req_id``, so the pool only has to pick the least busy live
+    connection, keep the sockets healthy and reconnect them with backoff.
+    A request that cannot get a connection within ``connect_deadline``
+    seconds fails with ConnectionError instead of waiting for Deriv to
+    come back.
+    """
+
+    def __init__(self, app_id, size=2, token=None, endpoint='ws.derivws.com',
+                 connect_timeout=10, request_timeout=30, health_check_interval=30,
+                 max_backoff=60, connect_deadline=30):
+        self.app_id = app_id
+        self.size = max(1, size)
+        self.token = token
+        self.endpoint = endpoint
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self.health_check_interval = health_check_interval
+        self.max_backoff = max_backoff
+        self.connect_deadline = connect_deadline
+
+        self._apis = [None] * self.size
+        self._in_flight = [0] * self.size
+        self._locks = [asyncio.Lock() for _ in range(self.size)]
+        self._health_task = None
+        self._closed = False
+
+    def stats(self):
+        """Return a snapshot of the pool state for logging and status pages"""
+        return {
+            'size': self.size,
+            'connected': sum(1 for api in self._apis if self._is_alive(api)),
+            'in_flight': list(self._in_flight),
+        }
+
+    @staticmethod
+    def _is_alive(api):
+        return api is not None and api.connected.is_resolved()
+
+    async def _open(self):
+        """Open and authorize a single connection, retrying with exponential backoff"""
+        delay = 1
+        while not self._closed:
+            api = None
+            try:
+                with metrics.span('deriv_connect'):
+                    api = DerivAPI(app_id=self.app_id, endpoint=self.endpoint)
+                    await asyncio.wait_for(asyncio.shield(api.connected), self.connect_timeout)
+                    if self.token:
+                        await asyncio.wait_for(api.authorize(self.token), self.request_timeout)
+                return api
+            except ResponseError:
+                # A rejected token will not fix itself by retrying
+                await self._discard(api)
+                raise
+            except Exception as e:
+                await self._discard(api)
+                logger.warning(f"Deriv connection failed ({e!r}), retrying in {delay}s")
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+                delay = min(delay * 2, self.max_backoff)
+        raise ConnectionError("Deriv connection pool is closed")
+
+    async def _discard(self, api):
+        """Close a connection that is no longer usable"""
+        if api is None:
+            return
+        try:
+            if api.connected.is_pending():
+                api.connected.cancel()
+            await api.disconnect()
+        except Exception as e:
+            logger.debug(f"Error closing Deriv connection: {e!r}")
+
+    async def _ensure(self, index):
+        """Return a live connection for the slot, reconnecting it if needed"""
+        api = self._apis[index]
+        if self._is_alive(api):
+            return api
+        async with self._locks[index]:
+            api = self._apis[index]
+            if not self._is_alive(api):
+                await self._discard(api)
+                self._apis[index] = None
+                api = await self._open()
+                self._apis[index] = api
+                logger.info(f"Deriv connection {index} established")
+            self._start_health_checks()
+            return api
+
+    async def _connect(self, index):
+        """``_ensure`` bounded by connect_deadline, for callers that are waiting on a reply"""
+        try:
+            return await asyncio.wait_for(self._ensure(index), self.connect_deadline)
+        except asyncio.TimeoutError:
+            raise ConnectionError(f"Could not connect to Deriv within {self.connect_deadline}s") from None
+
+    def _pick(self, exclude=None):
+        """Pick the slot with the fewest in-flight requests, preferring live connections"""
+        candidates = [i for i in range(self.size) if i != exclude] or [0]
+        return min(candidates, key=lambda i: (self._in_flight[i], not self._is_alive(self._apis[i])))
+
+    async def send(self, request):
+        """Send a request over the pool and return the response.
+
+        A request that fails because its socket dropped is retried once on
+        another connection; API-level errors are raised to the caller.
+        """
+        if self._closed:
+            raise ConnectionError("Deriv connection pool is closed")
+
+        index = None
+        for attempt in range(2):
+            index = self._pick(exclude=index)
+            # Count the request before connecting so concurrent callers spread over the slots
+            self._in_flight[index] += 1
+            api = None
+            try:
+                api = await self._connect(index)
+                # DerivAPI adds a req_id to the dict it sends, so never reuse the caller's
+                return await asyncio.wait_for(api.send(dict(request)), self.request_timeout)
+            except ResponseError:
+                raise
+            except Exception as e:
+                if api is None:
+                    # Deriv is unreachable; another connection would wait just as long
+                    raise
+                logger.warning(f"Deriv request failed on connection {index}: {e!r}")
+                if api is not None:
+                    await self._mark_broken(index, api)
+                if attempt:
+                    raise
+            finally:
+                self._in_flight[index] -= 1
+
+    async def subscribe(self, request):
+        """Open a subscription on the least busy connection and return its Observable.
+
+        Subscriptions are not moved when their socket drops; callers should
+        watch for silence or errors and subscribe again.
+        """
+        if self._closed:
+            raise ConnectionError("Deriv connection pool is closed")
+        index = self._pick()
+        api = await self._connect(index)
+        return await api.subscribe(dict(request))
+
+    async def _mark_broken(self, index, api):
+        if self._apis[index] is api:
+            self._apis[index] = None
+            await self._discard(api)
+
+    def _start_health_checks(self):
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _health_loop(self):
+        """Ping every open connection periodically and drop the ones that do not answer"""
+        while not self._closed:
+            await asyncio.sleep(self.health_check_interval)
+            for index, api in enumerate(list(self._apis)):
+                if api is None:
+                    continue
+                try:
+                    await asyncio.wait_for(api.ping(), self.request_timeout)
+                except Exception as e:
+                    logger.warning(f"Deriv connection {index} failed health check: {e!r}")
+                    await self._mark_broken(index, api)
+                    # Reconnect in the background so the next request finds a live socket
+                    asyncio.create_task(self._reconnect(index))
+
+    async def _reconnect(self, index):
+        try:
+            await self._ensure(index)
+        except Exception as e:
+            logger.error(f"Deriv connection {index} could not be re-established: {e!r}")
+
+    async def warm_up(self):
+        """Open every connection ahead of the first request"""
+        results = await asyncio.gather(*(self._ensure(index) for index in range(self.size)), return_exceptions=True)
+        for index, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Deriv connection {index} could not be opened: {result!r}")
+
+    async def close(self):
+        """Close every connection and stop the health checks"""
+        self._closed = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for index, api in enumerate(self._apis):
+            self._apis[index] = None
+            await self._discard(api)
@@ -0,0 +1,214 @@
+import asyncio
+import itertools
+import logging
+import time
+from telegram.error import RetryAfter
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+# Lower values are delivered first
+INTERACTIVE = 0
+BROADCAST = 1
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, bursts up to ``capacity``"""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self):
+        """Seconds until a token is available, 0 if one is available now"""
+        self._refill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def consume(self):
+        self._refill()
+        self._tokens -= 1
+
+    @property
+    def full(self):
+        """Whether the bucket has refilled, i.e. behaves exactly like a new one"""
+        self._refill()
+        return self._tokens >= self.capacity
+
+
+class DeliveryQueue:
+    """Outbound Telegram queue that respects the global and per-chat flood limits.
+
+    Every send goes through a priority queue, so interactive replies overtake
+    queued broadcasts. A global token bucket caps the bot's overall rate and
+    one bucket per chat caps each chat (groups, which have negative ids, get
+    the stricter group limit). A message for a chat that is out of tokens is
+    set aside until its bucket refills instead of blocking other chats.
+    RetryAfter responses pause all sending for the requested time and the
+    message is retried. Pending broadcasts are capped so a large fan-out
+    applies backpressure to its producer instead of growing without bound.
+    Every ``sweep_interval`` seconds the chat buckets that have refilled are
+    dropped, so only chats messaged recently are tracked.
+    """
+
+    def __init__(self, global_rate=30, chat_rate=1, group_rate=20 / 60, workers=4,
+                 max_pending_broadcasts=1000, max_attempts=3, sweep_interval=60):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.workers = workers
+        self.max_pending_broadcasts = max_pending_broadcasts
+        self.max_attempts = max_attempts
+
+        self.sweep_interval = sweep_interval
+
+        self._chat_buckets = {}
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._queue = None
+        self._broadcast_slots = None
+        self._tasks = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self._latency = {INTERACTIVE: [0, 0.0, 0.0], BROADCAST: [0, 0.0, 0.0]}
+
+    @property
+    def depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self):
+        """Return delivery counters and queue latency (enqueue to send) per priority"""
+        latency = {}
+        for priority, name in ((INTERACTIVE, 'interactive'), (BROADCAST, 'broadcast')):
+            count, total, worst = self._latency[priority]
+            latency[name] = {
+                'count': count,
+                'avg_ms': round(total / count * 1000, 1) if count else 0.0,
+                'max_ms': round(worst * 1000, 1),
+            }
+        return {
+            'depth': self.depth,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'chats_tracked': len(self._chat_buckets),
+            'latency': latency,
+        }
+
+    def start(self):
+        """Start the delivery workers on the running event loop"""
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._broadcast_slots = asyncio.Semaphore(self.max_pending_broadcasts)
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _sweep_buckets(self):
+        # A full bucket is no different from the one a new message would create
+        for chat_id in [chat_id for chat_id, bucket in self._chat_buckets.items() if bucket.full]:
+            del self._chat_buckets[chat_id]
+        self._next_sweep = time.monotonic() + self.sweep_interval
+
+    def _chat_bucket(self, chat_id):
+        if time.monotonic() >= self._next_sweep:
+            self._sweep_buckets()
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            rate = self.group_rate if chat_id < 0 else self.chat_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, 1)
+        return bucket
+
+    async def send(self, recipient, method, *args, priority=INTERACTIVE, **kwargs):
+        """Queue ``method(*args, **kwargs)`` for delivery to chat ``recipient`` and return its result"""
+        self.start()
+        if priority == BROADCAST:
+            await self._broadcast_slots.acquire()
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._sequence), recipient, method, args, kwargs, future, time.monotonic(), 1)
+        self._queue.put_nowait(entry)
+        try:
+            return await future
+        finally:
+            if priority == BROADCAST:
+                self._broadcast_slots.release()
+
+    def _requeue(self, entry, delay):
+        asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, entry)
+
+    async def _wait_for_global_token(self):
+        while True:
+            wait = max(self._paused_until - time.monotonic(), self.global_bucket.wait_time())
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def _worker(self):
+        while True:
+            # Wait for sending capacity before taking a message, so whatever has the
+            # highest priority at that moment is what goes out next
+            await self._wait_for_global_token()
+            entry = await self._queue.get()
+            priority, _, chat_id, method, args, kwargs, future, queued_at, attempt = entry
+            if future.done():
+                continue
+
+            # Park messages for chats that are out of tokens so other chats keep flowing
+            chat_bucket = self._chat_bucket(chat_id)
+            chat_wait = chat_bucket.wait_time()
+            if chat_wait > 0:
+                self._requeue(entry, chat_wait)
+                continue
+            if self.global_bucket.wait_time() > 0 or self._paused_until > time.monotonic():
+                # Another worker took the token while this one waited for a message
+                self._queue.put_nowait(entry)
+                continue
+            chat_bucket.consume()
+            self.global_bucket.consume()
+
+            stats = self._latency[priority]
+            waited = time.monotonic() - queued_at
+            stats[0] += 1
+            stats[1] += waited
+            stats[2] = max(stats[2], waited)
+
+            try:
+                result = await method(*args, **kwargs)
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                seconds = retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else retry_after
+                self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+                logger.warning(f"Telegram flood limit hit, pausing deliveries for {seconds}s")
+                if attempt < self.max_attempts:
+                    self.retried += 1
+                    self._queue.put_nowait(entry[:-1] + (attempt + 1,))
+                else:
+                    self.failed += 1
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            except Exception as e:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+                continue
+
+            self.sent += 1
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from .candle_store import FIELDS
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+ITEM_SIZE = np.dtype(np.float64).itemsize
+
+
+class HistoryPartition:
+    """Append-only columnar candle history for one (symbol, granularity).
+
+    Each field is a raw float64 file in the partition directory and a small
+    ``length`` file holds the number of committed bars. An append writes and
+    fsyncs the column files first and then replaces ``length`` atomically,
+    so readers and a restart after a crash only ever see whole appends; a
+    torn tail past the committed length is cut off by the next append.
+    Reads memory-map the columns, so range queries are zero-copy views.
+    Bars more than ``granularity`` apart are still stored, but each such
+    gap is recorded in a ``gaps`` file.
+    """
+
+    def __init__(self, path, granularity=None):
+        self.path = path
+        self.granularity = granularity
+        self._lock = threading.Lock()
+        self._maps = None
+        self._mapped_length = 0
+
+    def _column_path(self, field):
+        return os.path.join(self.path, f'{field}.f8')
+
+    def __len__(self):
+        try:
+            with open(os.path.join(self.path, 'length')) as f:
+                return int(f.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _commit(self, length):
+        temp = os.path.join(self.path, 'length.tmp')
+        with open(temp, 'w') as f:
+            f.write(str(length))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, os.path.join(self.path, 'length'))
+
+    @property
+    def last_epoch(self):
+        length = len(self)
+        if not length:
+            return None
+        with open(self._column_path('epoch'), 'rb') as f:
+            f.seek((length - 1) * ITEM_SIZE)
+            return int(np.frombuffer(f.read(ITEM_SIZE), dtype=np.float64)[0])
+
+    def append(self, rows):
+        """Append the bars of a (5, n) block ordered like FIELDS that are newer than the last stored one.
+
+        Returns the number of bars written.
+        """
+        with self._lock:
+            length = len(self)
+            last = self.last_epoch
+            if last is not None:
+                rows = rows[:, rows[0] > last]
+            if not rows.shape[1]:
+                return 0
+            os.makedirs(self.path, exist_ok=True)
+            for i, field in enumerate(FIELDS):
+                with open(self._column_path(field), 'ab') as f:
+                    # Drop anything an interrupted append left past the committed length
+                    f.truncate(length * ITEM_SIZE)
+                    f.write(np.ascontiguousarray(rows[i], dtype=np.float64).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._commit(length + rows.shape[1])
+            self._record_gaps(last, rows[0])
+            return rows.shape[1]
+
+    def _record_gaps(self, last, epochs):
+        if not self.granularity:
+            return
+        if last is not None:
+            epochs = np.concatenate([[last], epochs])
+        ends = np.flatnonzero(np.diff(epochs) > self.granularity)
+        if not len(ends):
+            return
+        with open(os.path.join(self.path, 'gaps'), 'a') as f:
+            for end in ends:
+                f.write(f'{int(epochs[end])} {int(epochs[end + 1])}\n')
+        logger.warning(f"{len(ends)} gap(s) stored in the {self.path} history")
+
+    def gaps(self):
+        """Return (before, after) epochs of every stored pair of neighbouring bars with bars missing in between"""
+        try:
+            with open(os.path.join(self.path, 'gaps')) as f:
+                return [tuple(int(epoch) for epoch in line.split()) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _columns(self):
+        length = len(self)
+        if self._maps is None or self._mapped_length != length:
+            self._maps = {
+                field: np.memmap(self._column_path(field), dtype=np.float64, mode='r', shape=(length,))
+                if length else np.empty(0)
+                for field in FIELDS
+            }
+            self._mapped_length = length
+        return self._maps
+
+    def read(self, start=None, end=None):
+        """Return read-only views of the bars with ``start <= epoch < end``, one per field"""
+        columns = self._columns()
+        epochs = columns['epoch']
+        lo = 0 if start is None else int(np.searchsorted(epochs, start, side='left'))
+        hi = len(epochs) if end is None else int(np.searchsorted(epochs, end, side='left'))
+        return {field: columns[field][lo:hi] for field in FIELDS}
+
+
+class CandleHistory:
+    """Candle history on disk, one HistoryPartition per symbol and granularity under ``root``.
+
+    ``append`` blocks on disk writes. From the event loop use ``submit``,
+    which hands the bars to a background task and a dedicated writer
+    thread, so appends never block the loop and stay in order.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._partitions = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='history-writer')
+        self._tasks = set()
+
+    def partition(self, symbol, granularity):
+        key = (symbol, granularity)
+        if key not in self._partitions:
+            self._partitions[key] = HistoryPartition(os.path.join(self.root, symbol, str(granularity)), granularity)
+        return self._partitions[key]
+
+    def append(self, symbol, granularity, rows):
+        try:
+            return self.partition(symbol, granularity).append(rows)
+        except OSError as e:
+            logger.error(f"Error writing {symbol} {granularity}s history: {str(e)}")
+            return 0
+
+    def submit(self, symbol, granularity, rows, backfill=None):
+        """Append a (5, n) block in the background.
+
+        If the block starts more than one bar after the stored history,
+        ``await backfill(start, end)`` is asked for the missing bars first;
+        whatever it cannot fill is recorded as a gap.
+        """
+        task = asyncio.create_task(self._archive(symbol, granularity, rows, backfill))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _archive(self, symbol, granularity, rows, backfill):
+        loop = asyncio.get_running_loop()
+        partition = self.partition(symbol, granularity)
+        if backfill is not None and rows.shape[1]:
+            try:
+                last = await loop.run_in_executor(self._executor, lambda: partition.last_epoch)
+                if last is not None and rows[0, 0] > last + granularity:
+                    missing = await backfill(last + granularity, int(rows[0, 0]) - granularity)
+                    rows = np.hstack([missing, rows])
+            except Exception as e:
+                logger.error(f"Error backfilling {symbol} {granularity}s history: {str(e)}")
+        return await loop.run_in_executor(self._executor, self.append, symbol, granularity, rows)
+
+    async def stop(self):
+        """Finish the appends in progress and stop the writer thread"""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+    def read(self, symbol, granularity, start=None, end=None):
+        return self.partition(symbol, granularity).read(start, end)
+
+    def frame(self, symbol, granularity, start=None, end=None):
+        """Return a range of bars as a DataFrame in the Deriv candles layout"""
+        views = self.read(symbol, granularity, start, end)
+        return pd.DataFrame({
+            'close': views['close'],
+            'epoch': pd.to_datetime(views['epoch'].astype('int64'), unit='s'),
+            'high': views['high'],
+            'low': views['low'],
+            'open': views['open'],
+        })
@@ -0,0 +1,156 @@
+from functools import lru_cache
+import numpy as np
+from .pattern_recognition import PATTERNS
+
+# Recommendation codes used by the kernels, as in pattern_signals
+BUY = 1
+SELL = -1
+HOLD = 0
+SIGNAL_NAMES = {BUY: 'Buy', SELL: 'Sell', HOLD: 'Hold'}
+
+# Bars per block of the EMA kernel; each block is one matrix product
+EWM_BLOCK = 64
+
+
+@lru_cache(maxsize=None)
+def _ewm_weights(alpha, size):
+    """Weights of the bars of a block, and of the EMA before it, in the EMA at each bar of the block"""
+    decay = 1 - alpha
+    steps = np.arange(size)
+    lags = steps[:, None] - steps[None, :]
+    weights = np.where(lags >= 0, alpha * decay ** np.maximum(lags, 0), 0.0)
+    return np.ascontiguousarray(weights.T), decay ** (steps + 1)
+
+
+def ewm(values, alpha):
+    """``ewm(alpha, adjust=False).mean()`` along the bars of every row, seeded on each row's first bar.
+
+    The recursion is unrolled a block of EWM_BLOCK bars at a time into a
+    matrix product, so the Python loop runs once per block rather than once
+    per bar and the work per block is a single BLAS call for all rows.
+    """
+    rows, bars = values.shape
+    out = np.empty_like(values)
+    if not bars:
+        return out
+    previous = values[:, 0].copy()
+    for start in range(0, bars, EWM_BLOCK):
+        block = values[:, start:start + EWM_BLOCK]
+        weights, carry = _ewm_weights(alpha, block.shape[1])
+        out[:, start:start + block.shape[1]] = block @ weights + previous[:, None] * carry
+        previous = out[:, start + block.shape[1] - 1]
+    return out
+
+
+def sma(closes, window):
+    """Simple moving average of every row, NaN for the first ``window - 1`` bars"""
+    out = np.full_like(closes, np.nan)
+    if closes.shape[1] >= window:
+        totals = np.cumsum(closes, axis=1)
+        out[:, window - 1] = totals[:, window - 1]
+        out[:, window:] = totals[:, window:] - totals[:, :-window]
+        out[:, window - 1:] /= window
+    return out
+
+
+def rsi(closes, window=14):
+    """Wilder's RSI of every row, NaN for the first ``window - 1`` bars"""
+    diff = np.zeros_like(closes)
+    diff[:, 1:] = np.diff(closes, axis=1)
+    # The first bar's diff counts as no gain and no loss, as in ta
+    avg_up = ewm(np.maximum(diff, 0.0), 1 / window)
+    avg_dn = ewm(np.maximum(-diff, 0.0), 1 / window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.where(avg_dn == 0, 100.0, 100 - 100 / (1 + avg_up / avg_dn))
+    out[:, :window - 1] = np.nan
+    return out
+
+
+def macd(closes, fast=12, slow=26, signal=9):
+    """MACD line and signal line of every row, NaN until each has enough bars"""
+    line = np.full_like(closes, np.nan)
+    signal_line = np.full_like(closes, np.nan)
+    first = max(fast, slow) - 1
+    if closes.shape[1] > first:
+        line[:, first:] = (ewm(closes, 2 / (fast + 1)) - ewm(closes, 2 / (slow + 1)))[:, first:]
+        # The signal EMA is seeded on the first valid MACD value
+        signal_line[:, first:] = ewm(line[:, first:], 2 / (signal + 1))
+        signal_line[:, first:first + signal - 1] = np.nan
+    return line, signal_line
+
+
+def indicator_matrix(closes, sma_windows=(5, 10), rsi_window=14, macd_fast=12, macd_slow=26, macd_signal=9):
+    """Compute the IncrementalIndicators columns for every row of a series x bars matrix.
+
+    Values match ``indicator_columns`` on each row to float rounding.
+    """
+    columns = {f'SMA_{window}': sma(closes, window) for window in sma_windows}
+    columns['RSI'] = rsi(closes, rsi_window)
+    columns['MACD'], columns['MACD_signal'] = macd(closes, macd_fast, macd_slow, macd_signal)
+    return columns
+
+
+def pattern_matrix(closes, double_tolerance=0.01, hs_tolerance=0.05):
+    """Return, per pattern name, which rows PatternRecognition would detect it in at their last bar.
+
+    With exactly 10 bars PatternRecognition fails on an empty second half;
+    no pattern is reported there, as in ``scan_pattern_masks``.
+    """
+    rows, bars = closes.shape
+    masks = {name: np.zeros(rows, dtype=bool) for name, _, _ in PATTERNS}
+    if bars <= 10:
+        return masks
+
+    recent = closes[:, -20:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        max1, max2 = recent[:, :10].max(axis=1), recent[:, 10:].max(axis=1)
+        masks['Double Top'] = np.abs(max1 - max2) / max1 < double_tolerance
+        min1, min2 = recent[:, :10].min(axis=1), recent[:, 10:].min(axis=1)
+        masks['Double Bottom'] = np.abs(min1 - min2) / min1 < double_tolerance
+
+        if bars >= 30:
+            thirds = closes[:, -30:].reshape(rows, 3, 10).max(axis=2)
+            left, head, right = thirds[:, 0], thirds[:, 1], thirds[:, 2]
+            masks['Head and Shoulders'] = (head > left) & (head > right) & (np.abs(left - right) / left < hs_tolerance)
+    return masks
+
+
+def signal_vector(indicators, patterns):
+    """Return analyze_data's recommendation for every row as BUY, SELL or HOLD.
+
+    Patterns vote with their confidence; when they tie, the SMA 5/10, MACD
+    and RSI conditions at the last bar decide.
+    """
+    rows = len(next(iter(patterns.values())))
+    buy = np.zeros(rows)
+    sell = np.zeros(rows)
+    # Add confidences in the same order get_trading_signal does so the float sums match
+    for name, signal, confidence in PATTERNS:
+        votes = buy if signal == 'Buy' else sell
+        votes += np.where(patterns[name], confidence, 0.0)
+    recommendation = np.sign(buy - sell).astype(np.int8)
+
+    sma_fast, sma_slow = indicators['SMA_5'][:, -1], indicators['SMA_10'][:, -1]
+    line, signal_line = indicators['MACD'][:, -1], indicators['MACD_signal'][:, -1]
+    rsi_last = indicators['RSI'][:, -1]
+    # Comparisons with NaN are false, so rows too short for an indicator hold
+    traditional = np.where(
+        (sma_fast > sma_slow) & (line > signal_line) & (rsi_last < 70), BUY,
+        np.where((sma_fast < sma_slow) & (line < signal_line) & (rsi_last > 30), SELL, HOLD)
+    ).astype(np.int8)
+    return np.where(recommendation != HOLD, recommendation, traditional)
+
+
+def analyze_matrix(closes, indicators=None):
+    """Analyze many series at once from a series x bars float64 matrix of closes.
+
+    Returns (indicators, patterns, signals): the indicator columns as
+    matrices, the per-row pattern masks and the per-row recommendation
+    codes. ``indicators`` can be passed in when they are already known, e.g.
+    from IndicatorEngine. Rows must have the same number of bars.
+    """
+    closes = np.atleast_2d(np.asarray(closes, dtype=np.float64))
+    if indicators is None:
+        indicators = indicator_matrix(closes)
+    patterns = pattern_matrix(closes)
+    return indicators, patterns, signal_vector(indicators, patterns)
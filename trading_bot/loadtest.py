@@ -0,0 +1,407 @@
+import asyncio
+import json
+import logging
+import random
+import time
+import zlib
+from email import policy
+from email.parser import BytesParser
+from urllib.parse import parse_qs
+import numpy as np
+import uvicorn
+import websockets
+from .benchmarks import make_candles
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+FIXTURE_SIZE = 10000
+MAX_CANDLES = 5000
+FIRST_CHAT_ID = 100000
+COMMANDS = ('signal', 'analyze', 'r75', 'auto_start')
+DEFAULT_MIX = {'signal': 4, 'analyze': 3, 'r75': 2, 'auto_start': 1}
+LOAD_SYMBOLS = ('R_10', 'R_25', 'R_50', 'R_75', 'R_100')
+LOAD_TIMEFRAMES = ('1m', '5m', '15m', '1h')
+
+
+def delay(latency, jitter):
+    """A non-negative delay of ``latency`` seconds with normally distributed ``jitter``"""
+    return max(0.0, random.gauss(latency, jitter)) if jitter else latency
+
+
+class FakeDerivServer:
+    """Deriv websocket API stand-in that answers ticks_history from replayed candles.
+
+    Each (symbol, granularity) replays a fixed bootstrap of data.csv laid out
+    so the last bar is the one forming now, so incremental refreshes see new
+    bars appear as time passes. Every response is delayed by ``latency``
+    seconds plus ``jitter``, and requests on one socket are answered
+    concurrently as Deriv does. ``ping`` and ``authorize`` are answered too;
+    live subscriptions are not replayed.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.05, jitter=0.02, fixture_size=FIXTURE_SIZE):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.fixture_size = fixture_size
+        self._fixtures = {}
+        self._server = None
+        self._tasks = set()
+        self.connections = 0
+        self.requests = {}
+
+    @property
+    def url(self):
+        return f'ws://{self.host}:{self.port}'
+
+    def stats(self):
+        return {'connections': self.connections, 'requests': dict(self.requests)}
+
+    async def start(self):
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _fixture(self, symbol, granularity):
+        key = (symbol, granularity)
+        if key not in self._fixtures:
+            df = make_candles(self.fixture_size, seed=zlib.crc32(f'{symbol}/{granularity}'.encode()))
+            self._fixtures[key] = np.round(df[['open', 'high', 'low', 'close']].values, 4)
+        return self._fixtures[key]
+
+    def candles(self, symbol, granularity, count=None, start=None, end='latest'):
+        """The candles Deriv would return for a ticks_history request, ending at the forming bar"""
+        last = int(time.time()) // granularity
+        if end != 'latest':
+            last = min(last, int(end) // granularity)
+        first = last - min(int(count or MAX_CANDLES), MAX_CANDLES) + 1
+        if start is not None:
+            first = max(first, -(-int(start) // granularity))
+        fixture = self._fixture(symbol, granularity)
+        return [
+            {'epoch': index * granularity, 'open': o, 'high': h, 'low': l, 'close': c}
+            for index, (o, h, l, c) in zip(range(first, last + 1),
+                                          fixture[np.arange(first, last + 1) % len(fixture)].tolist())
+        ]
+
+    def _answer(self, request):
+        if 'ticks_history' in request:
+            if request.get('subscribe'):
+                return {'error': {'code': 'NotSupported', 'message': 'Subscriptions are not replayed'},
+                        'msg_type': 'ticks_history'}
+            candles = self.candles(request['ticks_history'], int(request.get('granularity', 60)),
+                                   request.get('count'), request.get('start'), request.get('end', 'latest'))
+            return {'candles': candles, 'msg_type': 'candles', 'pip_size': 4}
+        if 'ping' in request:
+            return {'ping': 'pong', 'msg_type': 'ping'}
+        if 'authorize' in request:
+            return {'authorize': {'loginid': 'VRTC0000000', 'currency': 'USD'}, 'msg_type': 'authorize'}
+        if 'forget' in request or 'forget_all' in request:
+            msg_type = 'forget' if 'forget' in request else 'forget_all'
+            return {msg_type: 1 if msg_type == 'forget' else [], 'msg_type': msg_type}
+        return {'error': {'code': 'UnrecognisedRequest', 'message': 'Unrecognised request'}, 'msg_type': 'error'}
+
+    async def _respond(self, websocket, request):
+        await asyncio.sleep(delay(self.latency, self.jitter))
+        response = self._answer(request)
+        response['echo_req'] = request
+        if 'req_id' in request:
+            response['req_id'] = request['req_id']
+        try:
+            await websocket.send(json.dumps(response))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _handle(self, websocket, path=None):
+        self.connections += 1
+        async for message in websocket:
+            request = json.loads(message)
+            name = next(iter(request), 'unknown')
+            self.requests[name] = self.requests.get(name, 0) + 1
+            task = asyncio.create_task(self._respond(websocket, request))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+
+class FakeTelegramServer:
+    """Telegram Bot API stand-in served over HTTP in the current event loop.
+
+    ``push_update`` queues a user message that the bot receives from its
+    next ``getUpdates`` long poll. Sent and edited messages get a valid
+    Message back after ``latency`` (plus ``jitter``) seconds and are handed
+    to ``on_message`` as (chat_id, text). Uploaded photos get a new file_id
+    and photos sent by file_id are counted separately.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.05, jitter=0.02, on_message=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.on_message = on_message
+        self._updates = []
+        self._update_id = 0
+        self._message_id = 0
+        self._new_updates = asyncio.Event()
+        self._server = None
+        self._task = None
+        self.polling = asyncio.Event()
+        self.calls = {}
+        self.uploads = 0
+        self.reused_uploads = 0
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    def stats(self):
+        return {'calls': dict(self.calls), 'uploads': self.uploads, 'reused_uploads': self.reused_uploads}
+
+    async def start(self):
+        config = uvicorn.Config(self, host=self.host, port=self.port, log_level='warning',
+                                lifespan='off', ws='none', access_log=False)
+        self._server = uvicorn.Server(config)
+        self._task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            if self._task.done():
+                # Re-raise whatever stopped the server from binding
+                await self._task
+                raise RuntimeError('Fake Telegram server exited on startup')
+            await asyncio.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            await self._task
+            self._server = None
+
+    def push_update(self, chat_id, text):
+        """Queue a private-chat message from the user ``chat_id`` for the bot"""
+        self._update_id += 1
+        self._message_id += 1
+        command = text.split()[0]
+        self._updates.append({
+            'update_id': self._update_id,
+            'message': {
+                'message_id': self._message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private', 'first_name': f'User {chat_id}'},
+                'from': {'id': chat_id, 'is_bot': False, 'first_name': f'User {chat_id}'},
+                'text': text,
+                'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(command)}],
+            },
+        })
+        self._new_updates.set()
+
+    async def _get_updates(self, params):
+        offset = int(params.get('offset', 0))
+        self._updates = [update for update in self._updates if update['update_id'] >= offset]
+        self.polling.set()
+        if not self._updates:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), float(params.get('timeout', 0)))
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:int(params.get('limit', 100))]
+
+    def _message(self, params):
+        self._message_id += 1
+        chat_id = int(params['chat_id'])
+        return {
+            'message_id': self._message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private' if chat_id > 0 else 'group'},
+            'from': {'id': 1, 'is_bot': True, 'first_name': 'Load Test Bot'},
+        }
+
+    async def _call(self, method, params):
+        if method == 'getMe':
+            return {'id': 1, 'is_bot': True, 'first_name': 'Load Test Bot', 'username': 'load_test_bot'}
+        if method == 'getUpdates':
+            return await self._get_updates(params)
+        if method not in ('sendMessage', 'sendPhoto', 'sendDocument', 'editMessageText', 'editMessageCaption'):
+            return True
+
+        await asyncio.sleep(delay(self.latency, self.jitter))
+        message = self._message(params)
+        if method == 'sendPhoto':
+            photo = params.get('photo')
+            if isinstance(photo, str) and not photo.startswith('attach://'):
+                self.reused_uploads += 1
+                file_id = photo
+            else:
+                self.uploads += 1
+                file_id = f'photo-{self.uploads}'
+            message['photo'] = [{'file_id': file_id, 'file_unique_id': file_id, 'width': 1200, 'height': 800}]
+            message['caption'] = params.get('caption', '')
+            text = message['caption']
+        elif method == 'sendDocument':
+            message['document'] = {'file_id': f'document-{self._message_id}', 'file_unique_id': f'document-{self._message_id}'}
+            message['caption'] = params.get('caption', '')
+            text = message['caption']
+        else:
+            if 'message_id' in params:
+                message['message_id'] = int(params['message_id'])
+            text = params.get('text', params.get('caption', ''))
+            message['text'] = text
+        if self.on_message is not None:
+            self.on_message(message['chat']['id'], text)
+        return message
+
+    @staticmethod
+    def _parse(content_type, body):
+        """Request parameters from a form-encoded or multipart body; files come back as bytes"""
+        if content_type.startswith('multipart/form-data'):
+            parsed = BytesParser(policy=policy.HTTP).parsebytes(
+                b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body)
+            params = {}
+            for part in parsed.iter_parts():
+                name = part.get_param('name', header='content-disposition')
+                payload = part.get_payload(decode=True)
+                params[name] = payload if part.get_filename() else payload.decode()
+            return params
+        if content_type.startswith('application/json'):
+            return json.loads(body or b'{}')
+        return {key: values[-1] for key, values in parse_qs(body.decode()).items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        body = b''
+        while True:
+            event = await receive()
+            body += event.get('body', b'')
+            if not event.get('more_body'):
+                break
+        headers = dict(scope['headers'])
+        method = scope['path'].rstrip('/').rsplit('/', 1)[-1]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        try:
+            params = self._parse(headers.get(b'content-type', b'').decode(), body)
+            response = {'ok': True, 'result': await self._call(method, params)}
+            status = 200
+        except Exception as e:
+            logger.error(f"Fake Telegram error in {method}: {str(e)}")
+            response = {'ok': False, 'error_code': 400, 'description': f'Bad Request: {e}'}
+            status = 400
+        payload = json.dumps(response).encode()
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(payload)).encode())]})
+        await send({'type': 'http.response.body', 'body': payload})
+
+
+def command_text(command, rng):
+    """A random invocation of one of the load-tested commands"""
+    if command == 'signal':
+        return f'/signal {rng.choice(LOAD_SYMBOLS)}'
+    if command == 'analyze':
+        return f'/analyze {rng.choice(LOAD_SYMBOLS)} {rng.choice(LOAD_TIMEFRAMES)}'
+    if command == 'auto_start':
+        return f'/auto_start {rng.choice((5, 15, 60))}'
+    return '/r75'
+
+
+def summarize(samples, elapsed):
+    """Per-command counts, throughput and latency percentiles from (command, outcome, seconds) samples"""
+    report = {}
+    for command in sorted({sample[0] for sample in samples}):
+        outcomes = [outcome for name, outcome, _ in samples if name == command]
+        latencies = np.array([seconds for name, outcome, seconds in samples
+                              if name == command and outcome != 'timeout']) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (float('nan'),) * 3
+        report[command] = {
+            'count': len(outcomes),
+            'errors': outcomes.count('error'),
+            'timeouts': outcomes.count('timeout'),
+            'throughput': round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+            'p50_ms': round(float(p50), 1),
+            'p95_ms': round(float(p95), 1),
+            'p99_ms': round(float(p99), 1),
+            'max_ms': round(float(latencies.max()), 1) if len(latencies) else float('nan'),
+        }
+    return report
+
+
+class LoadDriver:
+    """Simulates ``users`` Telegram users sending commands to the bot through a FakeTelegramServer.
+
+    Each user thinks for an exponentially distributed time averaging
+    60 / ``rate`` seconds, sends a command drawn from ``mix`` and waits for
+    its answer before thinking again. A command's latency runs from queuing
+    the update to the reply that completes it: the chart or result for
+    /signal, /analyze and /r75 and the confirmation for /auto_start.
+    "Please wait" notices and automatic updates do not complete a command;
+    automatic updates are counted on their own.
+    """
+
+    def __init__(self, telegram, users=10, rate=6.0, mix=None, duration=60.0, timeout=60.0, seed=0):
+        self.telegram = telegram
+        self.users = users
+        self.rate = rate
+        self.mix = mix or DEFAULT_MIX
+        self.duration = duration
+        self.timeout = timeout
+        self.seed = seed
+        self.samples = []
+        self.broadcasts = 0
+        self._waiting = {}
+        telegram.on_message = self.on_message
+
+    def on_message(self, chat_id, text):
+        if 'AUTOMATIC UPDATE' in text:
+            self.broadcasts += 1
+            return
+        waiting = self._waiting.get(chat_id)
+        if waiting is None or waiting.done() or text.rstrip().endswith('Please wait.'):
+            return
+        waiting.set_result('error' if text.startswith('Sorry, an error occurred') else 'ok')
+
+    async def _issue(self, chat_id, command, rng):
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[chat_id] = future
+        started = time.perf_counter()
+        self.telegram.push_update(chat_id, command_text(command, rng))
+        try:
+            outcome = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+        finally:
+            self._waiting.pop(chat_id, None)
+        self.samples.append((command, outcome, time.perf_counter() - started))
+
+    async def _user(self, index, deadline):
+        rng = random.Random(self.seed * 1000003 + index)
+        commands, weights = zip(*self.mix.items())
+        chat_id = FIRST_CHAT_ID + index
+        while True:
+            think = rng.expovariate(self.rate / 60)
+            if time.monotonic() + think >= deadline:
+                return
+            await asyncio.sleep(think)
+            await self._issue(chat_id, rng.choices(commands, weights)[0], rng)
+
+    async def run(self):
+        """Run the load for ``duration`` seconds, then wait for outstanding commands and return the report"""
+        started = time.monotonic()
+        await asyncio.gather(*(self._user(index, started + self.duration) for index in range(self.users)))
+        elapsed = time.monotonic() - started
+        completed = sum(1 for _, outcome, _ in self.samples if outcome != 'timeout')
+        return {
+            'users': self.users,
+            'rate_per_user_per_min': self.rate,
+            'elapsed_s': round(elapsed, 1),
+            'completed': completed,
+            'throughput': round(completed / elapsed, 3),
+            'broadcasts': self.broadcasts,
+            'commands': summarize(self.samples, elapsed),
+        }
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from trading_bot.backtest import load_candles, run_backtest
+
+
+class Command(BaseCommand):
+    help = 'Backtest the bot signals over historical candles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', nargs='?', default='data.csv',
+                            help='Candles in the bot CSV layout (close, epoch, high, low, open)')
+        parser.add_argument('--symbol', help='Read the candles of this symbol from the stored history instead')
+        parser.add_argument('--timeframe', default='1m', help='Timeframe of the stored history to read (with --symbol)')
+        parser.add_argument('--fee', type=float, default=0.0,
+                            help='Cost per unit of position change, as a fraction of notional')
+        parser.add_argument('--long-only', action='store_true', help='Treat Sell as exit instead of going short')
+        parser.add_argument('--output', help='Write the per-bar signal, position and equity series to this CSV')
+
+    def handle(self, *args, **options):
+        if options['symbol']:
+            from trading_bot.bot import AVAILABLE_TIMEFRAMES, candle_history
+            if options['timeframe'] not in AVAILABLE_TIMEFRAMES:
+                raise CommandError(f"Unknown timeframe: {options['timeframe']}")
+            symbol, granularity = options['symbol'].upper(), AVAILABLE_TIMEFRAMES[options['timeframe']]
+            candles = candle_history.frame(symbol, granularity)
+            if candles.empty:
+                raise CommandError(f"No stored history for {options['symbol']} {options['timeframe']}")
+            gaps = candle_history.partition(symbol, granularity).gaps()
+            if gaps:
+                self.stdout.write(self.style.WARNING(f"The stored history has {len(gaps)} gap(s) Deriv could not fill"))
+        else:
+            candles = load_candles(options['csv_file'])
+        result = run_backtest(candles, fee=options['fee'], allow_short=not options['long_only'])
+
+        for name, value in result.summary().items():
+            self.stdout.write(f'{name}: {value}')
+        if options['output']:
+            result.to_frame().to_csv(options['output'], index=False)
+            self.stdout.write(self.style.SUCCESS(f"Per-bar results written to {options['output']}"))
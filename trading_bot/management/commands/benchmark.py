@@ -0,0 +1,48 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from trading_bot.benchmarks import BENCHMARKS, DEFAULT_SIZES, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the analysis hot path offline on data.csv-derived candles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', help=f"Comma-separated benchmarks (default: all of {', '.join(BENCHMARKS)})")
+        parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                            help='Comma-separated candle counts')
+        parser.add_argument('--min-time', type=float, default=0.5, help='Seconds to spend per case')
+        parser.add_argument('--max-repeats', type=int, default=50)
+        parser.add_argument('--output', default='benchmark_results.json', help='Where to save the JSON report')
+        parser.add_argument('--compare', help='Baseline JSON report to compare against')
+        parser.add_argument('--threshold', type=float, default=1.2,
+                            help='Flag cases whose median is this many times slower than the baseline')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['only'].split(',')] if options['only'] else None
+        unknown = [name for name in names or [] if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError(f"Unknown benchmarks: {', '.join(unknown)}")
+        sizes = [int(size) for size in options['sizes'].split(',')]
+
+        def progress(result):
+            self.stdout.write(
+                f"{result['name']:<24} {result['size']:>8} bars  median {result['median_ms']:>12.3f} ms  "
+                f"min {result['min_ms']:>12.3f} ms  ({result['repeats']} runs)"
+            )
+
+        report = run_benchmarks(names, sizes, options['min_time'], options['max_repeats'], progress)
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results saved to {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            for name, size, before, after, ratio in compare(report, baseline):
+                line = f"{name:<24} {size:>8} bars  {before:>12.3f} -> {after:>12.3f} ms  x{ratio:.2f}"
+                if ratio >= options['threshold']:
+                    self.stdout.write(self.style.ERROR(line + '  REGRESSION'))
+                elif ratio <= 1 / options['threshold']:
+                    self.stdout.write(self.style.SUCCESS(line))
+                else:
+                    self.stdout.write(line)
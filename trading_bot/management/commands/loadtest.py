@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+from django.core.management.base import BaseCommand, CommandError
+from trading_bot.loadtest import COMMANDS, DEFAULT_MIX, FakeDerivServer, FakeTelegramServer, LoadDriver
+
+BOT_READY_TIMEOUT = 60
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        command, _, weight = item.partition('=')
+        command = command.strip().lstrip('/')
+        if command not in COMMANDS:
+            raise CommandError(f"Unknown command {command!r}, expected one of {', '.join(COMMANDS)}")
+        mix[command] = float(weight or 1)
+    return mix
+
+
+class Command(BaseCommand):
+    help = 'Load-test the bot against local fake Deriv and Telegram servers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Simulated Telegram users')
+        parser.add_argument('--rate', type=float, default=6.0, help='Commands per user per minute')
+        parser.add_argument('--duration', type=float, default=60.0, help='Seconds to generate load for')
+        parser.add_argument('--mix', default=','.join(f'{command}={weight}' for command, weight in DEFAULT_MIX.items()),
+                            help='Comma-separated command=weight pairs')
+        parser.add_argument('--timeout', type=float, default=60.0, help='Seconds before a command counts as timed out')
+        parser.add_argument('--deriv-latency', type=float, default=50.0, help='Fake Deriv response latency in ms')
+        parser.add_argument('--deriv-jitter', type=float, default=20.0, help='Standard deviation of the Deriv latency in ms')
+        parser.add_argument('--telegram-latency', type=float, default=50.0, help='Fake Telegram send latency in ms')
+        parser.add_argument('--telegram-jitter', type=float, default=20.0)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--external-bot', action='store_true',
+                            help='Do not start the bot; wait for one started with the printed environment')
+        parser.add_argument('--deriv-port', type=int, default=0)
+        parser.add_argument('--telegram-port', type=int, default=0)
+        parser.add_argument('--output', help='Where to save the JSON report')
+
+    def handle(self, *args, **options):
+        report = asyncio.run(self.run(options, parse_mix(options['mix'])))
+
+        self.stdout.write(
+            f"\n{report['users']} users, {report['completed']} commands in {report['elapsed_s']}s "
+            f"({report['throughput']:.2f}/s), {report['broadcasts']} automatic updates delivered"
+        )
+        self.stdout.write(f"{'command':<12} {'count':>6} {'errors':>6} {'timeouts':>8} {'per s':>7} "
+                          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for command, row in report['commands'].items():
+            line = (f"/{command:<11} {row['count']:>6} {row['errors']:>6} {row['timeouts']:>8} "
+                    f"{row['throughput']:>7.2f} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+            self.stdout.write(self.style.ERROR(line) if row['errors'] or row['timeouts'] else line)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results saved to {options['output']}"))
+
+    async def run(self, options, mix):
+        deriv = FakeDerivServer(port=options['deriv_port'], latency=options['deriv_latency'] / 1000,
+                                jitter=options['deriv_jitter'] / 1000)
+        telegram = FakeTelegramServer(port=options['telegram_port'], latency=options['telegram_latency'] / 1000,
+                                      jitter=options['telegram_jitter'] / 1000)
+
+        # The bot's state, outputs and database go to a scratch directory, so the simulated
+        # users' subscriptions never reach the real database
+        workdir = tempfile.mkdtemp(prefix='loadtest-')
+        database = os.path.join(workdir, 'db.sqlite3')
+        subprocess.run([sys.executable, 'manage.py', 'migrate', '--verbosity', '0'],
+                       env={**os.environ, 'DATABASE_PATH': database}, check=True)
+
+        await deriv.start()
+        await telegram.start()
+        env = {
+            'DATABASE_PATH': database,
+            'DERIV_ENDPOINT': deriv.url,
+            'TELEGRAM_API_URL': telegram.url,
+            'TELEGRAM_TOKEN': '123456:LOADTEST',
+            'APP_ID': '1',
+            'DERIV_API_TOKEN': '',
+            'STREAMING_ENABLED': 'false',
+            'HISTORY_DIR': os.path.join(workdir, 'history'),
+            'SIGNALS_SNAPSHOT_FILE': os.path.join(workdir, 'signals.json'),
+            'METRICS_FILE': os.path.join(workdir, 'metrics.prom'),
+        }
+        bot = None
+        try:
+            if options['external_bot']:
+                self.stdout.write('Start the bot with:\n' + ' '.join(f'{key}={value}' for key, value in env.items())
+                                  + ' python manage.py run_bot')
+            else:
+                log = open(os.path.join(workdir, 'bot.log'), 'w')
+                bot = subprocess.Popen([sys.executable, 'manage.py', 'run_bot'], env={**os.environ, **env},
+                                       stdout=log, stderr=subprocess.STDOUT)
+                self.stdout.write(f"Started the bot (pid {bot.pid}), output in {log.name}")
+
+            try:
+                await asyncio.wait_for(telegram.polling.wait(), None if options['external_bot'] else BOT_READY_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise CommandError(f"The bot did not start polling within {BOT_READY_TIMEOUT}s")
+
+            self.stdout.write(f"Running {options['users']} users at {options['rate']}/min each "
+                              f"for {options['duration']}s...")
+            driver = LoadDriver(telegram, options['users'], options['rate'], mix, options['duration'],
+                                options['timeout'], options['seed'])
+            report = await driver.run()
+            report['deriv'] = deriv.stats()
+            report['telegram'] = telegram.stats()
+            return report
+        finally:
+            if bot is not None:
+                bot.send_signal(signal.SIGINT)
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, bot.wait, 30)
+                except subprocess.TimeoutExpired:
+                    bot.kill()
+            await telegram.stop()
+            await deriv.stop()
@@ -1,5 +1,6 @@
+import os
 from django.core.management.base import BaseCommand
-from trading_bot.bot import run_telegram_bot
+from trading_bot.startup import StartupTimer
 import logging
 
 logger = logging.getLogger('trading_bot')
@@ -8,10 +9,14 @@ class Command(BaseCommand):
     help = 'Run the Deriv Trading Signal Bot'
 
     def handle(self, *args, **options):
+        startup_timer = StartupTimer(launched_at=os.getenv('BOT_LAUNCHED_AT'))
         try:
             self.stdout.write(self.style.SUCCESS('Starting Deriv Trading Signal Bot...'))
             logger.info("Starting Deriv Trading Signal Bot...")
-            run_telegram_bot()
+            # Imported here so its cost shows up as its own startup phase
+            from trading_bot.bot import run_telegram_bot
+            startup_timer.mark('imports')
+            run_telegram_bot(startup_timer)
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Fatal error: {str(e)}'))
             logger.error(f"Fatal error: {str(e)}")
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from trading_bot.bot import AVAILABLE_SYMBOLS, AVAILABLE_TIMEFRAMES, candle_store, deriv_pool
+from trading_bot.sweep import (
+    SweepRunner, load_results, load_series, parameter_grid, random_parameters, save_series, series_file
+)
+
+logger = logging.getLogger('trading_bot')
+
+FETCH_TIMEOUT = 30
+
+# Searched when no --space file is given
+DEFAULT_SPACE = {
+    'sma_fast': [3, 5, 8],
+    'sma_slow': [10, 20, 30],
+    'rsi_window': [9, 14, 21],
+    'rsi_upper': [65, 70, 80],
+    'rsi_lower': [20, 30, 35],
+    'double_tolerance': [0.005, 0.01, 0.02],
+    'hs_tolerance': [0.03, 0.05],
+}
+
+
+async def fetch_series(series, count):
+    """Download the closed bars among the last ``count`` of every (symbol, timeframe) from Deriv"""
+    async def fetch(symbol, timeframe):
+        granularity = AVAILABLE_TIMEFRAMES[timeframe]
+        try:
+            rows = await asyncio.wait_for(candle_store.history(symbol, granularity, count=count), FETCH_TIMEOUT)
+            # The forming bar would change the series, and its fingerprint, on every run
+            return (symbol, timeframe), rows[4][rows[0] + granularity <= time.time()]
+        except Exception as e:
+            logger.error(f"Error fetching {symbol} {timeframe} for the sweep: {e!r}")
+            return (symbol, timeframe), None
+
+    try:
+        results = await asyncio.gather(*(fetch(symbol, timeframe) for symbol, timeframe in series))
+    finally:
+        await deriv_pool.close()
+    return {name: closes for name, closes in results if closes is not None and len(closes)}
+
+
+class Command(BaseCommand):
+    help = 'Sweep strategy parameters over symbols and timeframes on all cores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--symbols', default=','.join(AVAILABLE_SYMBOLS))
+        parser.add_argument('--timeframes', default=','.join(AVAILABLE_TIMEFRAMES))
+        parser.add_argument('--count', type=int, default=5000, help='Candles per series (Deriv allows up to 5000)')
+        parser.add_argument('--space', help='JSON file mapping parameter names to value lists or {"min": low, "max": high} ranges')
+        parser.add_argument('--random', type=int, default=0, help='Draw this many random parameter sets instead of the full grid')
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+        parser.add_argument('--fee', type=float, default=0.0)
+        parser.add_argument('--results', default='sweep_results.jsonl', help='Results file; an existing one is resumed')
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        space = DEFAULT_SPACE
+        if options['space']:
+            with open(options['space']) as f:
+                space = json.load(f)
+        if options['random']:
+            parameter_sets = random_parameters(space, options['random'], options['seed'])
+        else:
+            parameter_sets = parameter_grid(space)
+
+        symbols = [s.strip().upper() for s in options['symbols'].split(',')]
+        timeframes = [tf.strip() for tf in options['timeframes'].split(',')]
+        unknown = [tf for tf in timeframes if tf not in AVAILABLE_TIMEFRAMES]
+        if unknown:
+            raise CommandError(f"Unknown timeframes: {', '.join(unknown)}")
+
+        # A resumed sweep reuses the candles it started on, so its evaluation keys still match
+        saved_file = series_file(options['results'])
+        saved = load_series(saved_file) if os.path.exists(options['results']) else {}
+        wanted = [(symbol, timeframe) for symbol in symbols for timeframe in timeframes]
+        series = {name: saved[name] for name in wanted if name in saved}
+        if series:
+            self.stdout.write(f'Resuming on the candles saved in {saved_file}')
+        missing = [name for name in wanted if name not in saved]
+        if missing:
+            fetched = asyncio.run(fetch_series(missing, options['count']))
+            series.update(fetched)
+            save_series(saved_file, {**saved, **fetched})
+        if not series:
+            raise CommandError('No candles could be fetched')
+
+        runner = SweepRunner(series, options['results'], workers=options['workers'], fee=options['fee'])
+        self.stdout.write(f'{len(parameter_sets)} parameter sets x {len(series)} series on {runner.workers} workers')
+        runner.run(parameter_sets)
+        self.stdout.write(self.style.SUCCESS(
+            f'{runner.evaluated} evaluations ({runner.skipped} resumed) at {runner.throughput:.1f} evaluations/s'
+        ))
+
+        for record in load_results(options['results'])[:options['top']]:
+            self.stdout.write(
+                f"{record['symbol']} {record['timeframe']} return={record['total_return']:.4f} "
+                f"hit_rate={record['hit_rate']:.2f} drawdown={record['max_drawdown']:.4f} {record['params']}"
+            )
@@ -0,0 +1,271 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import re
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from .process_files import pid_alive, process_files, process_path, prune_files, remove_file, write_atomic
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+METRICS_FILE = os.getenv('METRICS_FILE', os.path.join('data', 'metrics.prom'))
+METRICS_INTERVAL = float(os.getenv('METRICS_INTERVAL', 5))
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+LABEL_NAMES = ('command', 'symbol', 'timeframe')
+
+# A sample line of the text format: name, optional labels, value
+_SAMPLE = re.compile(r'([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)')
+
+# Labels of the command the current task is serving; copied into tasks it starts
+_labels = contextvars.ContextVar('metric_labels', default={})
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout, one series per label combination"""
+
+    def __init__(self, name, help, labelnames=(), buckets=STAGE_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, labels=()):
+        series = self._series.get(labels)
+        if series is None:
+            # One slot per bucket plus +Inf, then the sum
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self._series.items()):
+            total = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                total += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_label_text(self.labelnames, labels, le)} {total}')
+            lines.append(f'{self.name}_sum{_label_text(self.labelnames, labels)} {series[-1]!r}')
+            lines.append(f'{self.name}_count{_label_text(self.labelnames, labels)} {total}')
+        return lines
+
+
+class Gauge:
+    """A value per label combination that goes up and down"""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def set(self, value, labels=()):
+        self._values[labels] = value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge']
+        for labels, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{_label_text(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+class Metrics:
+    """Stage timings, in-flight gauges and event-loop lag for the bot process.
+
+    A handler wrapped with ``instrument`` runs with its command as a label,
+    and ``label`` adds the symbol and timeframe once it has parsed them.
+    Every ``span`` inside it, including ones in tasks it starts, is recorded
+    under those labels. Since the web app runs in another process, a
+    background task writes everything in the Prometheus text format to this
+    process's variant of ``path`` every ``interval`` seconds, and the
+    /metrics view serves those of all bot processes through read_metrics.
+    The same task measures how late the event loop wakes it up.
+    """
+
+    def __init__(self, path=METRICS_FILE, interval=METRICS_INTERVAL, lag_interval=0.5):
+        self.path = path
+        self.interval = interval
+        self.lag_interval = lag_interval
+        self.stage_seconds = Histogram(
+            'trading_bot_stage_seconds', 'Time spent in each stage of serving a command.',
+            ('stage',) + LABEL_NAMES)
+        self.command_seconds = Histogram(
+            'trading_bot_command_seconds', 'Time from receiving a command to its last reply.', LABEL_NAMES)
+        self.in_flight = Gauge('trading_bot_commands_in_flight', 'Commands being handled.', ('command',))
+        self.loop_lag = Histogram(
+            'trading_bot_event_loop_lag_seconds', 'How late the event loop ran a scheduled wake-up.',
+            buckets=LAG_BUCKETS)
+        self.last_loop_lag = Gauge('trading_bot_event_loop_lag_last_seconds', 'The most recent event loop lag.')
+        self._collectors = []
+        self._task = None
+
+    def collect(self, name, help, callback):
+        """Report ``callback()`` as a gauge every time the metrics are written"""
+        self._collectors.append((Gauge(name, help), callback))
+
+    def label(self, **labels):
+        """Add labels, e.g. symbol and timeframe, to the rest of the current command"""
+        _labels.set({**_labels.get(), **labels})
+
+    def _current(self):
+        labels = _labels.get()
+        return tuple(labels.get(name, '') for name in LABEL_NAMES)
+
+    @contextmanager
+    def span(self, stage):
+        """Time a stage of the current command"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds.observe(time.perf_counter() - started, (stage,) + self._current())
+
+    @contextmanager
+    def command(self, name):
+        """Time a whole command and count it as in flight while it runs"""
+        token = _labels.set({'command': name})
+        self.in_flight.inc((name,))
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.command_seconds.observe(time.perf_counter() - started, self._current())
+            self.in_flight.dec((name,))
+            _labels.reset(token)
+
+    def instrument(self, name):
+        """Decorator that runs an async handler under ``command(name)``"""
+        def decorate(handler):
+            @functools.wraps(handler)
+            async def wrapper(*args, **kwargs):
+                with self.command(name):
+                    return await handler(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def render(self):
+        lines = []
+        for metric in (self.stage_seconds, self.command_seconds, self.in_flight, self.loop_lag, self.last_loop_lag):
+            lines += metric.render()
+        for gauge, callback in self._collectors:
+            try:
+                gauge.set(callback())
+            except Exception as e:
+                logger.error(f"Error collecting {gauge.name}: {str(e)}")
+                continue
+            lines += gauge.render()
+        lines += ['# HELP trading_bot_metrics_timestamp_seconds When the bot wrote these metrics.',
+                  '# TYPE trading_bot_metrics_timestamp_seconds gauge',
+                  f'trading_bot_metrics_timestamp_seconds {time.time()!r}']
+        return '\n'.join(lines) + '\n'
+
+    def write(self):
+        try:
+            write_atomic(process_path(self.path), self.render())
+        except OSError as e:
+            logger.error(f"Error writing metrics: {str(e)}")
+
+    def start(self):
+        """Start measuring loop lag and writing the metrics file on the running event loop"""
+        if self._task is None or self._task.done():
+            prune_files(self.path)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # A stopped process's metrics are not served, see read_metrics
+        remove_file(process_path(self.path))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_write = loop.time() + self.interval
+        while True:
+            expected = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, loop.time() - expected)
+            self.loop_lag.observe(lag)
+            self.last_loop_lag.set(lag)
+            if loop.time() >= next_write:
+                self.write()
+                next_write = loop.time() + self.interval
+
+
+def read_metrics(path=METRICS_FILE):
+    """Combine the metrics files of every running bot process, or return None if there are none.
+
+    Every sample gets a ``process`` label with the pid that wrote it, and
+    the samples of a metric from all processes are grouped under a single
+    HELP and TYPE header, as the text format requires.
+    """
+    headers = {}
+    samples = {}
+    found = False
+    for pid, file in process_files(path):
+        if not pid_alive(pid):
+            continue
+        try:
+            with open(file) as f:
+                text = f.read()
+        except OSError:
+            # Removed as the process stopped
+            continue
+        found = True
+        family = None
+        for line in text.splitlines():
+            if line.startswith('#'):
+                parts = line.split(' ', 3)
+                if len(parts) >= 3 and parts[1] in ('HELP', 'TYPE'):
+                    family = parts[2]
+                    headers.setdefault(family, {}).setdefault(parts[1], line)
+                    samples.setdefault(family, [])
+                continue
+            match = _SAMPLE.fullmatch(line)
+            if match is None or family is None:
+                continue
+            name, labels, value = match.groups()
+            labels = f'process="{pid}"' + (f',{labels}' if labels else '')
+            samples[family].append(f'{name}{{{labels}}} {value}')
+    if not found:
+        return None
+    lines = []
+    for family, family_samples in samples.items():
+        lines += [headers[family][kind] for kind in ('HELP', 'TYPE') if kind in headers[family]]
+        lines += family_samples
+    return '\n'.join(lines) + '\n'
+
+
+# One registry per process, shared by the modules that time their stages
+metrics = Metrics()
@@ -13,6 +13,39 @@ class AnalysisResult(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Latest results per series, and the default ordering for everything
+            models.Index(fields=['symbol', 'timeframe', 'created_at'], name='analysis_series_created_idx'),
+            models.Index(fields=['created_at'], name='analysis_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.symbol} {self.timeframe} - {self.recommendation}"
+
+
+class Subscription(models.Model):
+    """A chat's automatic updates for one series, kept across restarts and shared by every bot process"""
+    chat_id = models.BigIntegerField()
+    symbol = models.CharField(max_length=20)
+    timeframe = models.CharField(max_length=10)
+    interval = models.PositiveIntegerField(help_text='Seconds between updates')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # A chat has at most one interval per series, as in SubscriptionRegistry
+            models.UniqueConstraint(fields=['chat_id', 'symbol', 'timeframe'], name='subscription_chat_series_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.chat_id} {self.symbol} {self.timeframe} every {self.interval}s"
+
+
+class Lease(models.Model):
+    """A named role, such as polling Telegram, held by one bot process until ``expires_at``"""
+    name = models.CharField(max_length=50, unique=True)
+    holder = models.CharField(max_length=100)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} held by {self.holder} until {self.expires_at}"
@@ -1,3 +1,115 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# (name, signal, confidence) for every pattern, in the order PatternRecognition checks them
+PATTERNS = (
+    ('Double Top', 'Sell', 0.7),
+    ('Double Bottom', 'Buy', 0.7),
+    ('Head and Shoulders', 'Sell', 0.8),
+)
+
+# One row per (bar, pattern) detection; ``pattern`` indexes PATTERNS
+DETECTION_DTYPE = np.dtype([('index', np.int64), ('pattern', np.int8), ('confidence', np.float64)])
+
+
+def _window_max(closes, width):
+    return sliding_window_view(closes, width).max(axis=1)
+
+
+def _window_min(closes, width):
+    return sliding_window_view(closes, width).min(axis=1)
+
+
+def _double_extremes(closes, window, running):
+    """First and second half extremes of the last 20 closes at every bar (NaN where undefined).
+
+    At bar t with at least 20 closes the halves are the two trailing
+    10-bar windows; with 11-19 closes the first half is the first 10 closes
+    and the second half is whatever follows, as ``tail(20)`` gives.
+    """
+    n = len(closes)
+    first = np.full(n, np.nan)
+    second = np.full(n, np.nan)
+    if n > 10:
+        end = min(n, 20)
+        first[10:end] = window[0]
+        second[10:end] = running(closes[10:end])
+    if n >= 20:
+        first[19:] = window[:n - 19]
+        second[19:] = window[10:]
+    return first, second
+
+
+def scan_pattern_masks(closes, double_tolerance=0.01, hs_tolerance=0.05):
+    """Evaluate every pattern at every bar of a close series in one pass.
+
+    Returns one boolean array per pattern name where element t is what
+    PatternRecognition would detect on ``closes[:t + 1]``, using sliding
+    10-bar max/min windows instead of slicing the tail at each bar. With
+    exactly 10 closes PatternRecognition fails on an empty second half;
+    the scanner reports no pattern there. The tolerances default to the
+    ones PatternRecognition uses and can be varied for parameter sweeps.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    n = len(closes)
+    if n < 10:
+        return {name: np.zeros(n, dtype=bool) for name, _, _ in PATTERNS}
+
+    window_max = _window_max(closes, 10)
+    window_min = _window_min(closes, 10)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        max1, max2 = _double_extremes(closes, window_max, np.maximum.accumulate)
+        double_top = np.abs(max1 - max2) / max1 < double_tolerance
+
+        min1, min2 = _double_extremes(closes, window_min, np.minimum.accumulate)
+        double_bottom = np.abs(min1 - min2) / min1 < double_tolerance
+
+        head_shoulders = np.zeros(n, dtype=bool)
+        if n >= 30:
+            left, head, right = window_max[:n - 29], window_max[10:n - 19], window_max[20:]
+            head_shoulders[29:] = (head > left) & (head > right) & (np.abs(left - right) / left < hs_tolerance)
+
+    return {
+        'Double Top': double_top,
+        'Double Bottom': double_bottom,
+        'Head and Shoulders': head_shoulders,
+    }
+
+
+def scan_patterns(closes):
+    """Return every detection in a close series as a DETECTION_DTYPE array ordered by bar"""
+    masks = scan_pattern_masks(closes)
+    parts = []
+    for code, (name, _, confidence) in enumerate(PATTERNS):
+        index = np.flatnonzero(masks[name])
+        part = np.empty(len(index), dtype=DETECTION_DTYPE)
+        part['index'] = index
+        part['pattern'] = code
+        part['confidence'] = confidence
+        parts.append(part)
+    detections = np.concatenate(parts)
+    return detections[np.argsort(detections['index'], kind='stable')]
+
+
+def pattern_signals(closes, double_tolerance=0.01, hs_tolerance=0.05, weights=None):
+    """Return PatternRecognition.get_trading_signal at every bar as +1 (Buy), -1 (Sell) or 0 (Hold).
+
+    ``weights`` maps pattern names to the confidence their vote carries,
+    overriding the ones in PATTERNS.
+    """
+    weights = weights or {}
+    masks = scan_pattern_masks(closes, double_tolerance, hs_tolerance)
+    n = len(masks['Double Top'])
+    buy = np.zeros(n)
+    sell = np.zeros(n)
+    # Add confidences in the same order get_trading_signal does so the float sums match
+    for name, signal, confidence in PATTERNS:
+        votes = buy if signal == 'Buy' else sell
+        votes += np.where(masks[name], weights.get(name, confidence), 0.0)
+    return np.sign(buy - sell).astype(np.int8)
+
+
 class PatternRecognition:
     def __init__(self, df):
         self.df = df
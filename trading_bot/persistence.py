@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from django.db import close_old_connections
+from .models import AnalysisResult, Subscription
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+
+class AnalysisRecorder:
+    """Background writer that stores analyses as AnalysisResult rows in batches.
+
+    ``record`` only appends to an in-memory buffer, so handlers and
+    broadcasts never wait on the database. A background task flushes the
+    buffer with one ``bulk_create`` per batch on a dedicated thread, which
+    keeps the ORM off the event loop and serializes writes to SQLite. If
+    the database falls behind, the oldest unwritten rows are dropped once
+    ``max_pending`` is reached. Since ``created_at`` is ``auto_now_add``, it
+    is the time a row was flushed, at most ``flush_interval`` after the
+    analysis.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=1.0, max_pending=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = deque(maxlen=max_pending)
+        self._wakeup = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analysis-writer')
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failed = 0
+        self.last_batch_ms = 0.0
+
+    def stats(self):
+        return {
+            'pending': len(self._pending),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'batches': self.batches,
+            'last_batch_ms': round(self.last_batch_ms, 1),
+        }
+
+    def start(self):
+        """Start the flush task on the running event loop"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write whatever is still pending and stop the flush task"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._pending:
+            await self._flush()
+        self._executor.shutdown(wait=True)
+
+    def record(self, symbol, timeframe, recommendation, patterns, price, rsi, macd, macd_signal):
+        """Queue one analysis for writing; never blocks"""
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append({
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'recommendation': recommendation,
+            'patterns': patterns[:255],
+            'price': price,
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal': macd_signal,
+        })
+        if self._wakeup is not None and len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._pending:
+                await self._flush()
+
+    async def _flush(self):
+        batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            await loop.run_in_executor(self._executor, self._write, batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Error saving {len(batch)} analysis results: {str(e)}")
+            return
+        self.written += len(batch)
+        self.batches += 1
+        self.last_batch_ms = (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _write(batch):
+        # The writer thread keeps its connection between batches; drop it if it went stale
+        close_old_connections()
+        AnalysisResult.objects.bulk_create([AnalysisResult(**row) for row in batch])
+
+
+class SubscriptionStore:
+    """Automatic-update subscriptions saved as Subscription rows.
+
+    Every bot process reads and writes the same rows, so a subscription
+    survives restarts and is seen by whichever process broadcasts its
+    symbol. Queries run on a dedicated thread, as in AnalysisRecorder.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='subscription-store')
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    async def save(self, chat_id, symbol, timeframe, interval):
+        """Subscribe a chat to a series, replacing its previous interval for that series"""
+        await self._run(self._save, chat_id, symbol, timeframe, interval)
+
+    async def delete(self, chat_id, symbol=None):
+        """Remove a chat's subscriptions, optionally only for one symbol"""
+        await self._run(self._delete, chat_id, symbol)
+
+    async def load(self):
+        """Return every subscription as (chat_id, symbol, timeframe, interval)"""
+        return await self._run(self._load)
+
+    @staticmethod
+    def _save(chat_id, symbol, timeframe, interval):
+        close_old_connections()
+        Subscription.objects.update_or_create(
+            chat_id=chat_id, symbol=symbol, timeframe=timeframe, defaults={'interval': interval}
+        )
+
+    @staticmethod
+    def _delete(chat_id, symbol):
+        close_old_connections()
+        rows = Subscription.objects.filter(chat_id=chat_id)
+        if symbol is not None:
+            rows = rows.filter(symbol=symbol)
+        rows.delete()
+
+    @staticmethod
+    def _load():
+        close_old_connections()
+        return list(Subscription.objects.values_list('chat_id', 'symbol', 'timeframe', 'interval'))
@@ -0,0 +1,62 @@
+import glob
+import os
+
+# Several bot processes can run side by side (see cluster.py), so every file
+# one of them publishes for the web app is its own, named after its pid, and
+# the readers combine the files of all of them.
+
+
+def process_path(path, pid=None):
+    """Return this process's (or ``pid``'s) variant of a shared file, e.g. data/signals.1234.json"""
+    root, ext = os.path.splitext(path)
+    return f'{root}.{os.getpid() if pid is None else pid}{ext}'
+
+
+def process_files(path):
+    """Return (pid, path) of every process's variant of a shared file"""
+    root, ext = os.path.splitext(path)
+    found = []
+    for name in glob.glob(f'{glob.escape(root)}.*{glob.escape(ext)}'):
+        pid = name[len(root) + 1:len(name) - len(ext)]
+        if pid.isdigit():
+            found.append((int(pid), name))
+    return sorted(found)
+
+
+def pid_alive(pid):
+    """Whether a process with this pid is running on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, but as another user
+        return True
+    return True
+
+
+def write_atomic(path, text):
+    """Replace ``path`` with ``text`` so readers never see a partial file.
+
+    The temporary file is named after the pid too, so two processes writing
+    the same path cannot clobber each other's half-written file.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp = f'{path}.{os.getpid()}.tmp'
+    with open(temp, 'w') as f:
+        f.write(text)
+    os.replace(temp, path)
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def prune_files(path):
+    """Remove the variants of a shared file left by processes that are no longer running"""
+    for pid, name in process_files(path):
+        if not pid_alive(pid):
+            remove_file(name)
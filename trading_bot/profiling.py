@@ -0,0 +1,211 @@
+import asyncio
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join('data', 'profiles'))
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', 120))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.01))
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 20))
+
+MODES = ('sample', 'cprofile')
+EXTENSIONS = {'sample': '.collapsed', 'cprofile': '.pstats'}
+REQUEST_FILE = 'request.json'
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a capture is requested while another one is running"""
+
+
+def list_artifacts(directory=PROFILE_DIR):
+    """Return (name, size, modified) for every saved capture, newest first"""
+    try:
+        entries = [entry for entry in os.scandir(directory)
+                   if entry.is_file() and os.path.splitext(entry.name)[1] in EXTENSIONS.values()]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    return [(entry.name, entry.stat().st_size, entry.stat().st_mtime) for entry in entries]
+
+
+def request_capture(seconds, mode='sample', directory=PROFILE_DIR):
+    """Ask the bot process, which polls ``directory``, to start a capture"""
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode {mode!r}")
+    os.makedirs(directory, exist_ok=True)
+    temp = os.path.join(directory, f'{REQUEST_FILE}.tmp')
+    with open(temp, 'w') as f:
+        json.dump({'seconds': float(seconds), 'mode': mode, 'requested_at': time.time()}, f)
+    os.replace(temp, os.path.join(directory, REQUEST_FILE))
+
+
+class StackSampler:
+    """Samples the stack of every other thread at a fixed interval from a background thread.
+
+    Stacks are counted in the collapsed format ("thread;outer;...;inner
+    count" per line) read by flamegraph.pl and speedscope. Sampling never
+    runs code in the profiled threads, so the cost is one walk of each
+    stack per interval.
+    """
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.counts[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class Capture:
+    """One profiling run; ``path`` is set once its artifact is written"""
+
+    def __init__(self, mode, label):
+        self.mode = mode
+        self.label = label
+        self.path = None
+        self.seconds = 0.0
+
+
+class Profiler:
+    """Bounded, one-at-a-time profiling of the bot process.
+
+    ``sample`` mode walks thread stacks every ``interval`` seconds and
+    writes collapsed stacks; its overhead is low enough for a live bot.
+    ``cprofile`` mode traces every call on the event loop thread and writes
+    a pstats file; it is exact but slows the bot while it runs, so it is
+    meant for short windows such as a single command. Captures are capped
+    at ``max_seconds`` and only the newest ``keep`` artifacts are kept.
+    The web app, in another process, requests captures through a file
+    that ``watch`` polls for.
+    """
+
+    def __init__(self, directory=PROFILE_DIR, max_seconds=PROFILE_MAX_SECONDS,
+                 interval=PROFILE_SAMPLE_INTERVAL, keep=PROFILE_KEEP):
+        self.directory = directory
+        self.max_seconds = max_seconds
+        self.interval = interval
+        self.keep = keep
+        self._current = None
+        self._watcher = None
+
+    @property
+    def busy(self):
+        return self._current is not None
+
+    @asynccontextmanager
+    async def capture(self, mode='sample', label='window'):
+        """Profile the body of the ``async with`` block and save the result"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}")
+        if self.busy:
+            raise ProfilerBusy(f"A {self._current.mode} capture is already running")
+        capture = self._current = Capture(mode, label)
+        if mode == 'sample':
+            profiler = StackSampler(self.interval)
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        started = time.perf_counter()
+        try:
+            yield capture
+        finally:
+            if mode == 'sample':
+                profiler.stop()
+            else:
+                profiler.disable()
+            capture.seconds = time.perf_counter() - started
+            self._current = None
+            try:
+                capture.path = self._save(profiler, mode, label)
+            except OSError as e:
+                logger.error(f"Error saving {mode} profile: {str(e)}")
+
+    async def profile_for(self, seconds, mode='sample'):
+        """Profile whatever the bot does for ``seconds`` (capped at max_seconds)"""
+        seconds = max(0.1, min(float(seconds), self.max_seconds))
+        async with self.capture(mode, f'{seconds:g}s') as capture:
+            await asyncio.sleep(seconds)
+        return capture
+
+    def _save(self, profiler, mode, label):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}{EXTENSIONS[mode]}"
+        path = os.path.join(self.directory, name)
+        if mode == 'sample':
+            profiler.write(path)
+        else:
+            profiler.dump_stats(path)
+        for stale, _, _ in list_artifacts(self.directory)[self.keep:]:
+            os.remove(os.path.join(self.directory, stale))
+        logger.info(f"Saved {mode} profile {path}")
+        return path
+
+    def watch(self, poll_interval=1.0):
+        """Start polling for captures requested by the web app"""
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch(poll_interval))
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+
+    async def _watch(self, poll_interval):
+        path = os.path.join(self.directory, REQUEST_FILE)
+        while True:
+            await asyncio.sleep(poll_interval)
+            try:
+                with open(path) as f:
+                    request = json.load(f)
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading profiling request: {str(e)}")
+                continue
+            try:
+                await self.profile_for(request.get('seconds', 10), request.get('mode', 'sample'))
+            except (ProfilerBusy, ValueError) as e:
+                logger.warning(f"Ignoring profiling request: {str(e)}")
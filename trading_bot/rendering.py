@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .metrics import metrics
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+CHART_COLUMNS = ('close', 'SMA_5', 'SMA_10', 'RSI', 'MACD', 'MACD_signal')
+
+
+def render_chart(index, columns, symbol):
+    """Draw the price/SMA, RSI and MACD chart and return it as PNG bytes.
+
+    Runs in a worker process, so it only takes plain arrays and builds its
+    own Figure instead of touching pyplot's global state.
+    """
+    # Imported on first use so the bot process itself never loads matplotlib
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(12, 10))
+    axs = fig.subplots(3, 1, sharex=True)
+
+    # Price + SMA
+    axs[0].plot(index, columns['close'], label='Close', color='blue')
+    axs[0].plot(index, columns['SMA_5'], label='SMA 5', color='orange')
+    axs[0].plot(index, columns['SMA_10'], label='SMA 10', color='green')
+    axs[0].set_title(f'{symbol} Price & SMA')
+    axs[0].legend()
+
+    # RSI
+    axs[1].plot(index, columns['RSI'], label='RSI', color='purple')
+    axs[1].axhline(70, color='red', linestyle='--', linewidth=1)
+    axs[1].axhline(30, color='green', linestyle='--', linewidth=1)
+    axs[1].set_title('RSI')
+    axs[1].legend()
+
+    # MACD
+    axs[2].plot(index, columns['MACD'], label='MACD', color='black')
+    axs[2].plot(index, columns['MACD_signal'], label='Signal Line', color='magenta')
+    axs[2].set_title('MACD')
+    axs[2].legend()
+
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+def _warm_up():
+    # Drawing once imports matplotlib in the worker and warms its font caches
+    render_chart([0, 1], {column: [0.0, 1.0] for column in CHART_COLUMNS}, '')
+
+
+def chart_inputs(df):
+    """Extract the arrays render_chart needs from an analyzed DataFrame"""
+    return df.index.values, {column: df[column].values for column in CHART_COLUMNS}
+
+
+def chart_key(index, columns, symbol):
+    """Content address of a chart: a digest of everything render_chart draws"""
+    digest = hashlib.blake2b(symbol.encode(), digest_size=16)
+    digest.update(index.tobytes())
+    for column in CHART_COLUMNS:
+        digest.update(columns[column].tobytes())
+    return digest.hexdigest()
+
+
+class RenderedChart:
+    """A rendered chart and, once it has been sent, its Telegram file_id"""
+
+    def __init__(self, key, png):
+        self.key = key
+        self.png = png
+        self.file_id = None
+
+    @property
+    def photo(self):
+        """What to pass as ``photo`` to Telegram: the uploaded file_id if known, else the PNG"""
+        return self.file_id or self.png
+
+
+class ChartRenderer:
+    """Renders charts in a process pool so matplotlib never blocks the event loop.
+
+    Every render gets its own in-memory PNG, so concurrent requests cannot
+    overwrite each other's images. Rendered charts are cached by content in
+    an LRU capped at ``cache_bytes``, identical concurrent renders share one
+    job, and the Telegram file_id of the first upload is kept with the chart
+    so later sends reference it instead of uploading the bytes again.
+    Render latency and queue depth are kept for status reporting.
+    """
+
+    def __init__(self, workers=2, cache_bytes=32 * 1024 * 1024):
+        self.workers = max(1, workers)
+        self.cache_bytes = cache_bytes
+        self._executor = None
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self._in_flight = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.queue_depth = 0
+        self.rendered = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            # spawn keeps the bot's event loop, sockets and threads out of the workers
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def warm_up(self):
+        """Start the worker processes and import matplotlib in them ahead of the first request"""
+        executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(_warm_up)
+
+    def stats(self):
+        """Return render latency and queue depth counters"""
+        return {
+            'queue_depth': self.queue_depth,
+            'rendered': self.rendered,
+            'failed': self.failed,
+            'last_ms': round(self.last_seconds * 1000, 1),
+            'avg_ms': round(self.total_seconds / self.rendered * 1000, 1) if self.rendered else 0.0,
+            'max_ms': round(self.max_seconds * 1000, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_entries': len(self._cache),
+            'cache_bytes': self._cached_bytes,
+        }
+
+    def remember_upload(self, chart, message):
+        """Keep the file_id Telegram assigned to a chart the first time it was sent"""
+        if chart.file_id is None and message is not None and message.photo:
+            chart.file_id = message.photo[-1].file_id
+
+    def _store(self, chart):
+        self._cache[chart.key] = chart
+        self._cached_bytes += len(chart.png)
+        while self._cached_bytes > self.cache_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted.png)
+
+    async def render(self, df, symbol):
+        """Return the RenderedChart for an analyzed DataFrame, or None if rendering failed"""
+        with metrics.span('chart'):
+            index, columns = chart_inputs(df)
+            key = chart_key(index, columns, symbol)
+
+            chart = self._cache.get(key)
+            if chart is not None:
+                self.cache_hits += 1
+                self._cache.move_to_end(key)
+                return chart
+
+            task = self._in_flight.get(key)
+            if task is None:
+                self.cache_misses += 1
+                task = asyncio.ensure_future(self._render(key, index, columns, symbol))
+                self._in_flight[key] = task
+                task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            return await asyncio.shield(task)
+
+    async def _render(self, key, index, columns, symbol):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        self.queue_depth += 1
+        try:
+            png = await loop.run_in_executor(self._get_executor(), render_chart, index, columns, symbol)
+        except BrokenProcessPool as e:
+            # A crashed worker poisons the whole pool; start a fresh one next time
+            self._executor = None
+            self.failed += 1
+            logger.error(f"Chart render pool broke: {str(e)}")
+            return None
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error in chart plotting: {str(e)}")
+            return None
+        finally:
+            self.queue_depth -= 1
+
+        elapsed = time.perf_counter() - started
+        self.rendered += 1
+        self.total_seconds += elapsed
+        self.last_seconds = elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+        logger.debug(f"Rendered {symbol} chart in {elapsed * 1000:.0f} ms ({self.queue_depth} queued)")
+        chart = RenderedChart(key, png)
+        self._store(chart)
+        return chart
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from .metrics import metrics
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+
+class MarketScanner:
+    """Runs an analysis over many (symbol, timeframe) series, at most ``concurrency`` at a time.
+
+    ``analyze(symbol, timeframe)`` is awaited once per series. The limit is
+    shared by every scan in progress, so two users scanning at once do not
+    double the load on Deriv, and a scan takes about ``len(series) /
+    concurrency`` analyses' time rather than one per series. ``timeout``
+    only starts once a series has a slot, so waiting for one never fails it.
+    """
+
+    def __init__(self, analyze, concurrency=8, timeout=20):
+        self._analyze = analyze
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._slots = None
+        self.in_flight = 0
+
+    async def _run(self, symbol, timeframe):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        async with self._slots:
+            metrics.label(symbol=symbol, timeframe=timeframe)
+            self.in_flight += 1
+            try:
+                return symbol, timeframe, await asyncio.wait_for(self._analyze(symbol, timeframe), self.timeout)
+            except Exception as e:
+                logger.error(f"Error scanning {symbol} {timeframe}: {e!r}")
+                return symbol, timeframe, None
+            finally:
+                self.in_flight -= 1
+
+    async def scan(self, series):
+        """Yield (symbol, timeframe, result) for every series as soon as it is ready.
+
+        ``result`` is None for a series that failed or timed out. Series that
+        have not finished are cancelled if the caller stops iterating early.
+        """
+        tasks = [asyncio.create_task(self._run(symbol, timeframe)) for symbol, timeframe in series]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
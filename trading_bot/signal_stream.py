@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+from .snapshot import SnapshotReader
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+STREAM_POLL_INTERVAL = float(os.getenv('STREAM_POLL_INTERVAL', 0.1))
+STREAM_CLIENT_BUFFER = int(os.getenv('STREAM_CLIENT_BUFFER', 64))
+STREAM_HEARTBEAT = float(os.getenv('STREAM_HEARTBEAT', 15))
+
+
+class Subscriber:
+    """One connected client: a bounded queue of pending events and optional symbol/timeframe filters"""
+
+    def __init__(self, symbols, timeframes, buffer):
+        self.symbols = set(symbols or ())
+        self.timeframes = set(timeframes or ())
+        self.queue = asyncio.Queue(maxsize=buffer)
+        self.dropped = False
+
+    def wants(self, key):
+        symbol, _, timeframe = key.partition('/')
+        return ((not self.symbols or symbol in self.symbols)
+                and (not self.timeframes or timeframe in self.timeframes))
+
+    def offer(self, event):
+        """Queue an event; a client whose buffer is full is marked as dropped"""
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped = True
+            # Make room for the marker so the stream wakes up and closes
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class SignalHub:
+    """Fans signal updates out to Server-Sent Events clients in one ASGI process.
+
+    A single watcher task polls the bot's snapshot file while anyone is
+    subscribed and turns every series whose ETag changed into an event, so
+    idle clients cost one queue each and no work of their own. Each client
+    has a bounded buffer; one that falls behind is disconnected instead of
+    holding up the others or growing without bound.
+    """
+
+    def __init__(self, reader=None, poll_interval=STREAM_POLL_INTERVAL, buffer=STREAM_CLIENT_BUFFER,
+                 heartbeat=STREAM_HEARTBEAT):
+        self.reader = reader or SnapshotReader()
+        self.poll_interval = poll_interval
+        self.buffer = buffer
+        self.heartbeat = heartbeat
+        self._subscribers = set()
+        self._etags = {}
+        self._watcher = None
+        self.events_sent = 0
+        self.dropped = 0
+
+    def stats(self):
+        return {
+            'subscribers': len(self._subscribers),
+            'events_sent': self.events_sent,
+            'dropped': self.dropped,
+        }
+
+    def subscribe(self, symbols=None, timeframes=None):
+        """Register a client for every series, or only the given symbols and/or timeframes"""
+        signals = self.reader.signals()
+        # Room for the initial state on top of the buffer for updates
+        subscriber = Subscriber(symbols, timeframes, self.buffer + len(signals))
+        if not self._subscribers:
+            self._etags = {key: cached.etag for key, cached in signals.items()}
+        # Start every client off with the current state of its series
+        for key, cached in signals.items():
+            if subscriber.wants(key):
+                subscriber.offer(self._event(cached))
+        self._subscribers.add(subscriber)
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+
+    @staticmethod
+    def _event(cached):
+        return b'event: signal\nid: ' + cached.etag.encode() + b'\ndata: ' + cached.body + b'\n\n'
+
+    def publish_changes(self):
+        """Send an event for every series that changed since the last check"""
+        signals = self.reader.signals()
+        for key, cached in signals.items():
+            if self._etags.get(key) == cached.etag:
+                continue
+            self._etags[key] = cached.etag
+            event = self._event(cached)
+            for subscriber in list(self._subscribers):
+                if subscriber.wants(key):
+                    subscriber.offer(event)
+                    if subscriber.dropped:
+                        self.dropped += 1
+                        self._subscribers.discard(subscriber)
+
+    async def _watch(self):
+        # Runs only while clients are connected
+        while self._subscribers:
+            try:
+                self.publish_changes()
+            except Exception as e:
+                logger.error(f"Error publishing signal updates: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def events(self, subscriber):
+        """Yield the SSE byte stream for a subscriber until it disconnects or is dropped"""
+        try:
+            yield b'retry: 3000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing an idle connection
+                    yield b': keep-alive\n\n'
+                    continue
+                if event is None:
+                    yield b'event: dropped\ndata: {"reason": "client too slow"}\n\n'
+                    return
+                self.events_sent += 1
+                yield event
+        finally:
+            self.unsubscribe(subscriber)
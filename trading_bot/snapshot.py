@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from .process_files import pid_alive, process_files, process_path, prune_files, remove_file, write_atomic
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+SIGNALS_SNAPSHOT_FILE = os.getenv('SIGNALS_SNAPSHOT_FILE', os.path.join('data', 'signals.json'))
+
+
+class SnapshotPublisher:
+    """Bot-side holder of the latest signal per (symbol, timeframe), published as a JSON file.
+
+    Each bot process publishes its own variant of ``path``. Updates are
+    coalesced: the file is rewritten at most once per ``delay`` seconds,
+    written to a temporary file and moved into place, so readers in other
+    processes always see a complete snapshot.
+    """
+
+    def __init__(self, path=SIGNALS_SNAPSHOT_FILE, delay=0.1):
+        self.path = path
+        self.delay = delay
+        self._signals = {}
+        self._scheduled = None
+        self.published = 0
+
+    def update(self, symbol, timeframe, recommendation, patterns, price, rsi, macd, macd_signal):
+        self._signals[f'{symbol}/{timeframe}'] = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'recommendation': recommendation,
+            'patterns': patterns,
+            'price': price,
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'updated_at': time.time(),
+        }
+        if self._scheduled is None:
+            self._scheduled = asyncio.get_running_loop().call_later(self.delay, self.write)
+
+    def write(self):
+        self._scheduled = None
+        try:
+            if not self.published:
+                # Snapshots of processes that crashed would otherwise pile up across restarts
+                prune_files(self.path)
+            write_atomic(process_path(self.path), json.dumps({'generated_at': time.time(), 'signals': self._signals}))
+            self.published += 1
+        except OSError as e:
+            logger.error(f"Error publishing signals snapshot: {str(e)}")
+
+
+    def close(self):
+        """Withdraw this process's snapshot on shutdown"""
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+        remove_file(process_path(self.path))
+
+
+class CachedSignal:
+    """A pre-serialized response body with its validators"""
+
+    def __init__(self, body, modified):
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.last_modified = datetime.fromtimestamp(int(modified), tz=timezone.utc)
+
+
+class SnapshotReader:
+    """Web-side view of the snapshot files of every bot process, re-parsed only when one changes.
+
+    Where two processes published the same series, the newer signal wins;
+    files of processes that are no longer running are ignored. Every response body and ETag is built once per
+    change, so a request costs a directory listing, a ``stat`` per bot
+    process and a dictionary lookup.
+    """
+
+    def __init__(self, path=SIGNALS_SNAPSHOT_FILE):
+        self.path = path
+        self._stamp = None
+        self._latest = None
+        self._signals = {}
+
+    def _refresh(self):
+        stamp = []
+        for pid, path in process_files(self.path):
+            if not pid_alive(pid):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stamp.append((path, stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        if not stamp:
+            self._stamp, self._latest, self._signals = None, None, {}
+            return
+        if stamp == self._stamp:
+            return
+
+        generated_at = None
+        signals = {}
+        for path, *_ in stamp:
+            try:
+                with open(path, 'rb') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading signals snapshot: {str(e)}")
+                return
+            generated_at = max(generated_at or 0, snapshot.get('generated_at') or 0)
+            for key, signal in snapshot.get('signals', {}).items():
+                if key not in signals or signal['updated_at'] > signals[key]['updated_at']:
+                    signals[key] = signal
+
+        self._signals = {
+            key: CachedSignal(json.dumps(signal).encode(), signal['updated_at'])
+            for key, signal in signals.items()
+        }
+        latest = {'generated_at': generated_at, 'signals': list(signals.values())}
+        self._latest = CachedSignal(json.dumps(latest).encode(), generated_at or 0)
+        self._stamp = stamp
+
+    def latest(self):
+        """Return the CachedSignal listing every series, or None if the bot has not published yet"""
+        self._refresh()
+        return self._latest
+
+    def get(self, symbol, timeframe):
+        self._refresh()
+        return self._signals.get(f'{symbol}/{timeframe}')
+
+    def signals(self):
+        """Return every series' CachedSignal keyed by 'symbol/timeframe'"""
+        self._refresh()
+        return self._signals
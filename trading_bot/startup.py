@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+import time
+from .process_files import pid_alive, process_files, process_path, prune_files, remove_file, write_atomic
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+# One per bot process, named after its pid, see process_files.py
+HEARTBEAT_FILE = 'bot_heartbeat.txt'
+
+
+class StartupTimer:
+    """Wall-clock breakdown of the bot's startup, one entry per phase.
+
+    ``launched_at`` is the epoch at which a supervisor such as run.py
+    started the process; if given, the time until the timer was created
+    (interpreter start and Django setup) is reported as the ``launch`` phase.
+    """
+
+    def __init__(self, launched_at=None):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases = {}
+        if launched_at:
+            self.phases['launch'] = max(0.0, time.time() - float(launched_at))
+
+    def mark(self, phase):
+        """Close the phase that ends now"""
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+
+    @property
+    def total(self):
+        return sum(self.phases.values())
+
+    def summary(self):
+        return ', '.join(f'{phase} {seconds:.2f}s' for phase, seconds in self.phases.items())
+
+
+def write_heartbeat(timer):
+    """Mark this bot process as ready to serve updates, with its startup breakdown"""
+    try:
+        prune_files(HEARTBEAT_FILE)
+        write_atomic(process_path(HEARTBEAT_FILE), json.dumps({
+            'status': 'running',
+            'pid': os.getpid(),
+            'ready_at': time.time(),
+            'startup_seconds': round(timer.total, 3),
+            'phases': {phase: round(seconds, 3) for phase, seconds in timer.phases.items()},
+        }))
+    except OSError as e:
+        logger.error(f"Error writing heartbeat: {str(e)}")
+
+
+def read_heartbeats():
+    """Return the heartbeats of every running bot process, oldest first.
+
+    The heartbeat of a process that died without removing it is ignored.
+    """
+    heartbeats = []
+    for pid, path in process_files(HEARTBEAT_FILE):
+        if not pid_alive(pid):
+            continue
+        try:
+            with open(path) as f:
+                heartbeats.append(json.load(f))
+        except (OSError, ValueError):
+            # Removed as the process stopped
+            continue
+    return sorted(heartbeats, key=lambda heartbeat: heartbeat.get('ready_at', 0))
+
+
+def clear_heartbeat():
+    """Remove this process's heartbeat; the other bot processes keep theirs"""
+    remove_file(process_path(HEARTBEAT_FILE))
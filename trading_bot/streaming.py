@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import numpy as np
+from .candle_store import candles_to_rows
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+
+def ohlc_to_rows(ohlc):
+    """Convert a Deriv ``ohlc`` stream update into a (5, 1) block ordered like FIELDS"""
+    return np.array([
+        [float(ohlc['open_time'])],
+        [float(ohlc['open'])],
+        [float(ohlc['high'])],
+        [float(ohlc['low'])],
+        [float(ohlc['close'])],
+    ])
+
+
+class CandleStream:
+    """Keeps CandleStore buffers current from Deriv candle subscriptions.
+
+    Each streamed (symbol, granularity) is seeded from the subscription's
+    history response and then updated on every ``ohlc`` message. When an
+    update opens a new bar the previous one is published as closed, both to
+    registered listeners and to coroutines blocked in ``wait_for_close``.
+    """
+
+    def __init__(self, pool, store, history_count=100, idle_timeout=60, max_backoff=60):
+        self._pool = pool
+        self._store = store
+        self.history_count = history_count
+        self.idle_timeout = idle_timeout
+        self.max_backoff = max_backoff
+        self._tasks = {}
+        self._listeners = []
+        self._waiters = {}
+        self.closed_candles = 0
+
+    @property
+    def running(self):
+        return any(not task.done() for task in self._tasks.values())
+
+    def is_streaming(self, symbol, granularity):
+        task = self._tasks.get((symbol, granularity))
+        return task is not None and not task.done()
+
+    def add_listener(self, callback):
+        """Register ``async callback(symbol, granularity, epoch)`` for every closed candle"""
+        self._listeners.append(callback)
+
+    def start(self, symbol, granularity):
+        """Start streaming a (symbol, granularity) pair if it is not streamed already"""
+        if not self.is_streaming(symbol, granularity):
+            self._tasks[(symbol, granularity)] = asyncio.create_task(self._run(symbol, granularity))
+
+    async def stop(self):
+        """Cancel every stream and mark their buffers as no longer live"""
+        for (symbol, granularity), task in self._tasks.items():
+            task.cancel()
+            self._store.set_live(symbol, granularity, False)
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def wait_for_close(self, symbol, granularity):
+        """Wait until the current candle closes and return its open epoch"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault((symbol, granularity), []).append(future)
+        return await future
+
+    async def _run(self, symbol, granularity):
+        request = {
+            "ticks_history": symbol,
+            "adjust_start_time": 1,
+            "count": self.history_count,
+            "end": "latest",
+            "granularity": granularity,
+            "style": "candles"
+        }
+        delay = 1
+        while True:
+            queue = asyncio.Queue()
+            subscription = None
+            try:
+                source = await self._pool.subscribe(request)
+                subscription = source.subscribe(
+                    on_next=queue.put_nowait,
+                    on_error=queue.put_nowait,
+                    on_completed=lambda: queue.put_nowait(None)
+                )
+                while True:
+                    # A socket that dropped silently shows up as a stream with no updates
+                    message = await asyncio.wait_for(queue.get(), self.idle_timeout)
+                    if message is None:
+                        raise ConnectionError("stream completed")
+                    if isinstance(message, Exception):
+                        raise message
+                    self._handle(symbol, granularity, message)
+                    delay = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._store.set_live(symbol, granularity, False)
+                logger.warning(f"{symbol} {granularity}s stream interrupted ({e!r}), resubscribing in {delay}s")
+            finally:
+                if subscription is not None:
+                    subscription.dispose()
+            # Only reached after a failure; the old subscription is already gone while backing off
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+
+    def _handle(self, symbol, granularity, message):
+        buffer = self._store.buffer(symbol, granularity)
+
+        if 'candles' in message:
+            rows = candles_to_rows(message['candles'])
+            # Start over if the history does not connect to what is already stored
+            if buffer.last_epoch is None or (rows.shape[1] and rows[0, 0] > buffer.last_epoch):
+                buffer.clear()
+            buffer.upsert(rows)
+            self._store.set_live(symbol, granularity)
+            logger.info(f"Streaming {symbol} {granularity}s candles")
+            return
+
+        ohlc = message.get('ohlc')
+        if not ohlc:
+            return
+        last = buffer.last_epoch
+        buffer.upsert(ohlc_to_rows(ohlc))
+        if last is not None and int(ohlc['open_time']) > last:
+            self._publish(symbol, granularity, last)
+
+    def _publish(self, symbol, granularity, epoch):
+        self.closed_candles += 1
+        for future in self._waiters.pop((symbol, granularity), []):
+            if not future.done():
+                future.set_result(epoch)
+        for callback in self._listeners:
+            asyncio.create_task(self._notify(callback, symbol, granularity, epoch))
+
+    async def _notify(self, callback, symbol, granularity, epoch):
+        try:
+            await callback(symbol, granularity, epoch)
+        except Exception as e:
+            logger.error(f"Error in candle close listener: {str(e)}")
@@ -0,0 +1,228 @@
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+from .backtest import DEFAULT_PARAMS, signal_series, simulate
+
+# Get logger
+logger = logging.getLogger('trading_bot')
+
+# Closes of every series, attached once per worker process
+_worker_closes = None
+_worker_memory = None
+
+
+def parameter_grid(space):
+    """Every combination of a {name: [values]} space, as parameter dicts"""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_parameters(space, count, seed=None):
+    """Draw ``count`` parameter dicts from a space of value lists or {'min': low, 'max': high} ranges.
+
+    A range of two ints draws ints, any other range draws floats.
+    """
+    rng = random.Random(seed)
+    draws = []
+    for _ in range(count):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, dict):
+                low, high = values['min'], values['max']
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(values)
+        draws.append(params)
+    return draws
+
+
+def series_fingerprint(closes):
+    """Hash of a close array, so a resumed sweep does not reuse results from other candles"""
+    return hashlib.blake2b(np.ascontiguousarray(closes, dtype=np.float64).tobytes(), digest_size=12).hexdigest()
+
+
+def evaluation_key(symbol, timeframe, params, fee=0.0, allow_short=True, fingerprint=''):
+    """Stable id of one evaluation, used to resume a sweep.
+
+    Covers everything the result depends on: the series and the
+    fingerprint of its closes, the parameters, the fee and whether shorts
+    are allowed.
+    """
+    payload = json.dumps([symbol, timeframe, fingerprint, {**DEFAULT_PARAMS, **params}, fee, allow_short],
+                         sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+def series_file(results_file):
+    """Where the candles a sweep ran on are kept, next to its results"""
+    return f'{os.path.splitext(results_file)[0]}.series.npz'
+
+
+def save_series(path, series):
+    """Save {(symbol, timeframe): closes} so a resumed sweep runs on the same candles"""
+    np.savez(path, **{f'{symbol}:{timeframe}': closes for (symbol, timeframe), closes in series.items()})
+
+
+def load_series(path):
+    if not os.path.exists(path):
+        return {}
+    with np.load(path) as data:
+        return {tuple(name.split(':', 1)): data[name] for name in data.files}
+
+
+def _attach(name, length):
+    global _worker_closes, _worker_memory
+    # Keep a reference so the mapping stays open for the life of the worker
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    _worker_closes = np.ndarray((length,), dtype=np.float64, buffer=_worker_memory.buf)
+
+
+def _evaluate(tasks, fee, allow_short):
+    """Backtest a batch of (key, start, stop, params) tasks against the shared closes"""
+    results = []
+    for key, start, stop, params in tasks:
+        closes = _worker_closes[start:stop]
+        try:
+            summary = simulate(closes, signal_series(closes, **params), fee, allow_short).summary()
+        except Exception as e:
+            summary = {'error': repr(e)}
+        results.append((key, summary))
+    return results
+
+
+def completed_keys(results_file):
+    """Keys of the evaluations already written to a results file"""
+    keys = set()
+    if not os.path.exists(results_file):
+        return keys
+    with open(results_file) as f:
+        for line in f:
+            try:
+                keys.add(json.loads(line)['key'])
+            except (ValueError, KeyError):
+                # A line cut short by an interrupted run is evaluated again
+                continue
+    return keys
+
+
+class SweepRunner:
+    """Backtests parameter sets across many candle series on every core.
+
+    The close arrays of all series are packed into one shared memory block
+    that each worker process maps once, so tasks only carry offsets and
+    parameters. Every finished evaluation is appended as a JSON line to
+    ``results_file``; running the same sweep again on the same candles,
+    fee and shorting rule skips the evaluations that are already there.
+    """
+
+    def __init__(self, series, results_file, workers=None, batch_size=8, fee=0.0, allow_short=True):
+        # series maps (symbol, timeframe) to a close array
+        self.series = series
+        self.results_file = results_file
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.fee = fee
+        self.allow_short = allow_short
+        self.evaluated = 0
+        self.skipped = 0
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self):
+        """Evaluations per second in the last run"""
+        return self.evaluated / self.elapsed if self.elapsed else 0.0
+
+    def _tasks(self, parameter_sets, offsets, done):
+        tasks = []
+        for (symbol, timeframe), (start, stop) in offsets.items():
+            fingerprint = series_fingerprint(self.series[(symbol, timeframe)])
+            for params in parameter_sets:
+                key = evaluation_key(symbol, timeframe, params, self.fee, self.allow_short, fingerprint)
+                if key in done:
+                    self.skipped += 1
+                    continue
+                tasks.append((key, start, stop, params, symbol, timeframe))
+        return tasks
+
+    def run(self, parameter_sets):
+        """Evaluate every parameter set on every series and return the number of new evaluations"""
+        done = completed_keys(self.results_file)
+        offsets = {}
+        position = 0
+        for name, closes in self.series.items():
+            offsets[name] = (position, position + len(closes))
+            position += len(closes)
+
+        self.evaluated = 0
+        self.skipped = 0
+        tasks = self._tasks(parameter_sets, offsets, done)
+        if not tasks:
+            logger.info(f"Sweep already complete ({self.skipped} evaluations in {self.results_file})")
+            return 0
+
+        memory = shared_memory.SharedMemory(create=True, size=max(position, 1) * 8)
+        started = time.perf_counter()
+        executor = None
+        try:
+            closes = np.ndarray((position,), dtype=np.float64, buffer=memory.buf)
+            for name, (start, stop) in offsets.items():
+                closes[start:stop] = self.series[name]
+
+            labels = {task[0]: task[3:] for task in tasks}
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_attach,
+                initargs=(memory.name, position)
+            )
+            with open(self.results_file, 'a+') as out:
+                # Start on a fresh line if an interrupted run left a partial one
+                if out.tell():
+                    out.seek(out.tell() - 1)
+                    if out.read(1) != '\n':
+                        out.write('\n')
+                batches = [[task[:4] for task in tasks[i:i + self.batch_size]]
+                           for i in range(0, len(tasks), self.batch_size)]
+                futures = [executor.submit(_evaluate, batch, self.fee, self.allow_short) for batch in batches]
+                for future in as_completed(futures):
+                    for key, summary in future.result():
+                        params, symbol, timeframe = labels[key]
+                        record = {'key': key, 'symbol': symbol, 'timeframe': timeframe,
+                                  'params': {**DEFAULT_PARAMS, **params}, **summary}
+                        out.write(json.dumps(record) + '\n')
+                        self.evaluated += 1
+                    # Flush per batch so an interrupted sweep resumes from here
+                    out.flush()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+            self.elapsed = time.perf_counter() - started
+            memory.close()
+            memory.unlink()
+
+        logger.info(f"Sweep evaluated {self.evaluated} parameter sets ({self.skipped} already done) "
+                    f"in {self.elapsed:.1f}s, {self.throughput:.1f} evaluations/s")
+        return self.evaluated
+
+
+def load_results(results_file):
+    """Read a results file into a list of records, best total return first"""
+    records = []
+    with open(results_file) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return sorted((r for r in records if 'error' not in r), key=lambda r: r['total_return'], reverse=True)
@@ -1,3 +1,892 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from telegram.error import RetryAfter
+import numpy as np
+import pandas as pd
+import ta
+from django.conf import settings
 from django.test import TestCase
+from django.utils import timezone
+from .backtest import BUY, HOLD, SELL, simulate
+from .bot import SCAN_TOP, format_scan, signal_strength
+from .broadcast import SubscriptionRegistry
+from .candle_cache import CandleCache, next_candle_boundary
+from .candle_store import CandleBuffer, CandleStore
+from .cluster import LeaderLease, partition_of
+from .connection import DerivConnectionPool
+from .delivery import BROADCAST, DeliveryQueue
+from .history import CandleHistory
+from .indicators import IndicatorEngine
+from .kernels import SIGNAL_NAMES, analyze_matrix
+from .metrics import Metrics, read_metrics
+from .models import AnalysisResult, Lease
+from .persistence import AnalysisRecorder
+from .pattern_recognition import PATTERNS, PatternRecognition, pattern_signals, scan_pattern_masks, scan_patterns
+from .process_files import process_path
+from .scanner import MarketScanner
+from .snapshot import SnapshotPublisher, SnapshotReader
+from .streaming import CandleStream
+from .sweep import evaluation_key, load_series, random_parameters, save_series, series_file, series_fingerprint
 
-# Create your tests here.
+
+class FakeClock:
+    def __init__(self):
+        self.now = timezone.now()
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+class LeaderLeaseTests(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.first = LeaderLease('poller', 'first', ttl=30, clock=self.clock)
+        self.second = LeaderLease('poller', 'second', ttl=30, clock=self.clock)
+
+    def test_only_one_holder(self):
+        self.assertTrue(self.first.acquire())
+        self.assertFalse(self.second.acquire())
+        self.assertEqual(Lease.objects.get(name='poller').holder, 'first')
+
+    def test_holder_renews(self):
+        self.assertTrue(self.first.acquire())
+        self.clock.advance(20)
+        self.assertTrue(self.first.acquire())
+        # Renewed at 20s, so it is still held at 40s
+        self.clock.advance(20)
+        self.assertFalse(self.second.acquire())
+
+    def test_expired_lease_is_taken_over(self):
+        self.assertTrue(self.first.acquire())
+        self.clock.advance(31)
+        self.assertTrue(self.second.acquire())
+        # The old holder finds out on its next renewal and has to step down
+        self.assertFalse(self.first.acquire())
+
+    def test_release_frees_lease(self):
+        self.assertTrue(self.first.acquire())
+        self.second.release()
+        self.assertFalse(self.second.acquire())
+        self.first.release()
+        self.assertTrue(self.second.acquire())
+
+    def test_leases_are_independent(self):
+        self.assertTrue(self.first.acquire())
+        self.assertTrue(LeaderLease('partition-0', 'second', clock=self.clock).acquire())
+
+
+class PartitionTests(TestCase):
+    def test_partition_is_stable(self):
+        # crc32, not the per-process salted hash(), so every process agrees
+        self.assertEqual(partition_of('R_75', 4), partition_of('R_75', 4))
+        self.assertEqual(partition_of('R_75', 1), 0)
+        symbols = ['R_10', 'R_25', 'R_50', 'R_75', 'R_100', 'BOOM500', 'BOOM1000', 'CRASH500', 'CRASH1000']
+        self.assertTrue(all(0 <= partition_of(symbol, 3) < 3 for symbol in symbols))
+
+
+class SubscriptionRegistrySyncTests(TestCase):
+    def test_sync_reports_changes(self):
+        registry = SubscriptionRegistry()
+        created, joined, emptied = registry.sync([(1, 'R_75', '1h', 900), (2, 'R_75', '1h', 900)])
+        self.assertEqual((created, joined, emptied), ([('R_75', '1h', 900)], [], []))
+
+        created, joined, emptied = registry.sync([(1, 'R_75', '1h', 900), (3, 'R_75', '1h', 900),
+                                                  (2, 'R_75', '1h', 3600)])
+        self.assertEqual(created, [('R_75', '1h', 3600)])
+        self.assertEqual(joined, [(('R_75', '1h', 900), 3)])
+        self.assertEqual(emptied, [])
+        self.assertEqual(sorted(registry.chats(('R_75', '1h', 900))), [1, 3])
+
+        created, joined, emptied = registry.sync([(2, 'R_75', '1h', 3600)])
+        self.assertEqual((created, joined, emptied), ([], [], [('R_75', '1h', 900)]))
+        self.assertEqual(len(registry), 1)
+
+
+class ProcessFileTests(TestCase):
+    """Several bot processes each publish their own files, combined by the readers"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_snapshots_merge_newest_signal(self):
+        path = os.path.join(self.directory, 'signals.json')
+        # This process, its parent and one that is not running (well above any pid_max)
+        for pid, generated_at, signals in ((os.getpid(), 1, {'R_75/1h': {'updated_at': 5, 'price': 1},
+                                                             'R_10/1h': {'updated_at': 1, 'price': 2}}),
+                                           (os.getppid(), 9, {'R_75/1h': {'updated_at': 6, 'price': 3}}),
+                                           (999999999, 9, {'R_75/1h': {'updated_at': 7, 'price': 4},
+                                                           'R_25/1h': {'updated_at': 7, 'price': 5}})):
+            with open(process_path(path, pid), 'w') as f:
+                json.dump({'generated_at': generated_at, 'signals': signals}, f)
+        reader = SnapshotReader(path)
+        self.assertEqual(json.loads(reader.get('R_75', '1h').body)['price'], 3)
+        self.assertEqual(len(json.loads(reader.latest().body)['signals']), 2)
+
+    def test_snapshot_files_are_cleaned_up(self):
+        path = os.path.join(self.directory, 'signals.json')
+        with open(process_path(path, 999999999), 'w') as f:
+            json.dump({'generated_at': 1, 'signals': {}}, f)
+        publisher = SnapshotPublisher(path)
+        # The first write prunes the file of the process that is gone
+        publisher.write()
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(process_path(path))])
+        publisher.close()
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_metrics_of_stopped_processes_are_skipped(self):
+        metrics = Metrics(os.path.join(self.directory, 'metrics.prom'))
+        metrics.last_loop_lag.set(0.5)
+        metrics.write()
+        with open(process_path(metrics.path)) as f:
+            text = f.read()
+        # Well above any pid_max, so no such process runs
+        with open(process_path(metrics.path, 999999999), 'w') as f:
+            f.write(text)
+        merged = read_metrics(metrics.path)
+        self.assertIn(f'trading_bot_event_loop_lag_last_seconds{{process="{os.getpid()}"}} 0.5', merged)
+        self.assertNotIn('999999999', merged)
+        self.assertEqual(merged.count('# TYPE trading_bot_event_loop_lag_last_seconds'), 1)
+
+
+class BacktestTests(TestCase):
+    # Long at 100, reversed to short at 99, held into an unchanged last bar
+    closes = [100.0, 110.0, 99.0, 99.0]
+    signals = [BUY, HOLD, SELL, HOLD]
+
+    def test_reversal_pays_the_fee_twice(self):
+        result = simulate(self.closes, self.signals, fee=0.01)
+        self.assertEqual(result.positions.tolist(), [1, 1, -1, -1])
+        # Entry fee, +10%, -10% plus two units of turnover, flat
+        np.testing.assert_allclose(result.returns, [-0.01, 0.1, -0.12, 0.0])
+        # The long trade gives back 1% and pays both fees; the open short only its entry fee
+        np.testing.assert_allclose(result.trade_returns, [1.1 * 0.9 - 1 - 0.02, -0.01])
+        summary = result.summary()
+        self.assertEqual(summary['trades'], 2)
+        self.assertEqual(summary['hit_rate'], 0.0)
+        self.assertEqual(summary['total_return'], round(0.99 * 1.1 * 0.88 - 1, 6))
+        self.assertEqual(summary['max_drawdown'], round(0.88 - 1, 6))
+
+    def test_sell_goes_flat_without_shorting(self):
+        result = simulate(self.closes, self.signals, fee=0.01, allow_short=False)
+        self.assertEqual(result.positions.tolist(), [1, 1, 0, 0])
+        np.testing.assert_allclose(result.returns, [-0.01, 0.1, -0.11, 0.0])
+        np.testing.assert_allclose(result.trade_returns, [1.1 * 0.9 - 1 - 0.02])
+
+    def test_hold_only_never_trades(self):
+        result = simulate(self.closes, [HOLD] * 4, fee=0.01)
+        self.assertEqual(result.positions.tolist(), [0, 0, 0, 0])
+        self.assertEqual(result.summary()['total_return'], 0.0)
+        self.assertEqual(result.trades, 0)
+
+    def test_empty_input(self):
+        summary = simulate([], []).summary()
+        self.assertEqual(summary, {'bars': 0, 'buy_signals': 0, 'sell_signals': 0, 'trades': 0,
+                                   'hit_rate': 0.0, 'total_return': 0.0, 'max_drawdown': 0.0})
+
+
+class SweepTests(TestCase):
+    def test_key_covers_everything_the_result_depends_on(self):
+        closes = np.linspace(100, 110, 50)
+        fingerprint = series_fingerprint(closes)
+        key = evaluation_key('R_75', '1h', {'sma_fast': 5}, 0.0, True, fingerprint)
+        self.assertEqual(key, evaluation_key('R_75', '1h', {'sma_fast': 5}, 0.0, True, series_fingerprint(closes.copy())))
+        self.assertNotEqual(key, evaluation_key('R_75', '1h', {'sma_fast': 5}, 0.001, True, fingerprint))
+        self.assertNotEqual(key, evaluation_key('R_75', '1h', {'sma_fast': 5}, 0.0, False, fingerprint))
+        self.assertNotEqual(key, evaluation_key('R_75', '1h', {'sma_fast': 5}, 0.0, True,
+                                                series_fingerprint(closes[1:])))
+
+    def test_saved_series_keep_their_fingerprint(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = series_file(os.path.join(directory, 'sweep_results.jsonl'))
+        series = {('R_75', '1h'): np.linspace(100, 110, 50), ('BOOM500', '5m'): np.linspace(5, 1, 20)}
+        save_series(path, series)
+        loaded = load_series(path)
+        self.assertEqual(set(loaded), set(series))
+        for name, closes in series.items():
+            self.assertEqual(series_fingerprint(loaded[name]), series_fingerprint(closes))
+
+    def test_only_marked_ranges_are_sampled(self):
+        space = {'sma_fast': [3, 8], 'sma_slow': {'min': 10, 'max': 40}, 'hs_tolerance': {'min': 0.03, 'max': 0.05}}
+        for params in random_parameters(space, 50, seed=1):
+            # A two-element list is a choice between two values, not a range
+            self.assertIn(params['sma_fast'], (3, 8))
+            self.assertIsInstance(params['sma_slow'], int)
+            self.assertTrue(10 <= params['sma_slow'] <= 40)
+            self.assertTrue(0.03 <= params['hs_tolerance'] <= 0.05)
+
+
+def candle_rows(epochs):
+    """A (5, n) block ordered like FIELDS with the epoch as every price"""
+    epochs = np.asarray(epochs, dtype=np.float64)
+    return np.vstack([epochs] * 5)
+
+
+class CandleHistoryTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.history = CandleHistory(self.directory)
+
+    def test_gaps_are_recorded(self):
+        self.history.append('R_75', 60, candle_rows([60, 120, 180]))
+        self.history.append('R_75', 60, candle_rows([180, 240, 420, 480]))
+        self.assertEqual(list(self.history.read('R_75', 60)['epoch']), [60, 120, 180, 240, 420, 480])
+        self.assertEqual(self.history.partition('R_75', 60).gaps(), [(240, 420)])
+
+    def test_submit_backfills_missing_bars(self):
+        requested = []
+
+        async def backfill(start, end):
+            requested.append((start, end))
+            return candle_rows(range(start, end + 60, 60))
+
+        async def archive():
+            await self.history.submit('R_75', 60, candle_rows([60, 120]), backfill)
+            await self.history.submit('R_75', 60, candle_rows([360, 420]), backfill)
+            await self.history.stop()
+
+        asyncio.run(archive())
+        self.assertEqual(requested, [(180, 300)])
+        self.assertEqual(list(self.history.read('R_75', 60)['epoch']), list(range(60, 480, 60)))
+        self.assertEqual(self.history.partition('R_75', 60).gaps(), [])
+
+
+class DeliveryQueueTests(TestCase):
+    def test_refilled_chat_buckets_are_dropped(self):
+        async def deliver():
+            queue = DeliveryQueue(global_rate=1000, chat_rate=1000, group_rate=1000, sweep_interval=3600)
+
+            async def send_message():
+                return True
+
+            await asyncio.gather(*(queue.send(chat_id, send_message) for chat_id in range(-50, 50)))
+            tracked = queue.stats()['chats_tracked']
+            # Every bucket refills within a millisecond at 1000 messages/s
+            await asyncio.sleep(0.01)
+            # Make the next message run the sweep instead of waiting an hour
+            queue._next_sweep = 0
+            await queue.send(1, send_message)
+            await queue.stop()
+            return tracked, queue.stats()['chats_tracked']
+
+        self.assertEqual(asyncio.run(deliver()), (100, 1))
+
+    def test_interactive_replies_overtake_broadcasts(self):
+        async def deliver():
+            queue = DeliveryQueue(global_rate=1000, workers=1)
+            sent = []
+
+            def message(name):
+                async def send_message():
+                    sent.append(name)
+                return send_message
+
+            # Everything is queued before the worker first runs
+            sends = [asyncio.create_task(queue.send(chat_id, message(f'broadcast {chat_id}'), priority=BROADCAST))
+                     for chat_id in range(3)]
+            sends.append(asyncio.create_task(queue.send(10, message('reply'))))
+            await asyncio.gather(*sends)
+            await queue.stop()
+            return sent
+
+        self.assertEqual(asyncio.run(deliver()), ['reply', 'broadcast 0', 'broadcast 1', 'broadcast 2'])
+
+    def test_retry_after_pauses_and_requeues(self):
+        async def deliver():
+            queue = DeliveryQueue(global_rate=1000)
+            attempts = []
+
+            async def send_message():
+                attempts.append(time.monotonic())
+                if len(attempts) == 1:
+                    raise RetryAfter(timedelta(milliseconds=50))
+                return 'sent'
+
+            result = await queue.send(1, send_message)
+            await queue.stop()
+            return result, attempts, queue.retried
+
+        result, attempts, retried = asyncio.run(deliver())
+        self.assertEqual((result, retried), ('sent', 1))
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.05)
+
+    def test_last_attempt_fails(self):
+        async def deliver():
+            queue = DeliveryQueue(global_rate=1000, max_attempts=2)
+
+            async def send_message():
+                raise RetryAfter(timedelta(milliseconds=10))
+
+            try:
+                with self.assertRaises(RetryAfter):
+                    await queue.send(1, send_message)
+                return queue.retried, queue.failed
+            finally:
+                await queue.stop()
+
+        self.assertEqual(asyncio.run(deliver()), (1, 1))
+
+    def test_worker_survives_an_abandoned_last_attempt(self):
+        async def deliver():
+            queue = DeliveryQueue(global_rate=1000, workers=1, max_attempts=1)
+
+            async def slow_flood():
+                await asyncio.sleep(0.05)
+                raise RetryAfter(timedelta(milliseconds=10))
+
+            async def send_message():
+                return 'sent'
+
+            # The caller gives up before the last attempt fails
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(queue.send(1, slow_flood), 0.01)
+            await asyncio.sleep(0.06)
+            worker = queue._tasks[0]
+            try:
+                return worker.done(), await asyncio.wait_for(queue.send(2, send_message), 1)
+            finally:
+                await queue.stop()
+
+        self.assertEqual(asyncio.run(deliver()), (False, 'sent'))
+
+
+class BatchRecorder(AnalysisRecorder):
+    """AnalysisRecorder that keeps the batches it would have saved"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.saved = []
+
+    def _write(self, batch):
+        self.saved.append([row['symbol'] for row in batch])
+
+
+def record(recorder, symbol):
+    recorder.record(symbol, '1h', 'Hold', 'None', 100.0, 50.0, 0.1, 0.2)
+
+
+class AnalysisRecorderTests(TestCase):
+    def test_full_batches_are_written_together(self):
+        async def main():
+            recorder = BatchRecorder(batch_size=3, flush_interval=60)
+            recorder.start()
+            for symbol in ('A', 'B', 'C', 'D', 'E', 'F', 'G'):
+                record(recorder, symbol)
+            await asyncio.sleep(0.1)
+            await recorder.stop()
+            return recorder
+
+        recorder = asyncio.run(main())
+        self.assertEqual(recorder.saved, [['A', 'B', 'C'], ['D', 'E', 'F'], ['G']])
+        self.assertEqual(recorder.stats()['batches'], 3)
+        self.assertEqual(recorder.written, 7)
+
+    def test_partial_batch_waits_for_the_interval_or_stop(self):
+        async def main():
+            recorder = BatchRecorder(batch_size=3, flush_interval=60)
+            recorder.start()
+            record(recorder, 'A')
+            record(recorder, 'B')
+            await asyncio.sleep(0.1)
+            waiting = list(recorder.saved)
+            await recorder.stop()
+            return waiting, recorder
+
+        waiting, recorder = asyncio.run(main())
+        self.assertEqual(waiting, [])
+        self.assertEqual(recorder.saved, [['A', 'B']])
+        self.assertEqual(recorder.stats()['pending'], 0)
+
+    def test_queued_rows_match_the_model(self):
+        recorder = AnalysisRecorder()
+        self.addCleanup(recorder._executor.shutdown)
+        record(recorder, 'R_75')
+        record(recorder, 'BOOM500')
+        # Called directly so the rows land in this test's transaction
+        recorder._write(list(recorder._pending))
+        self.assertEqual(sorted(AnalysisResult.objects.values_list('symbol', flat=True)), ['BOOM500', 'R_75'])
+
+
+def recorded_closes():
+    return pd.read_csv(os.path.join(settings.BASE_DIR, 'data.csv'))['close'].values
+
+
+def random_walk(size, seed=0):
+    """Closes moving about 1% a bar, so the 1% and 5% pattern tolerances are met only sometimes"""
+    return 1000 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, size)))
+
+
+def reference_indicators(closes):
+    """The indicators as analyze_data computed them with ta, before IndicatorEngine and the kernels"""
+    close = pd.Series(closes)
+    macd = ta.trend.MACD(close)
+    return {
+        'SMA_5': close.rolling(window=5).mean().values,
+        'SMA_10': close.rolling(window=10).mean().values,
+        'RSI': ta.momentum.RSIIndicator(close, window=14).rsi().values,
+        'MACD': macd.macd().values,
+        'MACD_signal': macd.macd_signal().values,
+    }
+
+
+def reference_analysis(closes):
+    """analyze_data as it was with ta and PatternRecognition: (indicators, pattern names, recommendation)"""
+    indicators = reference_indicators(closes)
+    recommendation, patterns = PatternRecognition(pd.DataFrame({'close': closes})).get_trading_signal()
+    last = {column: values[-1] for column, values in indicators.items()}
+    traditional = 'Hold'
+    if last['SMA_5'] > last['SMA_10'] and last['MACD'] > last['MACD_signal'] and last['RSI'] < 70:
+        traditional = 'Buy'
+    elif last['SMA_5'] < last['SMA_10'] and last['MACD'] < last['MACD_signal'] and last['RSI'] > 30:
+        traditional = 'Sell'
+    detected = {name for name, details in patterns.items() if details.get('detected', False)}
+    return indicators, detected, recommendation if recommendation != 'Hold' else traditional
+
+
+class IndicatorEngineTests(TestCase):
+    """IndicatorEngine against the ta indicators analyze_data used before it"""
+
+    def assert_indicators_match(self, actual, expected):
+        for column, values in expected.items():
+            np.testing.assert_allclose(actual[column], values, rtol=1e-9, atol=1e-9, equal_nan=True,
+                                       err_msg=column)
+
+    def test_indicator_engine_matches_ta(self):
+        for closes in (recorded_closes(), random_walk(300, seed=2)):
+            engine = IndicatorEngine(capacity=1000)
+            epochs = 300 * np.arange(len(closes))
+            # Growing windows from the same first bar, so the engine has seen exactly the bars ta sees
+            for n in range(1, len(closes) + 1):
+                with self.subTest(bars=n):
+                    self.assert_indicators_match(engine.compute('R_75', epochs[:n], closes[:n]),
+                                                 reference_indicators(closes[:n]))
+            # A revision of the forming bar
+            revised = closes.copy()
+            revised[-1] *= 1.01
+            self.assert_indicators_match(engine.compute('R_75', epochs, revised), reference_indicators(revised))
+
+    def test_sliding_window_stays_within_the_seed_weight(self):
+        # As the bot serves it: a 100-bar window moving one bar at a time over a longer history
+        closes = random_walk(600, seed=4)
+        epochs = 300 * np.arange(len(closes))
+        engine = IndicatorEngine(capacity=1000)
+        for end in range(100, len(closes) + 1):
+            window = closes[end - 100:end]
+            with self.subTest(end=end):
+                actual = engine.compute('R_75', epochs[end - 100:end], window)
+                expected = reference_indicators(window)
+                # The SMAs only look back 10 bars, so they match wherever ta has them
+                self.assert_indicators_match({column: actual[column][9:] for column in ('SMA_5', 'SMA_10')},
+                                             {column: expected[column][9:] for column in ('SMA_5', 'SMA_10')})
+                # The engine keeps the bars before the window, ta reseeds on its first bar; at the
+                # last bar that seed weighs (13/14)**100 ~ 6e-4, relative to RSI's 0-100 scale and
+                # to the window's price range for MACD
+                self.assertLess(abs(actual['RSI'][-1] - expected['RSI'][-1]), 6e-4 * 100)
+                price_range = window.max() - window.min()
+                for column in ('MACD', 'MACD_signal'):
+                    self.assertLess(abs(actual[column][-1] - expected[column][-1]), 6e-4 * price_range)
+
+
+class AnalysisRegressionTests(TestCase):
+    """The kernels, IndicatorEngine and the pattern scanner against the ta and PatternRecognition code they replaced"""
+
+    def assert_indicators_match(self, actual, expected):
+        for column, values in expected.items():
+            np.testing.assert_allclose(actual[column], values, rtol=1e-9, atol=1e-9, equal_nan=True,
+                                       err_msg=column)
+
+    def assert_matches_reference(self, closes, indicators, patterns, signal):
+        expected_indicators, expected_patterns, expected_signal = reference_analysis(closes)
+        self.assert_indicators_match(indicators, expected_indicators)
+        self.assertEqual({name for name, _, _ in PATTERNS if patterns[name]}, expected_patterns)
+        self.assertEqual(SIGNAL_NAMES[int(signal)], expected_signal)
+
+    def test_analyze_matrix_matches_reference(self):
+        for closes in (recorded_closes(), random_walk(100)):
+            for n in range(1, len(closes) + 1):
+                if n == 10:
+                    # PatternRecognition fails on the empty second half; the kernels report no pattern
+                    continue
+                with self.subTest(bars=n):
+                    indicators, patterns, signals = analyze_matrix(closes[:n])
+                    self.assert_matches_reference(
+                        closes[:n], {column: values[0] for column, values in indicators.items()},
+                        {name: mask[0] for name, mask in patterns.items()}, signals[0]
+                    )
+
+    def test_batched_rows_match_reference(self):
+        closes = random_walk(700, seed=1)
+        windows = np.lib.stride_tricks.sliding_window_view(closes, 100)[::6]
+        indicators, patterns, signals = analyze_matrix(windows)
+        for row, window in enumerate(windows):
+            with self.subTest(row=row):
+                self.assert_matches_reference(
+                    window, {column: values[row] for column, values in indicators.items()},
+                    {name: mask[row] for name, mask in patterns.items()}, signals[row]
+                )
+        self.assertEqual(set(SIGNAL_NAMES[int(signal)] for signal in signals), {'Buy', 'Sell', 'Hold'})
+
+    def test_analyze_matrix_with_exactly_ten_bars(self):
+        closes = random_walk(10)
+        with self.assertRaises(ValueError):
+            PatternRecognition(pd.DataFrame({'close': closes}))
+        _, patterns, _ = analyze_matrix(closes)
+        self.assertFalse(any(mask[0] for mask in patterns.values()))
+
+    def test_pattern_scan_matches_pattern_recognition(self):
+        for closes in (recorded_closes(), random_walk(120, seed=3)):
+            masks = scan_pattern_masks(closes)
+            signals = pattern_signals(closes)
+            detections = scan_patterns(closes)
+            for t in range(len(closes)):
+                if t + 1 == 10:
+                    self.assertFalse(any(mask[t] for mask in masks.values()))
+                    continue
+                with self.subTest(bar=t):
+                    analyzer = PatternRecognition(pd.DataFrame({'close': closes[:t + 1]}))
+                    recommendation, detected = analyzer.get_trading_signal()
+                    self.assertEqual({name for name, _, _ in PATTERNS if masks[name][t]}, set(detected))
+                    self.assertEqual(int(signals[t]), {'Buy': 1, 'Sell': -1, 'Hold': 0}[recommendation])
+                    at_bar = detections[detections['index'] == t]
+                    self.assertEqual({PATTERNS[code][0] for code in at_bar['pattern']}, set(detected))
+            self.assertTrue(all(mask.any() for mask in masks.values()))
+
+    def test_pattern_tolerance_edges(self):
+        # Fewer than 10 bars can hold no pattern
+        self.assertFalse(any(mask.any() for mask in scan_pattern_masks(random_walk(9)).values()))
+
+        # The tolerances are strict: tops 1% apart are not a Double Top at 1%
+        closes = np.concatenate([np.full(9, 90.0), [100.0], np.full(9, 90.0), [101.0]])
+        masks = scan_pattern_masks(closes)
+        self.assertFalse(masks['Double Top'][-1])
+        self.assertNotIn('Double Top', PatternRecognition(pd.DataFrame({'close': closes})).patterns)
+        self.assertTrue(scan_pattern_masks(closes, double_tolerance=0.011)['Double Top'][-1])
+
+        # Shoulders 4% apart around a higher head
+        closes = np.concatenate([np.full(9, 90.0), [100.0], np.full(9, 90.0), [110.0], np.full(9, 90.0), [104.0]])
+        self.assertTrue(scan_pattern_masks(closes)['Head and Shoulders'][-1])
+        self.assertIn('Head and Shoulders', PatternRecognition(pd.DataFrame({'close': closes})).patterns)
+        self.assertFalse(scan_pattern_masks(closes, hs_tolerance=0.04)['Head and Shoulders'][-1])
+        # A head only as high as a shoulder is not one
+        closes[19] = 104.0
+        self.assertFalse(scan_pattern_masks(closes)['Head and Shoulders'][-1])
+
+        # A flat series is both a Double Top and a Double Bottom, which tie unless reweighted
+        closes = np.full(20, 100.0)
+        self.assertEqual(pattern_signals(closes)[-1], 0)
+        self.assertEqual(pattern_signals(closes, weights={'Double Bottom': 0.9})[-1], 1)
+        self.assertEqual(pattern_signals(closes, double_tolerance=0.0)[-1], 0)
+
+
+class DerivConnectionPoolTests(TestCase):
+    def test_unreachable_endpoint_fails_by_the_deadline(self):
+        async def send():
+            # Nothing listens on port 1, so every connection attempt is refused and retried
+            pool = DerivConnectionPool(1089, endpoint='127.0.0.1:1', connect_timeout=0.2, connect_deadline=0.5)
+            try:
+                started = time.monotonic()
+                with self.assertRaises(ConnectionError):
+                    await pool.send({'ping': 1})
+                return time.monotonic() - started
+            finally:
+                await pool.close()
+
+        self.assertLess(asyncio.run(send()), 2)
+
+
+class MarketScannerTests(TestCase):
+    def test_results_arrive_as_they_finish_and_failures_do_not_stop_the_scan(self):
+        delays = {'R_10': 0.05, 'R_25': 0.0, 'R_50': 0.0, 'R_75': 1.0}
+
+        async def analyze(symbol, timeframe):
+            await asyncio.sleep(delays[symbol])
+            if symbol == 'R_50':
+                raise ConnectionError('no candles')
+            return symbol.lower()
+
+        async def main():
+            scanner = MarketScanner(analyze, concurrency=4, timeout=0.2)
+            return [result async for result in scanner.scan([(symbol, '1h') for symbol in delays])]
+
+        results = asyncio.run(main())
+        self.assertEqual(results[-2:], [('R_10', '1h', 'r_10'), ('R_75', '1h', None)])
+        self.assertEqual(sorted(results[:2]), [('R_25', '1h', 'r_25'), ('R_50', '1h', None)])
+
+    def test_concurrent_scans_share_the_limit(self):
+        running = []
+        peak = []
+
+        async def analyze(symbol, timeframe):
+            running.append(symbol)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(symbol)
+            return symbol
+
+        async def main():
+            scanner = MarketScanner(analyze, concurrency=3)
+
+            async def scan(timeframe):
+                return [result async for result in scanner.scan([(f'R_{n}', timeframe) for n in range(5)])]
+
+            return await asyncio.gather(scan('1h'), scan('4h'))
+
+        first, second = asyncio.run(main())
+        self.assertEqual((len(first), len(second)), (5, 5))
+        self.assertEqual(max(peak), 3)
+
+
+def last_bar(**columns):
+    return pd.DataFrame([{'SMA_5': 10.0, 'SMA_10': 9.0, 'MACD': 0.2, 'MACD_signal': 0.1, 'RSI': 60.0, **columns}])
+
+
+class ScanRankingTests(TestCase):
+    def test_signal_strength(self):
+        df = last_bar()
+        # Pattern agrees, SMA and MACD agree, RSI leans 10 points the same way
+        self.assertAlmostEqual(signal_strength(df, 'Buy', 'Double Bottom'), 0.7 + 0.5 + 0.5 + 0.1)
+        self.assertAlmostEqual(signal_strength(df, 'Sell', 'Double Bottom, Head and Shoulders'), -0.7 + 0.8 - 0.1)
+        self.assertAlmostEqual(signal_strength(last_bar(RSI=np.nan), 'Buy', 'None'), 1.0)
+        self.assertEqual(signal_strength(df, 'Hold', 'Double Bottom'), 0.0)
+
+    def test_format_scan_ranks_by_strength(self):
+        results = [
+            (0.8, 'R_10', '1h', 'Sell', 'None'),
+            (0.0, 'R_25', '1h', 'Hold', 'None'),
+            (1.9, 'R_50', '4h', 'Buy', 'Double Bottom'),
+            (1.2, 'R_75', '1h', 'Buy', 'None'),
+        ]
+        text = format_scan(results, 1, 6)
+        self.assertIn('(5/6 series)', text)
+        self.assertLess(text.index('R_50'), text.index('R_75'))
+        self.assertLess(text.index('R_75'), text.index('R_10'))
+        self.assertIn('R_50</b> 4h: Buy (1.90) • Double Bottom', text)
+        self.assertNotIn('R_25', text)
+        self.assertIn('⚪ Hold: 1 | ❌ Failed: 1', text)
+        self.assertIn('Scanning...', text)
+        self.assertIn('Finished in 2.5s', format_scan(results, 1, 6, 2.5))
+
+    def test_format_scan_keeps_only_the_strongest(self):
+        results = [(float(n), f'R_{n}', '1h', 'Buy', 'None') for n in range(SCAN_TOP + 2)]
+        text = format_scan(results, 0, len(results))
+        self.assertIn(f'R_{SCAN_TOP + 1}</b>', text)
+        self.assertNotIn('R_0</b>', text)
+        self.assertIn('… and 2 weaker signals', text)
+        self.assertIn('No Buy or Sell signals yet.', format_scan([], 0, 3))
+
+
+class SignalStreamViewTests(TestCase):
+    def test_not_streamed_under_wsgi(self):
+        # The test client goes through the WSGI handler, like gunicorn
+        response = self.client.get('/api/signals/stream')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.streaming)
+
+
+class CandleCacheTests(TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.loads = []
+
+        async def loader(symbol, granularity, count):
+            self.loads.append((symbol, granularity, count))
+            # Give concurrent callers the chance to find the load in flight
+            await asyncio.sleep(0.01)
+            return pd.DataFrame({'close': np.arange(count, dtype=float)})
+
+        self.cache = CandleCache(loader, clock=lambda: self.now)
+
+    def test_concurrent_gets_share_one_load(self):
+        async def get_all():
+            return await asyncio.gather(*(self.cache.get('R_75', 60, 100) for _ in range(5)))
+
+        frames = asyncio.run(get_all())
+        self.assertEqual(self.loads, [('R_75', 60, 100)])
+        self.assertTrue(all(frame is frames[0] for frame in frames))
+        self.assertEqual((self.cache.misses, self.cache.coalesced, self.cache.hits), (1, 4, 0))
+
+    def test_entries_expire_at_the_next_candle_boundary(self):
+        self.assertEqual(next_candle_boundary(60, 1000.0), 1020)
+        self.assertEqual(next_candle_boundary(60, 1020.0), 1080)
+
+        async def get():
+            return await self.cache.get('R_75', 60, 100)
+
+        asyncio.run(get())
+        self.now = 1019.9
+        asyncio.run(get())
+        self.assertEqual((len(self.loads), self.cache.hits), (1, 1))
+        # The bar that opens at 1020 may be new
+        self.now = 1020.0
+        asyncio.run(get())
+        self.assertEqual(len(self.loads), 2)
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_keys_and_invalidation(self):
+        async def get(symbol, granularity):
+            return await self.cache.get(symbol, granularity, 100)
+
+        for symbol, granularity in (('R_75', 60), ('R_75', 300), ('R_10', 60)):
+            asyncio.run(get(symbol, granularity))
+        self.cache.invalidate('R_75', 60)
+        asyncio.run(get('R_75', 300))
+        asyncio.run(get('R_75', 60))
+        self.assertEqual(len(self.loads), 4)
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 4, 'coalesced': 0, 'entries': 3, 'in_flight': 0})
+
+
+class CandleBufferTests(TestCase):
+    def test_wraparound_keeps_the_latest_bars_contiguous(self):
+        buffer = CandleBuffer(4)
+        self.assertEqual(buffer.upsert(candle_rows(60 * np.arange(1, 11))), 10)
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.last_epoch, 600)
+        views = buffer.arrays()
+        self.assertEqual(list(views['epoch']), [420, 480, 540, 600])
+        self.assertEqual(list(buffer.arrays(2)['close']), [540, 600])
+        self.assertFalse(views['close'].flags.writeable)
+
+    def test_upsert_revises_the_forming_bar(self):
+        buffer = CandleBuffer(4)
+        buffer.upsert(candle_rows([60, 120]))
+        forming = candle_rows([120, 180])
+        forming[4, 0] = 125.0
+        # The revised bar replaces the stored one, the new bar is appended, older bars are ignored
+        self.assertEqual(buffer.upsert(np.hstack([candle_rows([60]), forming])), 1)
+        self.assertEqual(list(buffer.arrays()['epoch']), [60, 120, 180])
+        self.assertEqual(list(buffer.arrays()['close']), [60, 125, 180])
+
+    def test_grow_keeps_the_bars(self):
+        buffer = CandleBuffer(3)
+        buffer.upsert(candle_rows(60 * np.arange(1, 6)))
+        buffer.grow(6)
+        buffer.upsert(candle_rows([360, 420]))
+        self.assertEqual(list(buffer.arrays()['epoch']), [180, 240, 300, 360, 420])
+
+
+class CandleStoreTests(TestCase):
+    def setUp(self):
+        self.now = 600
+        # Bars Deriv has, and how many it returns to a request without a count
+        self.bars = list(range(0, 600, 60))
+        self.limit = 3
+        self.requests = []
+        self.store = CandleStore(self.send, capacity=20, clock=lambda: self.now)
+
+    async def send(self, request):
+        self.requests.append(request)
+        end = float('inf') if request['end'] == 'latest' else request['end']
+        epochs = [epoch for epoch in self.bars if request.get('start', 0) <= epoch <= end]
+        epochs = epochs[-request.get('count', self.limit):]
+        return {'candles': [{'epoch': epoch, 'open': epoch, 'high': epoch, 'low': epoch, 'close': epoch}
+                            for epoch in epochs]}
+
+    def test_refresh_only_asks_for_new_bars(self):
+        buffer = asyncio.run(self.store.refresh('R_75', 60, 5))
+        self.assertEqual(list(buffer.arrays()['epoch']), [300, 360, 420, 480, 540])
+        self.assertEqual(self.requests[-1]['count'], 5)
+
+        self.bars.append(600)
+        self.now = 660
+        asyncio.run(self.store.refresh('R_75', 60, 5))
+        self.assertEqual(self.requests[-1]['start'], 540)
+        self.assertEqual(list(buffer.arrays(2)['epoch']), [540, 600])
+
+    def test_missing_bars_are_refetched(self):
+        buffer = asyncio.run(self.store.refresh('R_75', 60, 5))
+        # Five bars later, a plain refresh only returns the latest three
+        self.bars += list(range(600, 900, 60))
+        self.now = 900
+        asyncio.run(self.store.refresh('R_75', 60, 5))
+        self.assertEqual((self.requests[-1]['start'], self.requests[-1]['end']), (540, 720))
+        self.assertEqual(list(buffer.arrays()['epoch']), list(range(300, 900, 60)))
+
+
+class FakeSubscription:
+    """What DerivAPI.subscribe returns: an Observable the stream pushes messages through"""
+
+    def __init__(self):
+        self.on_next = None
+        self.disposed = False
+
+    def subscribe(self, on_next, on_error, on_completed):
+        self.on_next = on_next
+        return self
+
+    def dispose(self):
+        self.disposed = True
+
+
+class FakeStreamPool:
+    def __init__(self):
+        self.subscriptions = []
+
+    async def subscribe(self, request):
+        self.subscriptions.append(FakeSubscription())
+        return self.subscriptions[-1]
+
+
+def ohlc(open_time, close):
+    return {'ohlc': {'open_time': open_time, 'open': close, 'high': close, 'low': close, 'close': close}}
+
+
+class CandleStreamTests(TestCase):
+    def setUp(self):
+        self.pool = FakeStreamPool()
+        self.store = CandleStore(self.pool.subscribe)
+
+    def test_closed_candles_reach_listeners_and_waiters(self):
+        async def stream():
+            candle_stream = CandleStream(self.pool, self.store)
+            closed = []
+
+            async def on_close(symbol, granularity, epoch):
+                closed.append((symbol, granularity, epoch))
+
+            candle_stream.add_listener(on_close)
+            candle_stream.start('R_75', 60)
+            await asyncio.sleep(0)
+            subscription = self.pool.subscriptions[0]
+            subscription.on_next({'candles': [{'epoch': epoch, 'open': 1, 'high': 1, 'low': 1, 'close': 1}
+                                              for epoch in (0, 60)]})
+            waiter = asyncio.create_task(candle_stream.wait_for_close('R_75', 60))
+            # A revision of the forming bar closes nothing, a new bar closes the previous one
+            subscription.on_next(ohlc(60, 2))
+            subscription.on_next(ohlc(120, 3))
+            epoch = await asyncio.wait_for(waiter, 1)
+            await asyncio.sleep(0.01)
+            await candle_stream.stop()
+            return epoch, closed, candle_stream.closed_candles
+
+        epoch, closed, count = asyncio.run(stream())
+        self.assertEqual((epoch, closed, count), (60, [('R_75', 60, 60)], 1))
+        buffer = self.store.buffer('R_75', 60)
+        self.assertEqual(list(buffer.arrays()['close']), [1, 2, 3])
+
+    def test_idle_stream_is_unsubscribed(self):
+        async def stream():
+            candle_stream = CandleStream(self.pool, self.store, idle_timeout=0.05)
+            candle_stream.start('R_75', 60)
+            await asyncio.sleep(0)
+            self.pool.subscriptions[0].on_next({'candles': [{'epoch': 0, 'open': 1, 'high': 1, 'low': 1,
+                                                             'close': 1}]})
+            await asyncio.sleep(0.01)
+            live = ('R_75', 60) in self.store._live
+            # No update within idle_timeout: the silent socket is dropped and resubscribed after a backoff
+            await asyncio.sleep(0.1)
+            subscription = self.pool.subscriptions[0]
+            result = live, subscription.disposed, ('R_75', 60) in self.store._live, candle_stream.running
+            await candle_stream.stop()
+            return result
+
+        self.assertEqual(asyncio.run(stream()), (True, True, False, True))
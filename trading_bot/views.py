@@ -1,27 +1,41 @@
-from django.http import JsonResponse
-from django.views.decorators.http import require_GET
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.middleware.csrf import get_token
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+from django.views.decorators.http import condition, require_GET
 import os
-import json
 from datetime import datetime
+from .snapshot import SnapshotReader
+from .signal_stream import SignalHub
+from .metrics import read_metrics
+from .profiling import MODES as PROFILE_MODES, PROFILE_DIR, list_artifacts, request_capture
+from .startup import read_heartbeats
+
+# Latest signals as published by the bot; one per worker process, reloaded when the file changes
+signals_snapshot = SnapshotReader()
+
+# Pushes snapshot changes to Server-Sent Events clients; only useful under the ASGI app
+signal_hub = SignalHub(SnapshotReader())
 
 @require_GET
 def bot_status(request):
     """Return the status of the trading bot"""
     try:
-        # Check if the bot is running
-        # This is a simple implementation - you might want to use a more robust method
-        bot_running = os.path.exists('bot_heartbeat.txt')
+        # Each bot process writes its heartbeat once it is serving and removes it on shutdown
+        heartbeats = read_heartbeats()
+        heartbeat = heartbeats[-1] if heartbeats else None
         
-        # Get the last analysis time if available
+        # Get the last analysis time from the signals snapshot the bot publishes
         last_analysis_time = None
-        if os.path.exists('last_analysis.json'):
-            with open('last_analysis.json', 'r') as f:
-                data = json.load(f)
-                last_analysis_time = data.get('timestamp')
-                last_analysis_time = data.get('timestamp')
+        latest = signals_snapshot.latest()
+        if latest is not None:
+            last_analysis_time = latest.last_modified.strftime('%Y-%m-%d %H:%M:%S')
         
         return JsonResponse({
-            'status': 'running' if bot_running else 'stopped',
+            'status': 'running' if heartbeat else 'stopped',
+            'processes': len(heartbeats),
+            'startup': heartbeat.get('phases') if heartbeat else None,
             'last_analysis': last_analysis_time,
             'current_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'version': '1.0.0'
@@ -31,3 +45,114 @@ def bot_status(request):
             'status': 'error',
             'error': str(e)
         }, status=500)
+
+def _cached_signal(request, symbol=None, timeframe=None):
+    """Look up the snapshot entry once per request, shared by the validators and the view"""
+    if not hasattr(request, '_cached_signal'):
+        if symbol is None:
+            request._cached_signal = signals_snapshot.latest()
+        else:
+            request._cached_signal = signals_snapshot.get(symbol.upper(), timeframe)
+    return request._cached_signal
+
+def _signal_etag(request, *args, **kwargs):
+    cached = _cached_signal(request, *args, **kwargs)
+    return cached.etag if cached else None
+
+def _signal_last_modified(request, *args, **kwargs):
+    cached = _cached_signal(request, *args, **kwargs)
+    return cached.last_modified if cached else None
+
+def _signal_response(cached, missing):
+    if cached is None:
+        return JsonResponse({'error': missing}, status=404)
+    response = HttpResponse(cached.body, content_type='application/json')
+    # Pollers must revalidate, which is cheap: a matching ETag gets an empty 304
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+@require_GET
+@condition(etag_func=_signal_etag, last_modified_func=_signal_last_modified)
+def latest_signals(request):
+    """Return the latest signal of every analyzed symbol and timeframe"""
+    return _signal_response(_cached_signal(request), 'No signals published yet')
+
+@require_GET
+@condition(etag_func=_signal_etag, last_modified_func=_signal_last_modified)
+def series_signal(request, symbol, timeframe):
+    """Return the latest signal for one symbol and timeframe"""
+    return _signal_response(_cached_signal(request, symbol, timeframe), f'No signal for {symbol} {timeframe}')
+
+@require_GET
+async def signal_stream(request):
+    """Stream signal updates as Server-Sent Events.
+
+    Optional ?symbols=R_75,R_10 and ?timeframes=1h,4h narrow the stream.
+    Only served by the ASGI app: under WSGI a sync worker would be held
+    for the whole connection without ever flushing an event, so such
+    requests get a 404.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Signal streaming is only served by the ASGI server on STREAM_PORT'},
+                            status=404)
+    symbols = [s.strip().upper() for s in request.GET.get('symbols', '').split(',') if s.strip()]
+    timeframes = [tf.strip() for tf in request.GET.get('timeframes', '').split(',') if tf.strip()]
+    subscriber = signal_hub.subscribe(symbols, timeframes)
+    response = StreamingHttpResponse(signal_hub.events(subscriber), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@require_GET
+def metrics_view(request):
+    """Serve the bot's metrics in the Prometheus text format.
+
+    Every bot process writes its own metrics file every few seconds and
+    they are served together, each sample labelled with its process;
+    trading_bot_metrics_timestamp_seconds tells a stale file apart.
+    """
+    body = read_metrics()
+    if body is None:
+        return HttpResponse('# The bot has not published metrics yet\n', status=503,
+                            content_type='text/plain; version=0.0.4; charset=utf-8')
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def profiles(request):
+    """Admin page listing saved bot profiles, with a form to request a new capture.
+
+    The capture runs in the bot process, which picks the request up
+    within a second; reload the page once it has finished.
+    """
+    message = ''
+    if request.method == 'POST':
+        try:
+            request_capture(float(request.POST.get('seconds', 10)), request.POST.get('mode', 'sample'))
+            return HttpResponseRedirect(reverse('profiles') + '?requested=1')
+        except (OSError, ValueError) as e:
+            message = f'Could not request a capture: {e}'
+    elif request.GET.get('requested'):
+        message = 'Capture requested; it appears below once the bot has finished it.'
+
+    rows = format_html_join(
+        '', '<tr><td><a href="{}">{}</a></td><td>{} KB</td><td>{}</td></tr>',
+        ((reverse('profile_download', args=[name]), name, round(size / 1024, 1),
+          datetime.fromtimestamp(modified).strftime('%Y-%m-%d %H:%M:%S'))
+         for name, size, modified in list_artifacts())
+    )
+    modes = format_html_join('', '<option value="{}">{}</option>', ((mode, mode) for mode in PROFILE_MODES))
+    return HttpResponse(format_html(
+        '<h1>Bot profiles</h1><p>{}</p>'
+        '<form method="post"><input type="hidden" name="csrfmiddlewaretoken" value="{}">'
+        'Profile for <input name="seconds" type="number" value="10" min="1" step="any"> seconds '
+        '<select name="mode">{}</select> <button type="submit">Start</button></form>'
+        '<p>Open .collapsed files with speedscope or flamegraph.pl, .pstats files with pstats or snakeviz.</p>'
+        '<table><tr><th>Profile</th><th>Size</th><th>Saved</th></tr>{}</table>',
+        message, get_token(request), modes, rows
+    ))
+
+def profile_download(request, name):
+    """Download a saved profile"""
+    if name not in {artifact[0] for artifact in list_artifacts()}:
+        raise Http404('No such profile')
+    return FileResponse(open(os.path.join(PROFILE_DIR, name), 'rb'), as_attachment=True, filename=name)